@@ -1,29 +1,16 @@
-import requests
-import time
 import urllib.parse
 import logging
 import os
+import unicodedata
+from datetime import timedelta
 
-from .models import Genre, Beatmap
-
-# Configure logging
-logger = logging.getLogger(__name__)
-
-# Define the base URL for the MusicBrainz API
-BASE_URL = "https://musicbrainz.org/ws/2/"
-
-# headers/User-Agent
-HEADERS = {
-    "User-Agent": "echosu/0.9 (Richardhansen.no@outlook.com)" 
-}
-
-# Rate limiting: one request per second
 import requests
-import time
-import urllib.parse
-import logging
+from django.db import IntegrityError
+from django.db.models import Q
+from django.utils import timezone
 
-from .models import Genre, Beatmap
+from .helpers import http_client
+from .models import Genre, Beatmap, GenreCacheEntry
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -40,26 +27,45 @@ MB_HEADERS = {
 LASTFM_API_KEY = os.getenv('LASTFM_API_KEY', '')  # Provide via environment
 LASTFM_BASE_URL = "https://ws.audioscrobbler.com/2.0/"
 
-# Rate limiting: one request per second
-RATE_LIMIT = 1  # seconds
-last_request_time = 0
+
+# Last.fm API error codes that mean "no such artist/track" rather than a failed lookup
+LASTFM_NOT_FOUND_ERRORS = {6}
+
+
+class GenreLookupError(Exception):
+    """An upstream lookup failed (connection error, 429/5xx, bad payload).
+
+    Unlike an empty answer this says nothing about the song, so it must not be cached as "no genres".
+    """
+
 
 def rate_limited_request(url, params=None, headers=None):
     """
-    Perform a GET request to the specified URL with rate limiting.
+    Perform a GET request to the specified URL and return the decoded JSON.
+    Pooling, per-host rate limits (MusicBrainz 1/s, Last.fm 4/s) and retries
+    are handled by the shared http_client.
+    - 404 (unknown MBID) returns None: a definite "not found"
+    - transport errors, other HTTP errors, invalid JSON and Last.fm API errors raise GenreLookupError
     """
-    global last_request_time
-    elapsed = time.time() - last_request_time
-    if elapsed < RATE_LIMIT:
-        time.sleep(RATE_LIMIT - elapsed)
+    if headers is None and url.startswith(MB_BASE_URL):
+        headers = MB_HEADERS
     try:
-        response = requests.get(url, headers=headers, params=params)
-        last_request_time = time.time()
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"HTTP Request failed: {e} for URL: {url} with params: {params}")
+        response = http_client.get(url, params=params, headers=headers)
+    except requests.RequestException as exc:
+        raise GenreLookupError(f"Request to {url} failed: {exc}") from exc
+    if response.status_code == 404:
         return None
+    if response.status_code >= 400:
+        raise GenreLookupError(f"Request to {url} returned HTTP {response.status_code}")
+    try:
+        data = response.json()
+    except ValueError as exc:
+        raise GenreLookupError(f"Invalid JSON from {url}: {exc}") from exc
+    if isinstance(data, dict) and 'error' in data and url.startswith(LASTFM_BASE_URL):
+        if data.get('error') in LASTFM_NOT_FOUND_ERRORS:
+            return None
+        raise GenreLookupError(f"Last.fm error {data.get('error')}: {data.get('message')}")
+    return data
 
 # === Last.fm Functions ===
 
@@ -211,7 +217,7 @@ def get_genres_from_artist(artist_mbid):
     Fetch genres associated with an artist using their MBID.
     """
     print(f"Fetching genres for artist MBID: {artist_mbid}")
-    url = urllib.parse.urljoin(BASE_URL, f"artist/{artist_mbid}")
+    url = urllib.parse.urljoin(MB_BASE_URL, f"artist/{artist_mbid}")
     params = {
         "inc": "genres",
         "fmt": "json"
@@ -295,3 +301,197 @@ def get_or_create_genres(genre_names):
         else:
             print(f"Genre already exists: {name}")
     return genres
+
+
+# === Genre cache ===
+# Request paths only read the cache (and enqueue misses); the enrich_genres
+# management command is the only caller that talks to Last.fm/MusicBrainz.
+
+# How long an empty result is trusted before the worker retries it
+NEGATIVE_CACHE_TTL = timedelta(days=30)
+# Found genres are refreshed rarely; upstream tags barely change
+POSITIVE_CACHE_TTL = timedelta(days=180)
+# A claimed entry is handed to another worker if not finished within this lease
+WORKER_LEASE = timedelta(minutes=10)
+
+
+def normalize_genre_key(value):
+    """Normalize an artist or title for cache keys: NFKC, casefolded, single-spaced."""
+    value = unicodedata.normalize('NFKC', value or '')
+    return ' '.join(value.casefold().split())[:255]
+
+
+def _error_backoff(attempts):
+    return timedelta(hours=min(2 ** max(attempts - 1, 0), 24 * 7))
+
+
+def enqueue_genre_lookup(artist, title):
+    """Ensure a cache row exists for (artist, title); returns the entry."""
+    artist_key = normalize_genre_key(artist)
+    title_key = normalize_genre_key(title)
+    try:
+        entry, _ = GenreCacheEntry.objects.get_or_create(
+            artist_key=artist_key,
+            title_key=title_key,
+            defaults={'artist': artist or '', 'title': title or ''},
+        )
+    except IntegrityError:
+        entry = GenreCacheEntry.objects.get(artist_key=artist_key, title_key=title_key)
+    return entry
+
+
+def cached_genres(artist, title, enqueue=True):
+    """
+    Return cached genre names for (artist, title) without any network access.
+    - list (possibly empty) when the cache has an answer, falling back to the artist entry
+    - None when nothing is known yet; the lookup is enqueued for the worker
+    """
+    artist_key = normalize_genre_key(artist)
+    if not artist_key:
+        return []
+    title_key = normalize_genre_key(title)
+    rows = {
+        row.title_key: row
+        for row in GenreCacheEntry.objects.filter(artist_key=artist_key, title_key__in={title_key, ''})
+    }
+    track = rows.get(title_key)
+    artist_row = rows.get('')
+
+    # Failed refreshes keep serving the genres of the last successful lookup
+    if track is not None and (track.status == GenreCacheEntry.STATUS_FOUND or track.genres):
+        return list(track.genres or [])
+    if artist_row is not None and (artist_row.status == GenreCacheEntry.STATUS_FOUND or artist_row.genres):
+        return list(artist_row.genres or [])
+    if track is not None and track.status == GenreCacheEntry.STATUS_EMPTY:
+        return []
+    if track is None and enqueue:
+        enqueue_genre_lookup(artist, title)
+    return None
+
+
+def apply_cached_genres(beatmap):
+    """
+    Set beatmap.genres from the cache. Unknown lookups leave existing genres untouched
+    (the worker applies them once resolved); cached empty results clear them.
+    Returns True when the cache had an answer.
+    """
+    genres = cached_genres(beatmap.artist or '', beatmap.title or '')
+    if genres is None:
+        return False
+    if genres:
+        beatmap.genres.set(get_or_create_genres(genres))
+    else:
+        beatmap.genres.clear()
+    return True
+
+
+def _store_entry(entry, genres, source=''):
+    now = timezone.now()
+    entry.genres = sorted(set(genres or []))
+    entry.source = source if genres else ''
+    entry.status = GenreCacheEntry.STATUS_FOUND if genres else GenreCacheEntry.STATUS_EMPTY
+    entry.fetched_at = now
+    entry.next_attempt_at = now + (POSITIVE_CACHE_TTL if genres else NEGATIVE_CACHE_TTL)
+    entry.save(update_fields=['genres', 'source', 'status', 'fetched_at', 'next_attempt_at'])
+
+
+def _artist_genres(artist):
+    """Artist-level genres via the cache, querying Last.fm only when stale or missing."""
+    entry = enqueue_genre_lookup(artist, '')
+    fresh = entry.next_attempt_at is not None and entry.next_attempt_at > timezone.now()
+    if entry.status in (GenreCacheEntry.STATUS_FOUND, GenreCacheEntry.STATUS_EMPTY) and fresh:
+        return list(entry.genres or [])
+    tags = get_artist_tags_lastfm(artist)
+    _store_entry(entry, tags, source='lastfm')
+    return tags
+
+
+def resolve_genres(artist, title):
+    """
+    Upstream lookup used by the worker: Last.fm track tags, then the (cached)
+    artist tags, then the MusicBrainz recording/release-group chain.
+    Returns (genres, source).
+    """
+    track_tags = get_track_tags_lastfm(artist, title) if title else []
+    if track_tags:
+        return track_tags, 'lastfm'
+    artist_tags = _artist_genres(artist)
+    if artist_tags:
+        return artist_tags, 'lastfm'
+
+    artist_mbid = search_artist(artist)
+    if not artist_mbid:
+        return [], ''
+    genres = set()
+    recording_mbid = search_recording(title, artist_mbid) if title else None
+    if recording_mbid:
+        for rg_id in get_release_groups_from_recording(recording_mbid):
+            genres.update(get_genres_from_release_group(rg_id))
+    if not genres:
+        genres.update(get_genres_from_artist(artist_mbid))
+    return list(genres), ('musicbrainz' if genres else '')
+
+
+def claim_due_entries(limit=50):
+    """
+    Claim up to `limit` entries that need a lookup: pending ones, stale/negative ones
+    past next_attempt_at, and running ones whose lease expired.
+    """
+    now = timezone.now()
+    due = (
+        GenreCacheEntry.objects
+        .filter(Q(status=GenreCacheEntry.STATUS_PENDING) | Q(next_attempt_at__lte=now))
+        .order_by('requested_at')
+        .values_list('id', 'status', 'next_attempt_at')[:limit]
+    )
+    claimed = []
+    for entry_id, status, next_attempt_at in due:
+        # Optimistic claim: only succeeds if nobody else touched the row meanwhile
+        updated = GenreCacheEntry.objects.filter(
+            id=entry_id, status=status, next_attempt_at=next_attempt_at,
+        ).update(status=GenreCacheEntry.STATUS_RUNNING, next_attempt_at=now + WORKER_LEASE)
+        if updated:
+            claimed.append(entry_id)
+    return list(GenreCacheEntry.objects.filter(id__in=claimed))
+
+
+def process_genre_entry(entry):
+    """Resolve one claimed entry and propagate the result to matching beatmaps.
+
+    Failed lookups (GenreLookupError) back off as errors; they never store or apply "no genres".
+    """
+    entry.attempts += 1
+    try:
+        if entry.title_key:
+            genres, source = resolve_genres(entry.artist, entry.title)
+        else:
+            genres, source = get_artist_tags_lastfm(entry.artist), 'lastfm'
+    except Exception as exc:
+        logger.error(f"Genre lookup failed for '{entry.artist}' - '{entry.title}': {exc}")
+        entry.status = GenreCacheEntry.STATUS_ERROR
+        entry.next_attempt_at = timezone.now() + _error_backoff(entry.attempts)
+        entry.save(update_fields=['attempts', 'status', 'next_attempt_at'])
+        return None
+    entry.save(update_fields=['attempts'])
+    _store_entry(entry, genres, source=source)
+    if entry.title_key:
+        apply_entry_to_beatmaps(entry)
+    return genres
+
+
+def apply_entry_to_beatmaps(entry):
+    """Assign a resolved entry's genres to every beatmap with the same normalized artist/title."""
+    candidates = Beatmap.objects.filter(artist__iexact=entry.artist, title__iexact=entry.title)
+    genre_objs = get_or_create_genres(entry.genres) if entry.genres else []
+    count = 0
+    for beatmap in candidates.only('id', 'artist', 'title'):
+        if normalize_genre_key(beatmap.artist) != entry.artist_key:
+            continue
+        if normalize_genre_key(beatmap.title) != entry.title_key:
+            continue
+        if genre_objs:
+            beatmap.genres.set(genre_objs)
+        else:
+            beatmap.genres.clear()
+        count += 1
+    return count
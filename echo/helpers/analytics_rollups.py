@@ -0,0 +1,524 @@
+"""Hourly rollups of the anonymous search/click analytics for the admin dashboard.
+
+The dashboard used to load every raw AnalyticsSearchEvent / AnalyticsClickEvent of
+its windows (up to all time) on each refresh, bucket them with Python sets and
+join clicks to searches in memory. Instead, every closed UTC hour is rolled up
+once into:
+
+- AnalyticsHourlyRollup: searches, download follow-ups and distinct identities by kind
+- AnalyticsHourlyClicks: clicks and last click time per action
+- AnalyticsHourlySearchTag: searches per tag named in the query (for the top tags)
+- AnalyticsDailyIdentity: the distinct identities per day, so day/week/all-time
+  unique counts stay exact (distinct counts of hours cannot be summed)
+
+rollup_analytics() rolls the closed hours after the AnalyticsRollupState
+watermark (run periodically by the rollup_analytics command, and by the
+dashboard to catch up). Download clicks arrive after their search, so it also
+keeps a click id watermark and recounts the follow-ups of earlier hours that new
+download clicks point to. Readers combine the rollups with compute_hour_stats()
+over the still open hour.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from bisect import bisect_right
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Max, Sum, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Follow-up actions that represent a "download / take-away" from a search
+DOWNLOAD_ACTIONS = ('direct', 'view_on_osu', 'beatconnect', 'bulk_direct_all')
+IDENTITY_KINDS = ('staff', 'user', 'anon')
+HOUR = timedelta(hours=1)
+# Hours rolled per transaction while catching up
+ROLLUP_BATCH = timedelta(days=1)
+# Search event ids per click lookup (keeps IN lists below SQLite's variable limit)
+LOOKUP_CHUNK = 500
+# Longest tag name (Tag.name); longer query tags can never match a tag
+TAG_NAME_MAX = 100
+
+
+def _hour_floor(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _day_floor(dt):
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _chunks(values: Sequence, size: int = LOOKUP_CHUNK):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# ----------------------------- Event helpers ----------------------------- #
+
+def _clean(v) -> Optional[str]:
+    try:
+        s = (v or '').strip()
+        return s or None
+    except Exception:
+        return None
+
+
+def identity_key(client_id: Optional[str], user_hash: Optional[str], is_staff: bool) -> Optional[Tuple[str, str]]:
+    """
+    Identity key used for unique-user counting:
+    - authenticated users are keyed by their hashed user id ('staff' or 'user')
+    - anonymous users are keyed by their client_id cookie ('anon')
+    """
+    uh = _clean(user_hash)
+    if uh:
+        return ('staff' if is_staff else 'user', uh)
+    cid = _clean(client_id)
+    if cid:
+        return ('anon', cid)
+    return None
+
+
+def followup_search_ids(search_rows: List[dict], action_names: Iterable[str]) -> Set[str]:
+    """Return set of search_event_id strings that have at least one followup click with matching client_id."""
+    from ..models import AnalyticsClickEvent
+
+    try:
+        event_id_to_client: Dict[str, str] = {}
+        event_ids = []
+        for r in (search_rows or []):
+            eid = r.get('event_id')
+            cid = _clean(r.get('client_id'))
+            if not eid or not cid:
+                continue
+            event_id_to_client[str(eid)] = cid
+            event_ids.append(eid)
+        matched: Set[str] = set()
+        for chunk in _chunks(event_ids):
+            click_qs = (
+                AnalyticsClickEvent.objects
+                .filter(action__in=list(action_names), search_event_id__in=chunk)
+                .values_list('search_event_id', 'client_id')
+                .distinct()
+            )
+            for sid, cid in click_qs:
+                cid = _clean(cid)
+                if sid and cid and event_id_to_client.get(str(sid)) == cid:
+                    matched.add(str(sid))
+        return matched
+    except Exception:
+        return set()
+
+
+def tokenize_query_terms(raw_query: str) -> set[str]:
+    terms: set[str] = set()
+    if not raw_query:
+        return terms
+    pattern = r'[-.]?"[^"]+"|[-.]?[^"\s]+'
+    for match in re.findall(pattern, raw_query):
+        token = match.strip()
+        if not token:
+            continue
+        if token[0] in '.-':
+            token = token[1:]
+        token = token.strip('"').strip("'").strip()
+        if token:
+            terms.add(token.lower())
+    return terms
+
+
+def query_contains_phrase(raw_query: str, phrase_lower: str) -> bool:
+    if not (raw_query and phrase_lower):
+        return False
+    raw = raw_query.lower()
+    pattern = r'(^|[\s,.;:\-])' + re.escape(phrase_lower) + r'($|[\s,.;:\-])'
+    return re.search(pattern, raw) is not None
+
+
+def searched_tags(raw_query: str, tags, flags) -> Set[Tuple[str, str]]:
+    """{(lowercased tag, search mode)} of the event's tags that the query actually names."""
+    from ..models import Tag
+
+    search_mode = Tag.normalize_mode(flags.get('mode')) if isinstance(flags, dict) else Tag.MODE_STD
+    tokens = tokenize_query_terms(raw_query)
+    found: Set[Tuple[str, str]] = set()
+    try:
+        for t in (tags or []):
+            tag_lower = str(t or '').strip().lower()
+            if not tag_lower or len(tag_lower) > TAG_NAME_MAX:
+                continue
+            if (tag_lower in tokens) or query_contains_phrase(raw_query, tag_lower):
+                found.add((tag_lower, search_mode))
+    except Exception:
+        return set()
+    return found
+
+
+# ----------------------------- Hour stats ----------------------------- #
+
+def _new_hour() -> Dict:
+    return {
+        'searches': 0,
+        'followups': 0,
+        'identities': {kind: set() for kind in IDENTITY_KINDS},
+        'clicks': {},
+        'tags': Counter(),
+    }
+
+
+def compute_hour_stats(start=None, end=None) -> Dict:
+    """{hour start: stats} from the raw events created in [start, end) (open bounds when None).
+
+    stats holds searches (non-empty query), followups (of those, with a download click from
+    the same client), identities ({kind: set of keys} over searches and clicks),
+    clicks ({action: (count, last created_at)}) and tags (Counter of searched_tags()).
+    """
+    from ..models import AnalyticsClickEvent, AnalyticsSearchEvent
+
+    def _window(qs):
+        if start is not None:
+            qs = qs.filter(created_at__gte=start)
+        if end is not None:
+            qs = qs.filter(created_at__lt=end)
+        return qs.order_by()
+
+    hours: Dict = {}
+
+    def _hour(created):
+        key = _hour_floor(created)
+        stats = hours.get(key)
+        if stats is None:
+            stats = hours[key] = _new_hour()
+        return stats
+
+    def _add_identity(stats, row):
+        ident = identity_key(row.get('client_id'), row.get('logged_in_user_id'), bool(row.get('is_staff')))
+        if ident:
+            stats['identities'][ident[0]].add(ident[1])
+
+    searches = []
+    search_rows = _window(AnalyticsSearchEvent.objects).values(
+        'event_id', 'client_id', 'logged_in_user_id', 'is_staff', 'created_at', 'query', 'tags', 'flags',
+    )
+    for row in search_rows.iterator(chunk_size=5000):
+        stats = _hour(row['created_at'])
+        _add_identity(stats, row)
+        query = row['query']
+        if not query:
+            continue
+        stats['searches'] += 1
+        stats['tags'].update(searched_tags(query, row['tags'], row['flags']))
+        searches.append({'event_id': row['event_id'], 'client_id': row['client_id'], 'created_at': row['created_at']})
+
+    followed = followup_search_ids(searches, DOWNLOAD_ACTIONS)
+    for row in searches:
+        if str(row['event_id']) in followed:
+            _hour(row['created_at'])['followups'] += 1
+
+    click_rows = _window(AnalyticsClickEvent.objects).values(
+        'client_id', 'logged_in_user_id', 'is_staff', 'created_at', 'action',
+    )
+    for row in click_rows.iterator(chunk_size=5000):
+        stats = _hour(row['created_at'])
+        _add_identity(stats, row)
+        action = row['action'] or ''
+        count, last = stats['clicks'].get(action, (0, None))
+        stats['clicks'][action] = (count + 1, row['created_at'] if last is None else max(last, row['created_at']))
+    return hours
+
+
+# ----------------------------- Rollup ----------------------------- #
+
+def _store_hours(start, end, hours: Dict) -> None:
+    """Replace the hourly rollups of [start, end) and add the hours' identities to their days."""
+    from ..models import (
+        AnalyticsDailyIdentity, AnalyticsHourlyClicks, AnalyticsHourlyRollup, AnalyticsHourlySearchTag,
+    )
+
+    for model in (AnalyticsHourlyRollup, AnalyticsHourlyClicks, AnalyticsHourlySearchTag):
+        model.objects.filter(hour__gte=start, hour__lt=end).delete()
+
+    rollups, clicks, tags, identities = [], [], [], []
+    for hour, stats in sorted(hours.items()):
+        ids = stats['identities']
+        rollups.append(AnalyticsHourlyRollup(
+            hour=hour,
+            searches=stats['searches'],
+            followups=stats['followups'],
+            staff_identities=len(ids['staff']),
+            user_identities=len(ids['user']),
+            anon_identities=len(ids['anon']),
+        ))
+        for action, (count, last) in stats['clicks'].items():
+            clicks.append(AnalyticsHourlyClicks(hour=hour, action=action, clicks=count, last_at=last))
+        for (tag, mode), count in stats['tags'].items():
+            tags.append(AnalyticsHourlySearchTag(hour=hour, tag=tag, mode=mode, searches=count))
+        day = _day_floor(hour)
+        for kind, keys in ids.items():
+            identities.extend(AnalyticsDailyIdentity(day=day, kind=kind, identity=key) for key in keys)
+
+    AnalyticsHourlyRollup.objects.bulk_create(rollups, batch_size=1000)
+    AnalyticsHourlyClicks.objects.bulk_create(clicks, batch_size=1000)
+    AnalyticsHourlySearchTag.objects.bulk_create(tags, batch_size=1000)
+    AnalyticsDailyIdentity.objects.bulk_create(identities, batch_size=1000, ignore_conflicts=True)
+
+
+def _refresh_followups(hours: Iterable) -> None:
+    """Recount the stored follow-ups of already rolled hours."""
+    from ..models import AnalyticsHourlyRollup, AnalyticsSearchEvent
+
+    for hour in sorted(set(hours)):
+        searches = list(
+            AnalyticsSearchEvent.objects
+            .filter(created_at__gte=hour, created_at__lt=hour + HOUR)
+            .exclude(query__isnull=True)
+            .exclude(query__exact='')
+            .values('event_id', 'client_id')
+        )
+        followups = len(followup_search_ids(searches, DOWNLOAD_ACTIONS))
+        AnalyticsHourlyRollup.objects.filter(hour=hour).update(followups=followups)
+
+
+def _first_event_hour():
+    from ..models import AnalyticsClickEvent, AnalyticsSearchEvent
+
+    firsts = [
+        model.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        for model in (AnalyticsSearchEvent, AnalyticsClickEvent)
+    ]
+    firsts = [ts for ts in firsts if ts]
+    return _hour_floor(min(firsts)) if firsts else None
+
+
+def _locked_state():
+    from ..models import AnalyticsRollupState
+
+    AnalyticsRollupState.objects.get_or_create(pk=AnalyticsRollupState.SINGLETON_ID)
+    return AnalyticsRollupState.objects.select_for_update().get(pk=AnalyticsRollupState.SINGLETON_ID)
+
+
+def rollup_analytics(now=None, rebuild: bool = False):
+    """Roll every closed hour after the watermark and refresh late follow-ups; returns the state.
+
+    With `rebuild`, all rollups are dropped and rolled again from the first event.
+    """
+    from ..models import (
+        AnalyticsClickEvent, AnalyticsDailyIdentity, AnalyticsHourlyClicks, AnalyticsHourlyRollup,
+        AnalyticsHourlySearchTag, AnalyticsSearchEvent,
+    )
+
+    current_hour = _hour_floor(now or timezone.now())
+    if rebuild:
+        with transaction.atomic():
+            state = _locked_state()
+            for model in (AnalyticsHourlyRollup, AnalyticsHourlyClicks, AnalyticsHourlySearchTag, AnalyticsDailyIdentity):
+                model.objects.all().delete()
+            state.rolled_until = None
+            state.last_click_id = 0
+            state.save()
+
+    # Clicks up to here are either in the hours rolled below or recounted after them
+    max_click_id = AnalyticsClickEvent.objects.aggregate(m=Max('id'))['m'] or 0
+    with transaction.atomic():
+        state = _locked_state()
+        previous_until = state.rolled_until
+        if previous_until is None:
+            state.rolled_until = _first_event_hour() or current_hour
+            state.last_click_id = max_click_id
+            state.save()
+
+    while True:
+        with transaction.atomic():
+            state = _locked_state()
+            start = state.rolled_until
+            if start >= current_hour:
+                break
+            end = min(start + ROLLUP_BATCH, current_hour)
+            _store_hours(start, end, compute_hour_stats(start, end))
+            state.rolled_until = end
+            state.save()
+
+    with transaction.atomic():
+        state = _locked_state()
+        if previous_until is not None and max_click_id > state.last_click_id:
+            referenced = (
+                AnalyticsClickEvent.objects
+                .filter(id__gt=state.last_click_id, id__lte=max_click_id, action__in=DOWNLOAD_ACTIONS)
+                .exclude(search_event_id__isnull=True)
+                .values_list('search_event_id', flat=True)
+                .distinct()
+            )
+            stale = set()
+            for chunk in _chunks(list(referenced)):
+                created = (
+                    AnalyticsSearchEvent.objects
+                    .filter(event_id__in=chunk, created_at__lt=previous_until)
+                    .values_list('created_at', flat=True)
+                )
+                stale.update(_hour_floor(ts) for ts in created)
+            _refresh_followups(stale)
+        state.last_click_id = max(state.last_click_id, max_click_id)
+        state.save()
+    return state
+
+
+# ----------------------------- Readers ----------------------------- #
+
+def rolled_until():
+    """Watermark of the rollups: readers take the events from here on live (None: nothing rolled)."""
+    from ..models import AnalyticsRollupState
+
+    return (
+        AnalyticsRollupState.objects.filter(pk=AnalyticsRollupState.SINGLETON_ID)
+        .values_list('rolled_until', flat=True).first()
+    )
+
+
+def _bucket_of(field: str, starts: Sequence) -> Case:
+    """Index of the bucket (by ascending start) a row's `field` falls in."""
+    whens = [When(**{f'{field}__gte': s}, then=Value(i)) for i, s in reversed(list(enumerate(starts)))]
+    return Case(*whens, default=Value(-1), output_field=IntegerField())
+
+
+def rollup_series(starts: Sequence, end, live: Dict, daily_identities: bool) -> Dict[str, List[int]]:
+    """Per-bucket searches, followups and distinct staff/user/anon identities.
+
+    Buckets are [starts[i], starts[i + 1]) with the last ending at `end`; `live` is
+    compute_hour_stats() of the unrolled hours. Hour buckets read the hourly distinct counts;
+    with `daily_identities` (day-aligned buckets) identities are counted over the days.
+    """
+    from ..models import AnalyticsDailyIdentity, AnalyticsHourlyRollup
+
+    n = len(starts)
+    series = {key: [0] * n for key in ('searches', 'followups') + IDENTITY_KINDS}
+    if not n:
+        return series
+
+    rows = (
+        AnalyticsHourlyRollup.objects
+        .filter(hour__gte=starts[0], hour__lt=end)
+        .annotate(bucket=_bucket_of('hour', starts))
+        .values('bucket')
+        .annotate(
+            s=Sum('searches'), f=Sum('followups'),
+            staff=Sum('staff_identities'), user=Sum('user_identities'), anon=Sum('anon_identities'),
+        )
+        .order_by()
+    )
+    for r in rows:
+        i = r['bucket']
+        series['searches'][i] += int(r['s'] or 0)
+        series['followups'][i] += int(r['f'] or 0)
+        if not daily_identities:
+            for kind in IDENTITY_KINDS:
+                series[kind][i] += int(r[kind] or 0)
+
+    if daily_identities:
+        identity_rows = (
+            AnalyticsDailyIdentity.objects
+            .filter(day__gte=starts[0], day__lt=end)
+            .annotate(bucket=_bucket_of('day', starts))
+            .values('bucket', 'kind')
+            .annotate(c=Count('identity', distinct=True))
+            .order_by()
+        )
+        for r in identity_rows:
+            if r['kind'] in series:
+                series[r['kind']][r['bucket']] += int(r['c'] or 0)
+
+    live_keys: Dict[Tuple[int, str], Set[str]] = {}
+    for hour, stats in live.items():
+        if hour < starts[0] or hour >= end:
+            continue
+        i = bisect_right(starts, hour) - 1
+        series['searches'][i] += stats['searches']
+        series['followups'][i] += stats['followups']
+        for kind, keys in stats['identities'].items():
+            if daily_identities:
+                live_keys.setdefault((i, kind), set()).update(keys)
+            else:
+                series[kind][i] += len(keys)
+    for (i, kind), keys in live_keys.items():
+        bucket_end = starts[i + 1] if i + 1 < n else end
+        seen = set()
+        for chunk in _chunks(sorted(keys)):
+            seen.update(
+                AnalyticsDailyIdentity.objects
+                .filter(day__gte=starts[i], day__lt=bucket_end, kind=kind, identity__in=chunk)
+                .values_list('identity', flat=True)
+            )
+        series[kind][i] += len(keys - seen)
+    return series
+
+
+def rollup_totals(live: Dict) -> Tuple[int, int]:
+    """(searches, followups) of all time."""
+    from ..models import AnalyticsHourlyRollup
+
+    agg = AnalyticsHourlyRollup.objects.aggregate(s=Sum('searches'), f=Sum('followups'))
+    searches = int(agg['s'] or 0) + sum(stats['searches'] for stats in live.values())
+    followups = int(agg['f'] or 0) + sum(stats['followups'] for stats in live.values())
+    return searches, followups
+
+
+def rollup_click_counts(since, live: Dict) -> Dict[str, int]:
+    """{action: clicks} from the hour `since` on."""
+    from ..models import AnalyticsHourlyClicks
+
+    counts: Counter = Counter()
+    rows = (
+        AnalyticsHourlyClicks.objects
+        .filter(hour__gte=since)
+        .values('action')
+        .annotate(c=Sum('clicks'))
+        .order_by()
+    )
+    for r in rows:
+        counts[r['action'] or ''] += int(r['c'] or 0)
+    for hour, stats in live.items():
+        if hour >= since:
+            for action, (count, _) in stats['clicks'].items():
+                counts[action] += count
+    return dict(counts)
+
+
+def rollup_click_last_used(live: Dict) -> Dict:
+    """{action: last click datetime} of all time."""
+    from ..models import AnalyticsHourlyClicks
+
+    last = {
+        r['action']: r['last_ts']
+        for r in AnalyticsHourlyClicks.objects.values('action').annotate(last_ts=Max('last_at')).order_by()
+        if r['last_ts']
+    }
+    for stats in live.values():
+        for action, (_, ts) in stats['clicks'].items():
+            if ts and (action not in last or ts > last[action]):
+                last[action] = ts
+    return last
+
+
+def rollup_search_tag_counts(since, live: Dict) -> Counter:
+    """Counter of searches per (lowercased tag, mode) from the hour `since` on."""
+    from ..models import AnalyticsHourlySearchTag
+
+    counts: Counter = Counter()
+    rows = (
+        AnalyticsHourlySearchTag.objects
+        .filter(hour__gte=since)
+        .values('tag', 'mode')
+        .annotate(c=Sum('searches'))
+        .order_by()
+    )
+    for r in rows:
+        counts[(r['tag'], r['mode'])] += int(r['c'] or 0)
+    for hour, stats in live.items():
+        if hour >= since:
+            counts.update(stats['tags'])
+    return counts
@@ -0,0 +1,163 @@
+"""Database-backed queue for heavy per-beatmap computations.
+
+Request paths that find a timeseries or PP curve missing call enqueue_compute_job()
+and answer 202 with a poll URL instead of downloading the .osu file and running rosu
+in the request thread. Jobs are deduplicated by a unique key per (kind, beatmap,
+params), so a burst of requests for a new map shares one job.
+
+The run_compute_jobs management command claims due jobs with a lease and runs
+them; a job whose worker died is picked up again once its lease expires.
+Set settings.COMPUTE_QUEUE_ASYNC = False to compute inline instead (no worker).
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ComputeJob
+from .rosu_utils import _normalize_mods, get_or_compute_strains, get_pp_curve
+
+logger = logging.getLogger(__name__)
+
+
+WORKER_LEASE = timedelta(minutes=5)
+# Failed jobs are not re-armed by requests before this, so a broken map cannot spin the queue
+ERROR_RETRY_AFTER = timedelta(minutes=10)
+MAX_ATTEMPTS = 3
+# Suggested client poll interval (Retry-After on 202 responses)
+POLL_INTERVAL_SECONDS = 2
+
+
+def async_enabled() -> bool:
+    return bool(getattr(settings, 'COMPUTE_QUEUE_ASYNC', True))
+
+
+def compute_job_key(kind: str, beatmap_id, mods: Optional[str] = None, lazer: bool = True) -> str:
+    parts = [kind, str(beatmap_id), _normalize_mods(mods) or 'NOMOD']
+    if kind == ComputeJob.KIND_PP_CURVE:
+        parts.append('lazer' if lazer else 'stable')
+    return ':'.join(parts)
+
+
+# ----------------------------- Enqueue ----------------------------- #
+
+def _result_missing(kind: str, beatmap, mods: Optional[str], lazer: bool) -> bool:
+    """True if the stored result is absent (never answered from a negative cache)."""
+    if kind == ComputeJob.KIND_TIMESERIES:
+        return get_or_compute_strains(beatmap, mods=mods, build=False) is None
+    if kind == ComputeJob.KIND_PP_CURVE:
+        return get_pp_curve(beatmap, mods=mods, lazer=lazer, build=False) is None
+    return True
+
+
+def enqueue_compute_job(kind: str, beatmap, mods: Optional[str] = None, lazer: bool = True) -> ComputeJob:
+    """Return the job for this variant, creating it or re-arming a finished one.
+
+    A 'done' job is only re-armed when an uncached read confirms the stored result is
+    missing (invalidated since); a result another process just wrote keeps it done.
+    """
+    key = compute_job_key(kind, beatmap.beatmap_id, mods, lazer)
+    try:
+        job, created = ComputeJob.objects.get_or_create(
+            key=key,
+            defaults={
+                'kind': kind,
+                'beatmap': beatmap,
+                'mods': _normalize_mods(mods),
+                'lazer': bool(lazer),
+            },
+        )
+    except IntegrityError:
+        # Lost a creation race to a concurrent request; the winner's row is the job
+        job, created = ComputeJob.objects.get(key=key), False
+    if created:
+        return job
+
+    now = timezone.now()
+    rearm = Q(status=ComputeJob.STATUS_ERROR, updated_at__lte=now - ERROR_RETRY_AFTER)
+    if job.status == ComputeJob.STATUS_DONE and _result_missing(job.kind, beatmap, mods, lazer):
+        rearm |= Q(status=ComputeJob.STATUS_DONE)
+    rearmed = ComputeJob.objects.filter(rearm, id=job.id).update(
+        status=ComputeJob.STATUS_PENDING, attempts=0, error='', lease_until=None, updated_at=now,
+    )
+    if rearmed:
+        job.refresh_from_db()
+    return job
+
+
+# ----------------------------- Worker ----------------------------- #
+
+def claim_compute_jobs(limit: int = 20) -> list:
+    """Claim up to `limit` pending jobs and running jobs whose lease expired."""
+    now = timezone.now()
+    due = (
+        ComputeJob.objects
+        .filter(Q(status=ComputeJob.STATUS_PENDING)
+                | Q(status=ComputeJob.STATUS_RUNNING, lease_until__lte=now))
+        .order_by('created_at')
+        .values_list('id', 'status', 'lease_until')[:limit]
+    )
+    claimed = []
+    for job_id, status, lease_until in due:
+        # Optimistic claim: only succeeds if nobody else touched the row meanwhile
+        updated = ComputeJob.objects.filter(
+            id=job_id, status=status, lease_until=lease_until,
+        ).update(status=ComputeJob.STATUS_RUNNING, lease_until=now + WORKER_LEASE, updated_at=now)
+        if updated:
+            claimed.append(job_id)
+    return list(ComputeJob.objects.filter(id__in=claimed).select_related('beatmap'))
+
+
+def _execute(job: ComputeJob) -> bool:
+    mods = job.mods or None
+    if job.kind == ComputeJob.KIND_TIMESERIES:
+        return get_or_compute_strains(job.beatmap, mods=mods) is not None
+    if job.kind == ComputeJob.KIND_PP_CURVE:
+        return get_pp_curve(job.beatmap, mods=mods, lazer=job.lazer) is not None
+    raise ValueError(f"Unknown compute job kind: {job.kind}")
+
+
+def run_compute_job(job: ComputeJob) -> bool:
+    """Run one claimed job and record the outcome. Returns True on success."""
+    job.attempts += 1
+    retryable = False
+    try:
+        ok = _execute(job)
+        error = '' if ok else 'No result (missing .osu file or unsupported beatmap)'
+    except Exception as exc:
+        logger.error(f"Compute job {job.key} failed: {exc}")
+        ok, error, retryable = False, str(exc)[:2000], True
+
+    if ok:
+        job.status = ComputeJob.STATUS_DONE
+    elif retryable and job.attempts < MAX_ATTEMPTS:
+        # Transient failure: back to pending for the next claim
+        job.status = ComputeJob.STATUS_PENDING
+    else:
+        job.status = ComputeJob.STATUS_ERROR
+    job.error = error
+    job.lease_until = None
+    job.save(update_fields=['attempts', 'status', 'error', 'lease_until', 'updated_at'])
+    return ok
+
+
+# ----------------------------- Responses ----------------------------- #
+
+def compute_job_payload(job: ComputeJob) -> dict:
+    """JSON body for 202 responses and the job status endpoint."""
+    return {
+        'job_id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'poll_url': reverse('compute_job_status', args=[job.id]),
+        'retry_after': POLL_INTERVAL_SECONDS,
+        'error': job.error or None,
+    }
@@ -0,0 +1,218 @@
+"""Materialized global statistics (GlobalStatsSnapshot).
+
+The statistics page reads one row instead of re-aggregating every TagApplication
+and Beatmap per view. refresh_global_stats_snapshot() rebuilds the row (run
+periodically by the refresh_global_stats command); record_tag_application_change()
+applies the effect of a single positive tag write after commit, touching only the
+affected beatmap. Bulk admin writes (prediction uploads/flushes) are picked up by
+the next periodic refresh.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from .histograms import star_bin_index, star_histograms
+
+logger = logging.getLogger(__name__)
+
+
+TOP_MAPPERS_LIMIT = 25
+
+
+# ----------------------------- Full refresh ----------------------------- #
+
+def compute_global_stats() -> Dict:
+    """Aggregate the global statistics from scratch."""
+    from ..models import Beatmap, TagApplication
+
+    ta_pos = TagApplication.objects.filter(true_negative=False)
+    total_applications = ta_pos.count()
+    maps_tagged_count = ta_pos.values('beatmap_id').distinct().count()
+    predicted_applications = ta_pos.filter(user__isnull=True).count()
+
+    # Star distribution over ALL maps in DB, with the human-tagged and predicted-only
+    # populations aligned to its bins, bucketed in one GROUP BY
+    positive = TagApplication.objects.filter(beatmap_id=OuterRef('pk'), true_negative=False)
+    beatmaps = Beatmap.objects.annotate(
+        has_human=Exists(positive.filter(user__isnull=False)),
+        has_pred=Exists(positive.filter(user__isnull=True)),
+    )
+    human = Q(has_human=True)
+    pred_only = Q(has_human=False, has_pred=True)
+    star_hist_labels, star_counts = star_histograms(
+        beatmaps, {'all': Q(), 'human': human, 'pred': pred_only},
+    )
+    predicted_only_maps_count = beatmaps.filter(pred_only).count()
+
+    # Top mappers by distinct maps with human-applied tags
+    top_rows = (
+        TagApplication.objects
+        .filter(true_negative=False, user__isnull=False)
+        .values('beatmap__listed_owner')
+        .annotate(map_count=Count('beatmap_id', distinct=True))
+        .exclude(beatmap__listed_owner__isnull=True)
+        .exclude(beatmap__listed_owner='')
+        .order_by('-map_count', 'beatmap__listed_owner')[:TOP_MAPPERS_LIMIT]
+    )
+    top_mappers = [{'listed_owner': r['beatmap__listed_owner'], 'count': int(r['map_count'])} for r in top_rows]
+
+    return {
+        'total_applications': total_applications,
+        'maps_tagged_count': maps_tagged_count,
+        'predicted_applications': predicted_applications,
+        'predicted_only_maps_count': predicted_only_maps_count,
+        'star_hist_labels': star_hist_labels,
+        'star_hist_counts': star_counts['all'],
+        'human_star_counts': star_counts['human'],
+        'pred_star_counts': star_counts['pred'],
+        'top_mappers': top_mappers,
+    }
+
+
+def refresh_global_stats_snapshot():
+    """Recompute and store the snapshot row; returns it."""
+    from ..models import GlobalStatsSnapshot
+
+    values = compute_global_stats()
+    snapshot, _ = GlobalStatsSnapshot.objects.update_or_create(
+        pk=GlobalStatsSnapshot.SINGLETON_ID,
+        defaults={**values, 'refreshed_at': timezone.now(), 'deltas_since_refresh': 0},
+    )
+    return snapshot
+
+
+def get_global_stats_snapshot():
+    """The stored snapshot, built on first use."""
+    from ..models import GlobalStatsSnapshot
+
+    snapshot = GlobalStatsSnapshot.objects.filter(pk=GlobalStatsSnapshot.SINGLETON_ID).first()
+    if snapshot is None:
+        snapshot = refresh_global_stats_snapshot()
+    return snapshot
+
+
+# ----------------------------- Incremental deltas ----------------------------- #
+
+def _owner_human_map_count(owner: str) -> int:
+    from ..models import TagApplication
+
+    return (
+        TagApplication.objects
+        .filter(true_negative=False, user__isnull=False, beatmap__listed_owner=owner)
+        .values('beatmap_id').distinct().count()
+    )
+
+
+def _shift_bin(counts: List[int], labels: List[str], star, delta: int) -> List[int]:
+    idx = star_bin_index(star, labels)
+    if idx is None or len(counts) != len(labels):
+        return counts
+    counts = list(counts)
+    counts[idx] = max(0, counts[idx] + delta)
+    return counts
+
+
+def _positive_counts(beatmap_pk: int) -> Tuple[int, int]:
+    """(human, predicted) positive TagApplication counts for one beatmap."""
+    from ..models import TagApplication
+
+    counts = TagApplication.objects.filter(beatmap_id=beatmap_pk, true_negative=False).aggregate(
+        human=Count('id', filter=Q(user__isnull=False)),
+        pred=Count('id', filter=Q(user__isnull=True)),
+    )
+    return counts['human'], counts['pred']
+
+
+def apply_tag_application_delta(
+    beatmap_pk: int,
+    is_human: bool,
+    sign: int,
+    before: Tuple[int, int],
+    after: Tuple[int, int],
+) -> None:
+    """Fold positive TagApplication creates (sign > 0) or deletes (sign < 0) into the snapshot.
+
+    `sign` is the signed number of rows written; all of them share one beatmap and
+    one kind (human or predicted).
+
+    `before`/`after` are the beatmap's (human, predicted) positive counts around the
+    write; they decide whether it entered or left the tagged, human and
+    predicted-only populations.
+    """
+    from ..models import Beatmap, GlobalStatsSnapshot
+
+    (human_before, pred_before), (human_after, pred_after) = before, after
+    with transaction.atomic():
+        snapshot = (
+            GlobalStatsSnapshot.objects.select_for_update()
+            .filter(pk=GlobalStatsSnapshot.SINGLETON_ID).first()
+        )
+        if snapshot is None:
+            # Nothing materialized yet; the first read builds it from scratch
+            return
+
+        snapshot.total_applications = max(0, snapshot.total_applications + sign)
+        if not is_human:
+            snapshot.predicted_applications = max(0, snapshot.predicted_applications + sign)
+        snapshot.maps_tagged_count += int(human_after + pred_after > 0) - int(human_before + pred_before > 0)
+
+        was_human, is_human_now = human_before > 0, human_after > 0
+        was_pred_only = not was_human and pred_before > 0
+        is_pred_only_now = not is_human_now and pred_after > 0
+        if was_human != is_human_now or was_pred_only != is_pred_only_now:
+            beatmap = Beatmap.objects.filter(pk=beatmap_pk).values('difficulty_rating', 'listed_owner').first() or {}
+            star = beatmap.get('difficulty_rating')
+            labels = snapshot.star_hist_labels
+            if was_human != is_human_now:
+                delta = 1 if is_human_now else -1
+                snapshot.human_star_counts = _shift_bin(snapshot.human_star_counts, labels, star, delta)
+                owner = beatmap.get('listed_owner')
+                if owner:
+                    rows = [r for r in snapshot.top_mappers if r.get('listed_owner') != owner]
+                    count = _owner_human_map_count(owner)
+                    if count:
+                        rows.append({'listed_owner': owner, 'count': count})
+                    rows.sort(key=lambda r: (-r['count'], r['listed_owner']))
+                    snapshot.top_mappers = rows[:TOP_MAPPERS_LIMIT]
+            if was_pred_only != is_pred_only_now:
+                delta = 1 if is_pred_only_now else -1
+                snapshot.predicted_only_maps_count = max(0, snapshot.predicted_only_maps_count + delta)
+                snapshot.pred_star_counts = _shift_bin(snapshot.pred_star_counts, labels, star, delta)
+
+        snapshot.deltas_since_refresh += 1
+        snapshot.save()
+
+
+def record_tag_application_change(beatmap_pk: int, user_id, true_negative: bool, sign: int) -> None:
+    """Record a tag write right after it happened; the snapshot is updated on commit.
+
+    `sign` is the signed row count (e.g. -3 for a bulk delete of three rows), so a
+    multi-row write is folded in once with its real before/after counts.
+
+    The beatmap's counts are read now, inside the writing transaction, so several
+    writes to one beatmap in one transaction each see their own before/after.
+    """
+    if true_negative:
+        # Only positive applications are counted
+        return
+    is_human = user_id is not None
+    try:
+        after = _positive_counts(beatmap_pk)
+    except Exception as exc:
+        logger.error(f"Global stats delta skipped for beatmap {beatmap_pk}: {exc}")
+        return
+    before = (after[0] - sign, after[1]) if is_human else (after[0], after[1] - sign)
+
+    def _apply():
+        try:
+            apply_tag_application_delta(beatmap_pk, is_human, sign, before, after)
+        except Exception as exc:
+            logger.error(f"Global stats delta failed for beatmap {beatmap_pk}: {exc}")
+
+    transaction.on_commit(_apply)
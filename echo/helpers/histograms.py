@@ -0,0 +1,94 @@
+"""Star-rating histograms bucketed by the database.
+
+star_histograms() groups beatmaps by a computed bucket index in a single
+`GROUP BY` query and counts several populations per bucket with conditional
+aggregates, so no difficulty_rating values are pulled into Python. Buckets are
+0.25 stars wide starting at the lowest populated bucket of the reference
+population, up to 14.75, plus a 15.00+ overflow bucket. Every population's
+counts are aligned to the same labels.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Case, Count, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Floor
+
+STAR_BIN_WIDTH = 0.25
+STAR_UPPER_CAP = 15.0
+# Bucket index of the 15.00+ overflow bin (the last regular bin is 14.75)
+OVERFLOW_BUCKET = int(round(STAR_UPPER_CAP / STAR_BIN_WIDTH))
+
+
+def _bucket_expression():
+    return Case(
+        When(difficulty_rating__gte=STAR_UPPER_CAP, then=Value(OVERFLOW_BUCKET)),
+        When(difficulty_rating__lt=0, then=Value(0)),
+        default=Cast(Floor(F('difficulty_rating') / Value(STAR_BIN_WIDTH, output_field=FloatField())), IntegerField()),
+        output_field=IntegerField(),
+    )
+
+
+def star_bucket_labels(start_bucket: int) -> List[str]:
+    """Labels from `start_bucket` up to 14.75, plus the 15.00+ overflow label."""
+    start_bucket = min(max(0, start_bucket), OVERFLOW_BUCKET - 1)
+    labels = [f"{(i * STAR_BIN_WIDTH):.2f}" for i in range(start_bucket, OVERFLOW_BUCKET)]
+    labels.append(f"{STAR_UPPER_CAP:.2f}+")
+    return labels
+
+
+def star_histograms(
+    queryset,
+    populations: Dict[str, Q],
+    reference: Optional[str] = None,
+) -> Tuple[List[str], Dict[str, List[int]]]:
+    """Bucket a Beatmap queryset once and count each population per bucket.
+
+    `populations` maps a name to a Q filter over the queryset's rows (Q() for all
+    rows). Labels start at the lowest bucket populated by `reference` (the first
+    population by default). Returns ([], {name: []}) when the reference
+    population has no rated maps.
+    """
+    names = list(populations)
+    reference = reference or names[0]
+    aggregates = {
+        f'n{i}': Count('id', filter=populations[name]) if populations[name] else Count('id')
+        for i, name in enumerate(names)
+    }
+    rows = (
+        queryset
+        .filter(difficulty_rating__isnull=False)
+        .annotate(star_bucket=_bucket_expression())
+        .values('star_bucket')
+        .annotate(**aggregates)
+        .order_by('star_bucket')
+    )
+    by_bucket = {row['star_bucket']: [row[f'n{i}'] for i in range(len(names))] for row in rows}
+
+    ref_index = names.index(reference)
+    populated = [bucket for bucket, counts in by_bucket.items() if counts[ref_index]]
+    if not populated:
+        return [], {name: [] for name in names}
+
+    start_bucket = min(min(populated), OVERFLOW_BUCKET - 1)
+    labels = star_bucket_labels(start_bucket)
+    counts = {name: [0] * len(labels) for name in names}
+    for bucket, values in by_bucket.items():
+        idx = min(max(bucket - start_bucket, 0), len(labels) - 1)
+        for name, value in zip(names, values):
+            counts[name][idx] += value
+    return labels, counts
+
+
+def star_bin_index(star: Optional[float], labels: List[str]) -> Optional[int]:
+    """Index of `star` in bins described by star_histograms() labels (None if unbinnable)."""
+    if star is None or not labels:
+        return None
+    first = float(labels[0].rstrip('+'))
+    last = float(labels[-1].rstrip('+'))
+    star = float(star)
+    if star >= last:
+        return len(labels) - 1
+    return min(max(int(math.floor((star - first) / STAR_BIN_WIDTH)), 0), len(labels) - 1)
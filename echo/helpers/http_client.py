@@ -0,0 +1,241 @@
+"""Shared HTTP client for outbound calls to third-party services.
+
+All outbound GETs (osu! .osu downloads, Last.fm, MusicBrainz) go through this
+module so they share:
+- pooled keep-alive connections (one requests.Session per thread),
+- per-host rate limits, enforced across threads with a token bucket and across
+  processes with a GCRA schedule stored in the database (HostRateLimit),
+- retry with exponential backoff on connection errors, 429 and 5xx,
+- simple per-host counters readable via get_metrics().
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+# (tokens per second, burst capacity) per host. Hosts not listed are not limited.
+DEFAULT_HOST_LIMITS: Dict[str, tuple[float, int]] = {
+    'musicbrainz.org': (1.0, 1),          # MusicBrainz asks for at most 1 req/s
+    'ws.audioscrobbler.com': (4.0, 4),    # Last.fm
+    'osu.ppy.sh': (5.0, 10),
+}
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_TIMEOUT = 15
+POOL_MAXSIZE = 20
+
+
+# ----------------------------- Rate limiting ----------------------------- #
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available, then consume it. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def _host_limits() -> Dict[str, tuple[float, int]]:
+    limits = dict(DEFAULT_HOST_LIMITS)
+    limits.update(getattr(settings, 'HTTP_CLIENT_HOST_LIMITS', {}) or {})
+    return limits
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket_for_host(host: str) -> Optional[TokenBucket]:
+    limit = _host_limits().get(host)
+    if not limit:
+        return None
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(rate=limit[0], capacity=int(limit[1]))
+        return bucket
+
+
+def _acquire_shared(host: str) -> float:
+    """Cross-process limit (GCRA): bursts of `capacity`, then one request per 1/rate seconds.
+
+    The host's theoretical arrival time lives in a HostRateLimit row shared by every
+    web and worker process. A request reserves the next slot with a compare-and-set
+    update and sleeps until it; there are no fixed windows, so no boundary lets two
+    bursts through back to back. Best-effort: database failures fall back to the
+    in-process bucket alone. Returns seconds waited.
+    """
+    limit = _host_limits().get(host)
+    if not limit:
+        return 0.0
+    from ..models import HostRateLimit
+
+    interval = 1.0 / float(limit[0])
+    tolerance = (max(int(limit[1]), 1) - 1) * interval
+    try:
+        for _ in range(100):
+            now = time.time()
+            stored = HostRateLimit.objects.filter(host=host).values_list('tat', flat=True).first()
+            if stored is None:
+                try:
+                    with transaction.atomic():
+                        HostRateLimit.objects.create(host=host, tat=now + interval)
+                    return 0.0
+                except IntegrityError:
+                    # Another process created the row first; reserve through it
+                    continue
+            tat = max(stored, now)
+            if HostRateLimit.objects.filter(host=host, tat=stored).update(tat=tat + interval):
+                wait = max(0.0, tat - tolerance - now)
+                if wait:
+                    time.sleep(wait)
+                return wait
+    except Exception as exc:
+        logger.error(f"Shared rate limit unavailable for {host}: {exc}")
+    return 0.0
+
+
+# ----------------------------- Sessions ----------------------------- #
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """Return this thread's pooled session (requests.Session is not shared across threads)."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=POOL_MAXSIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+# ----------------------------- Metrics ----------------------------- #
+
+_metrics: Dict[str, Dict[str, float]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(host: str, **deltas: float) -> None:
+    with _metrics_lock:
+        row = _metrics.setdefault(host, {
+            'requests': 0, 'errors': 0, 'retries': 0,
+            'throttled_seconds': 0.0, 'latency_seconds': 0.0,
+        })
+        for key, value in deltas.items():
+            row[key] = row.get(key, 0) + value
+
+
+def get_metrics() -> Dict[str, Dict[str, float]]:
+    """Snapshot of per-host counters for this process."""
+    with _metrics_lock:
+        return {host: dict(row) for host, row in _metrics.items()}
+
+
+def reset_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+
+
+# ----------------------------- Requests ----------------------------- #
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    retries: int = 3,
+    backoff: float = 0.5,
+    timeout: float = DEFAULT_TIMEOUT,
+    **kwargs,
+) -> requests.Response:
+    """Rate-limited request with retry/backoff. Raises requests.RequestException on failure.
+
+    Non-retryable HTTP errors (e.g. 404) are returned as-is; callers check status_code.
+    """
+    host = (urlsplit(url).hostname or '').lower()
+    bucket = _bucket_for_host(host)
+    session = get_session()
+    attempt = 0
+    while True:
+        waited = bucket.acquire() if bucket is not None else 0.0
+        waited += _acquire_shared(host)
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            _record(host, requests=1, errors=1, throttled_seconds=waited,
+                    latency_seconds=time.monotonic() - started)
+            if attempt >= retries:
+                raise
+            delay = backoff * (2 ** attempt)
+        else:
+            _record(host, requests=1, throttled_seconds=waited,
+                    latency_seconds=time.monotonic() - started)
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                if response.status_code >= 400:
+                    _record(host, errors=1)
+                return response
+            delay = _retry_after_seconds(response)
+            if delay is None:
+                delay = backoff * (2 ** attempt)
+        attempt += 1
+        _record(host, retries=1)
+        time.sleep(delay + random.uniform(0, backoff / 2))
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def get_json(url: str, params=None, headers=None, **kwargs):
+    """GET and decode JSON; logs and returns None on any failure."""
+    try:
+        response = get(url, params=params, headers=headers, **kwargs)
+        response.raise_for_status()
+        return response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"HTTP Request failed: {e} for URL: {url} with params: {params}")
+        return None
@@ -0,0 +1,117 @@
+"""Normalized mapper index for beatmaps (BeatmapMapper).
+
+Beatmaps store their mappers as comma-separated strings (listed_owner plus the
+aligned listed_owner_id list, creator as the fallback name). Splitting those per
+request and matching ids with a regex cannot use an index, so every beatmap save
+mirrors them into one BeatmapMapper row per mapper. Lookups by mapper id become
+an indexed join and per-beatmap mapper lists one query over the index.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_MAPPER = '(unknown)'
+# Beatmap fields the index is derived from
+MAPPER_SOURCE_FIELDS = ('listed_owner', 'listed_owner_id', 'creator')
+
+
+def _split_csv(raw: Optional[str]) -> List[str]:
+    return [part.strip() for part in str(raw or '').split(',')]
+
+
+def split_mappers(listed_owner: Optional[str], listed_owner_id: Optional[str], creator: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    """[(mapper name, osu id or None)] in listed order.
+
+    Names come from listed_owner (creator if empty) and ids from listed_owner_id, paired
+    by position. Extra ids without a name keep an empty name so id lookups still find them.
+    """
+    names = _split_csv(listed_owner or creator)
+    ids = [i if i.isdigit() else None for i in _split_csv(listed_owner_id)]
+    rows = []
+    for pos in range(max(len(names), len(ids))):
+        name = names[pos] if pos < len(names) else ''
+        osu_id = ids[pos] if pos < len(ids) else None
+        if name or osu_id:
+            rows.append((name, osu_id))
+    return rows
+
+
+def sync_beatmap_mappers(beatmap) -> None:
+    """Bring the BeatmapMapper rows of one beatmap in line with its owner fields."""
+    from ..models import BeatmapMapper
+
+    wanted = split_mappers(beatmap.listed_owner, beatmap.listed_owner_id, beatmap.creator)
+    try:
+        current = list(
+            BeatmapMapper.objects.filter(beatmap_id=beatmap.pk)
+            .order_by('position').values_list('mapper_name', 'mapper_osu_id')
+        )
+        if current == wanted:
+            return
+        with transaction.atomic():
+            BeatmapMapper.objects.filter(beatmap_id=beatmap.pk).delete()
+            BeatmapMapper.objects.bulk_create([
+                BeatmapMapper(beatmap_id=beatmap.pk, position=pos, mapper_name=name, mapper_osu_id=osu_id)
+                for pos, (name, osu_id) in enumerate(wanted)
+            ])
+    except Exception as exc:
+        # The index is rebuilt by rebuild_beatmap_mappers; never fail the beatmap save over it
+        logger.error(f"Mapper index sync failed for beatmap {beatmap.pk}: {exc}")
+
+
+def rebuild_beatmap_mappers(batch_size: int = 2000) -> int:
+    """Rebuild the whole index from the beatmap table; returns the number of rows written."""
+    from ..models import Beatmap, BeatmapMapper
+
+    written = 0
+    with transaction.atomic():
+        BeatmapMapper.objects.all().delete()
+        batch = []
+        beatmaps = Beatmap.objects.values_list('pk', *MAPPER_SOURCE_FIELDS).order_by('pk')
+        for pk, listed_owner, listed_owner_id, creator in beatmaps.iterator(chunk_size=batch_size):
+            for pos, (name, osu_id) in enumerate(split_mappers(listed_owner, listed_owner_id, creator)):
+                batch.append(BeatmapMapper(beatmap_id=pk, position=pos, mapper_name=name, mapper_osu_id=osu_id))
+            if len(batch) >= batch_size:
+                BeatmapMapper.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            BeatmapMapper.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+# ----------------------------- Lookups ----------------------------- #
+
+def beatmaps_by_mapper_id(osu_id):
+    """Beatmaps listing `osu_id` among their owner ids (listed_owner_id)."""
+    from ..models import Beatmap, BeatmapMapper
+
+    mapped = BeatmapMapper.objects.filter(mapper_osu_id=str(osu_id).strip()).values('beatmap_id')
+    return Beatmap.objects.filter(pk__in=mapped)
+
+
+def mappers_by_beatmap(beatmap_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """{beatmap pk: [mapper name, ...]} in listed order; beatmaps without names get '(unknown)'."""
+    from ..models import BeatmapMapper
+
+    ids = list({int(i) for i in beatmap_ids})
+    result: Dict[int, List[str]] = {i: [] for i in ids}
+    rows = (
+        BeatmapMapper.objects.filter(beatmap_id__in=ids)
+        .exclude(mapper_name='')
+        .order_by('beatmap_id', 'position')
+        .values_list('beatmap_id', 'mapper_name')
+    )
+    for bm_pk, name in rows.iterator(chunk_size=5000):
+        result[bm_pk].append(name)
+    for bm_pk, names in result.items():
+        if not names:
+            names.append(UNKNOWN_MAPPER)
+    return result
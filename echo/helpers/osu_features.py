@@ -0,0 +1,114 @@
+"""Per-map features derived from .osu files, stored in BeatmapFeatures for search.
+
+Features are computed offline by the extract_osu_features command from the .osu
+bytes already kept in storage (hit objects and timing via helpers.osu_file) plus
+the stored strain blob (peak strains). Search filters on them through
+operators.handle_attribute_comparison_query, e.g. `density>=8` or `stream>=16`.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from .osu_file import TYPE_HOLD, TYPE_SLIDER, TYPE_SPINNER, beat_lengths, iter_hit_objects, scan_osu
+from .rosu_utils import _pp_source_version, _rosu_mode_name, get_or_compute_strains, read_osu_bytes
+
+# Bump to recompute every row after changing a definition below
+FEATURE_VERSION = 1
+# Gaps up to this multiple of a 1/4 beat still count as stream spacing (rounding in old maps)
+STREAM_GAP_TOLERANCE = 1.1
+
+FEATURE_FIELDS = ("object_count", "density", "slider_ratio", "max_stream", "avg_jump", "peak_aim", "peak_speed")
+
+
+def _longest_true_run(mask: np.ndarray) -> int:
+    if not mask.any():
+        return 0
+    # Run lengths from the positions where the mask flips
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def compute_osu_features(osu_bytes: bytes, mode: Optional[str] = None) -> Dict:
+    """Hit-object features for one .osu file (no strain data). Values are None when undefined."""
+    scan = scan_osu(osu_bytes)
+    features: Dict = {field: None for field in FEATURE_FIELDS}
+    objects = np.array(list(iter_hit_objects(scan)), dtype=np.float64).reshape(-1, 4)
+    features["object_count"] = int(len(objects))
+    if not len(objects):
+        return features
+
+    objects = objects[np.argsort(objects[:, 2], kind="stable")]
+    times = objects[:, 2]
+    types = objects[:, 3].astype(np.int64)
+
+    drain_s = (times[-1] - times[0]) / 1000.0
+    if drain_s > 0:
+        features["density"] = float(len(objects) / drain_s)
+    features["slider_ratio"] = float(np.count_nonzero(types & (TYPE_SLIDER | TYPE_HOLD)) / len(objects))
+
+    # Beat length in effect at each object, from the uninherited timing points
+    points = beat_lengths(scan)
+    playable = objects[(types & TYPE_SPINNER) == 0]
+    if points and len(playable):
+        point_times = np.array([p[0] for p in points])
+        point_beats = np.array([p[1] for p in points])
+
+        def beat_at(t):
+            idx = np.clip(np.searchsorted(point_times, t, side="right") - 1, 0, len(points) - 1)
+            return point_beats[idx]
+
+        # Chords (mania, stacked notes) share a time and count once
+        onsets = np.unique(playable[:, 2])
+        gaps = np.diff(onsets)
+        quarter = beat_at(onsets[:-1]) / 4.0 * STREAM_GAP_TOLERANCE
+        run = _longest_true_run(gaps <= quarter)
+        features["max_stream"] = run + 1 if run else 0
+
+        if _rosu_mode_name(mode) == "Osu" and len(playable) > 1:
+            # Distance between consecutive objects played within one beat of each other
+            gaps = np.diff(playable[:, 2])
+            dist = np.hypot(np.diff(playable[:, 0]), np.diff(playable[:, 1]))
+            close = (gaps > 0) & (gaps <= beat_at(playable[:-1, 2]))
+            if close.any():
+                features["avg_jump"] = float(dist[close].mean())
+    return features
+
+
+def feature_source_version(beatmap) -> str:
+    return f"f{FEATURE_VERSION}:{_pp_source_version(beatmap)}"
+
+
+def update_beatmap_features(beatmap, force: bool = False):
+    """Compute and store BeatmapFeatures for one beatmap; returns the row or None on failure.
+
+    Rows whose source_version matches the beatmap are kept unless `force`.
+    """
+    from ..models import BeatmapFeatures
+
+    version = feature_source_version(beatmap)
+    if not force:
+        row = BeatmapFeatures.objects.filter(beatmap_id=beatmap.pk).first()
+        if row is not None and row.source_version == version:
+            return row
+
+    osu_bytes = read_osu_bytes(beatmap.beatmap_id)
+    if not osu_bytes:
+        return None
+    features = compute_osu_features(osu_bytes, mode=getattr(beatmap, "mode", None))
+
+    # Peak strains come from the stored blob (built here if missing)
+    strains = get_or_compute_strains(beatmap) if _rosu_mode_name(getattr(beatmap, "mode", None)) else None
+    if strains is not None and len(strains["aim"]):
+        features["peak_aim"] = float(np.max(strains["aim"]))
+        if (strains.get("labels") or {}).get("speed") is not None:
+            features["peak_speed"] = float(np.max(strains["speed"]))
+
+    row, _ = BeatmapFeatures.objects.update_or_create(
+        beatmap_id=beatmap.pk,
+        defaults={**features, "source_version": version},
+    )
+    return row
@@ -0,0 +1,151 @@
+"""Single-pass scanner over raw .osu bytes.
+
+scan_osu() runs over the buffer once without decoding it or building a line list:
+section headers and hit-object fields are matched in place by compiled byte
+patterns, and only the time/type fields of each hit object are materialised.
+The result holds hit-object timing, object counts by type and the byte range of
+every [Section], so later feature extraction can slice a section through
+OsuScan.section() without copying or re-scanning the file; iter_hit_objects()
+and beat_lengths() read positions and timing from those ranges.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional, Tuple
+
+# HitObject type bits (https://osu.ppy.sh/wiki/en/Client/File_formats/osu_%28file_format%29#type)
+TYPE_CIRCLE = 1
+TYPE_SLIDER = 2
+TYPE_SPINNER = 8
+TYPE_HOLD = 128
+
+_SECTION_RE = re.compile(rb"^[ \t]*\[([^\]\r\n]*)\][ \t\r]*$", re.M)
+# x,y,time[,type,...]: captures the raw time field and the type field when it is an integer
+_HIT_OBJECT_RE = re.compile(rb"^[^,\n]*,[^,\n]*,([^,\n]*)(?:,[ \t]*(\d+))?", re.M)
+# Same lines with positions, for feature extraction
+_HIT_OBJECT_XY_RE = re.compile(rb"^([^,\n]*),([^,\n]*),([^,\n]*)(?:,[ \t]*(\d+))?", re.M)
+# time,beatLength[,meter,sampleSet,sampleIndex,volume,uninherited,...]
+_TIMING_POINT_RE = re.compile(rb"^[ \t]*([^,\n]*),([^,\n]*)(?:,[^,\n]*){0,4}(?:,[ \t]*(\d))?", re.M)
+
+
+class OsuScan:
+    """Result of scan_osu(); times are in ms, section ranges are byte offsets into `data`."""
+
+    __slots__ = (
+        "data", "sections",
+        "first_ms", "second_ms", "last_ms",
+        "object_count", "circles", "sliders", "spinners", "holds",
+    )
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        # {lowercased section name: (body start, body end)}
+        self.sections: Dict[str, Tuple[int, int]] = {}
+        self.first_ms: Optional[float] = None
+        # Second-earliest distinct start time (the timeseries origin)
+        self.second_ms: Optional[float] = None
+        self.last_ms: Optional[float] = None
+        self.object_count = 0
+        self.circles = 0
+        self.sliders = 0
+        self.spinners = 0
+        self.holds = 0
+
+    def section(self, name: str) -> Optional[memoryview]:
+        """Zero-copy view of a section's body (without its header line), or None."""
+        span = self.sections.get(name.lower())
+        if span is None:
+            return None
+        return self.data[span[0]:span[1]]
+
+
+def scan_osu(osu_bytes) -> OsuScan:
+    """Scan a .osu file once. Malformed hit-object lines are skipped, never raised."""
+    data = bytes(osu_bytes) if isinstance(osu_bytes, memoryview) else osu_bytes
+    scan = OsuScan(data)
+    size = len(data)
+
+    current: Optional[str] = None
+    current_start = 0
+    for match in _SECTION_RE.finditer(data):
+        if current is not None:
+            scan.sections[current] = (current_start, match.start())
+        current = match.group(1).decode("ascii", "ignore").strip().lower()
+        current_start = min(match.end() + 1, size)
+    if current is not None:
+        scan.sections[current] = (current_start, size)
+
+    span = scan.sections.get("hitobjects")
+    if span is None:
+        return scan
+
+    # Locals keep the per-object loop cheap; objects are normally sorted by time
+    first = second = last = None
+    count = circles = sliders = spinners = holds = 0
+    for match in _HIT_OBJECT_RE.finditer(data, span[0], span[1]):
+        try:
+            t = float(match.group(1))
+        except ValueError:
+            continue
+        if first is None or t < first:
+            if first is not None:
+                second = first
+            first = t
+        elif t > first and (second is None or t < second):
+            second = t
+        if last is None or t > last:
+            last = t
+        count += 1
+        type_field = match.group(2)
+        type_bits = int(type_field) if type_field else 0
+        if type_bits & TYPE_CIRCLE:
+            circles += 1
+        elif type_bits & TYPE_SLIDER:
+            sliders += 1
+        elif type_bits & TYPE_SPINNER:
+            spinners += 1
+        elif type_bits & TYPE_HOLD:
+            holds += 1
+
+    scan.first_ms, scan.second_ms, scan.last_ms = first, second, last
+    scan.object_count = count
+    scan.circles, scan.sliders, scan.spinners, scan.holds = circles, sliders, spinners, holds
+    return scan
+
+
+def iter_hit_objects(scan: OsuScan):
+    """Yield (x, y, time_ms, type_bits) for each well-formed hit object, in file order."""
+    span = scan.sections.get("hitobjects")
+    if span is None:
+        return
+    data = scan.data.obj
+    for match in _HIT_OBJECT_XY_RE.finditer(data, span[0], span[1]):
+        try:
+            x, y, t = float(match.group(1)), float(match.group(2)), float(match.group(3))
+        except ValueError:
+            continue
+        type_field = match.group(4)
+        yield x, y, t, int(type_field) if type_field else 0
+
+
+def beat_lengths(scan: OsuScan) -> list:
+    """Uninherited timing points as [(time_ms, beat_length_ms)], in file order.
+
+    Files older than v6 have no uninherited column; a positive beat length marks
+    an uninherited point there as well.
+    """
+    span = scan.sections.get("timingpoints")
+    if span is None:
+        return []
+    data = scan.data.obj
+    points = []
+    for match in _TIMING_POINT_RE.finditer(data, span[0], span[1]):
+        try:
+            t, beat_length = float(match.group(1)), float(match.group(2))
+        except ValueError:
+            continue
+        uninherited = match.group(3)
+        if beat_length > 0 and (uninherited is None or uninherited == b"1"):
+            points.append((t, beat_length))
+    return points
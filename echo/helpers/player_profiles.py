@@ -0,0 +1,167 @@
+"""Player tag profiles and the "most related map" lookup for the statistics page.
+
+A player's profile (their beatmaps from the osu! API, the most applied tags on
+them and their median star rating) is stored per (osu_id, source) in
+PlayerProfile, so repeat views skip the API round trip and the tag group-by.
+
+The most related map is the nearest neighbour of the player's maps in the tag
+vector index (helpers.tag_similarity) within the star window.
+most_related_beatmap_id() is the fallback when the index has nothing to offer:
+it uses the search weighting of views.statistics _compute_weighted_queryset, but
+only over candidate beatmaps, i.e. maps in the star window carrying at least one
+of the profile tags. Every other map has no match and a weight of zero, so
+annotating the whole beatmap table is unnecessary; the candidates' counts come
+from one grouped query over their tag applications.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Callable, List, Optional, Sequence
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+PLAYER_PROFILE_TTL = timedelta(hours=6)
+PLAYER_TOP_TAGS = 15
+# Predicted applications count half in the weighting (predicted_mode='include')
+PREDICTED_WEIGHT = 0.5
+
+
+def _median(values: Sequence[float]) -> Optional[float]:
+    ordered = sorted(v for v in values if v is not None)
+    n = len(ordered)
+    if not n:
+        return None
+    return ordered[n // 2] if n % 2 == 1 else (ordered[n // 2 - 1] + ordered[n // 2]) / 2.0
+
+
+def build_player_profile(osu_id: int, source: str, beatmap_ids: List[int]):
+    """Compute and store the profile for the given Beatmap pks."""
+    from ..models import Beatmap, PlayerProfile, TagApplication
+
+    rows = (
+        TagApplication.objects
+        .filter(beatmap_id__in=beatmap_ids, true_negative=False)
+        .values('tag__name')
+        .annotate(c=Count('id'))
+        .order_by('-c')[:PLAYER_TOP_TAGS]
+    )
+    rows = [r for r in rows if r['tag__name']]
+    stars = Beatmap.objects.filter(pk__in=beatmap_ids).values_list('difficulty_rating', flat=True)
+    profile, _ = PlayerProfile.objects.update_or_create(
+        osu_id=osu_id, source=source,
+        defaults={
+            'beatmap_ids': list(beatmap_ids),
+            'tag_names': [r['tag__name'] for r in rows],
+            'tag_counts': [int(r['c']) for r in rows],
+            'median_star': _median(list(stars)),
+            'refreshed_at': timezone.now(),
+        },
+    )
+    return profile
+
+
+def get_player_profile(osu_id: int, source: str, fetch_beatmap_ids: Callable[[int, str], Optional[List[int]]]):
+    """Stored profile if fresh, else rebuilt from `fetch_beatmap_ids` (None if that fails)."""
+    from ..models import PlayerProfile
+
+    profile = PlayerProfile.objects.filter(
+        osu_id=osu_id, source=source, refreshed_at__gte=timezone.now() - PLAYER_PROFILE_TTL,
+    ).first()
+    if profile is not None:
+        return profile
+    beatmap_ids = fetch_beatmap_ids(osu_id, source)
+    if beatmap_ids is None:
+        # API failure: answer empty now and try again next time
+        return None
+    try:
+        return build_player_profile(osu_id, source, beatmap_ids)
+    except Exception as exc:
+        logger.error(f"Player profile build failed for {osu_id}/{source}: {exc}")
+        return None
+
+
+def star_window(median_star: Optional[float]):
+    """(min, max) stars around the median (±10%, at least ±0.5), or None without a median."""
+    if median_star is None:
+        return None
+    delta = max(0.5, float(median_star) * 0.10)
+    return max(0.0, float(median_star) - delta), min(15.0, float(median_star) + delta)
+
+
+def most_related_beatmap_id(tag_names: Sequence[str], median_star: Optional[float]) -> Optional[int]:
+    """Pk of the beatmap with the highest search weight for `tag_names` within the star window."""
+    from ..models import Tag, TagApplication
+
+    tag_ids = list(Tag.objects.filter(name__in=list(tag_names)).values_list('id', flat=True))
+    if not tag_ids:
+        return None
+    candidates = TagApplication.objects.filter(tag_id__in=tag_ids)
+    window = star_window(median_star)
+    if window:
+        candidates = candidates.filter(beatmap__difficulty_rating__gte=window[0], beatmap__difficulty_rating__lte=window[1])
+
+    matched = Q(tag_id__in=tag_ids)
+    human = Q(user__isnull=False)
+    rows = (
+        TagApplication.objects
+        .filter(beatmap_id__in=candidates.values('beatmap_id'))
+        .values('beatmap_id')
+        .annotate(
+            total=Count('id'),
+            u_match=Count('tag_id', filter=matched & human, distinct=True),
+            p_match=Count('tag_id', filter=matched & ~human, distinct=True),
+            u_rows=Count('id', filter=matched & human),
+            p_rows=Count('id', filter=matched & ~human),
+        )
+        .values_list('beatmap_id', 'total', 'u_match', 'p_match', 'u_rows', 'p_rows')
+    )
+
+    # Same terms as _compute_weighted_queryset with include_tags == exact_tags
+    best_key, best_id = None, None
+    for bm_id, total, u_match, p_match, u_rows, p_rows in rows.iterator(chunk_size=5000):
+        matched_total = u_match + p_match
+        denominator = (len(tag_names) - matched_total) + (total - matched_total) * 3.0
+        if denominator == 0:
+            # Division by zero is NULL in SQL and never ranked first there either
+            continue
+        weight = (
+            (u_match + p_match * PREDICTED_WEIGHT) * 5.0
+            + (u_rows + p_rows * PREDICTED_WEIGHT)
+            + (u_match + p_match * PREDICTED_WEIGHT) * 0.1
+        ) / denominator
+        key = (-weight, bm_id)
+        if best_key is None or key < best_key:
+            best_key, best_id = key, bm_id
+    return best_id
+
+
+def similar_beatmap_id(profile) -> Optional[int]:
+    """Pk of the beatmap closest to the player's maps by tag vectors, within the star window.
+
+    The player's own maps are skipped; the index mode is the most common mode among them.
+    """
+    from ..models import Beatmap, Tag
+    from .tag_similarity import similar_beatmaps
+
+    modes = Counter(Beatmap.objects.filter(pk__in=profile.beatmap_ids).values_list('mode', flat=True))
+    if not modes:
+        return None
+    candidates = None
+    window = star_window(profile.median_star)
+    if window:
+        candidates = (
+            Beatmap.objects
+            .filter(difficulty_rating__gte=window[0], difficulty_rating__lte=window[1])
+            .values_list('pk', flat=True)
+        )
+    ranked = similar_beatmaps(
+        Tag.normalize_mode(modes.most_common(1)[0][0]), profile.beatmap_ids, 1, candidates=candidates,
+    )
+    return ranked[0][0] if ranked else None
@@ -1,20 +1,29 @@
 """Utilities for computing and caching osu! difficulty time-series using rosu-pp.
 
 This module downloads .osu files to the configured default storage (S3 in prod),
-parses them with rosu_pp_py, computes binned mean strains for aim and speed, and
-persists the resulting time-series as JSON files in S3 rather than the database.
+parses them with rosu_pp_py, and persists the raw strains (aim/speed, or the per-mode
+skills for taiko, catch and mania) as one compact binary blob (with a downsampling
+pyramid) per beatmap and mods in S3 rather than the database. Binned mean time-series
+for any window size are sliced from that blob.
 """
 
 from __future__ import annotations
 
+import hashlib
 import math
 import json
+import struct
+import sys
 import tempfile
-from typing import Dict, List, Optional
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional
 
-import requests
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+import numpy as np
+from . import http_client, storage
+from .osu_file import scan_osu
 
 try:
     import rosu_pp_py as rosu
@@ -31,116 +40,110 @@ def _storage_key_for_osu(beatmap_id: str | int) -> str:
     return f"{STORAGE_OSU_DIR}/{beatmap_id}.osu"
 
 
-def _timeseries_storage_key(beatmap_id: str | int, window_seconds: int, mods: Optional[str]) -> str:
+def _timeseries_blob_key(beatmap_id: str | int, mods: Optional[str]) -> str:
     mods_token = (mods or "").strip().upper() or "NOMOD"
-    return f"{STORAGE_TS_DIR}/{beatmap_id}/w{int(window_seconds)}_{mods_token}.json"
+    return f"{STORAGE_TS_DIR}/{beatmap_id}/strains_{mods_token}.bin"
 
 
-def ensure_osu_file_available(beatmap_id: str | int) -> Optional[str]:
-    """Ensure the .osu file exists in default storage; return storage name.
+def read_osu_bytes(beatmap_id: str | int) -> Optional[bytes]:
+    """Return the beatmap's .osu bytes, downloading and storing them on a miss.
 
-    Returns None on failure.
+    A hit costs one storage GET; returns None on failure.
     """
     name = _storage_key_for_osu(beatmap_id)
     try:
-        if not default_storage.exists(name):
-            url = OSU_DOWNLOAD_URL_TMPL.format(beatmap_id=beatmap_id)
-            resp = requests.get(url, timeout=15)
-            if resp.status_code != 200 or not resp.content:
-                return None
-            default_storage.save(name, ContentFile(resp.content))
-        return name
+        osu_bytes = storage.read_bytes(name)
+        if osu_bytes:
+            return osu_bytes
+        url = OSU_DOWNLOAD_URL_TMPL.format(beatmap_id=beatmap_id)
+        resp = http_client.get(url, timeout=15)
+        if resp.status_code != 200 or not resp.content:
+            return None
+        storage.write_bytes(name, resp.content)
+        # A new .osu file means any PP computed from a previous copy is stale
+        invalidate_pp_cache(beatmap_id)
+        return resp.content
     except Exception:
         return None
 
 
-def _bin_mean(values: List[float], bin_size: int) -> List[float]:
-    if bin_size <= 0:
-        return []
-    n_full = (len(values) // bin_size) * bin_size
-    means: List[float] = []
-    for i in range(0, n_full, bin_size):
-        window = values[i : i + bin_size]
-        means.append(sum(window) / float(bin_size))
-    return means
+def ensure_osu_file_available(beatmap_id: str | int) -> Optional[str]:
+    """Ensure the .osu file exists in default storage; return storage name.
 
+    Returns None on failure. Prefer read_osu_bytes when the content is needed.
+    """
+    if read_osu_bytes(beatmap_id) is None:
+        return None
+    return _storage_key_for_osu(beatmap_id)
 
-def _first_last_hitobject_ms_from_osu(osu_bytes: bytes) -> tuple[float, float]:
-    """Parse raw .osu to get earliest and latest HitObject times in ms.
 
-    Returns (0.0, 0.0) on failure.
-    """
-    first_ms: Optional[float] = None
-    last_ms: Optional[float] = None
-    try:
-        text = osu_bytes.decode('utf-8', errors='ignore')
-        lines = text.splitlines()
-        in_hit = False
-        for line in lines:
-            s = line.strip()
-            if not s:
-                continue
-            if s.startswith('[') and s.endswith(']'):
-                in_hit = (s.lower() == '[hitobjects]')
-                continue
-            if not in_hit:
-                continue
-            parts = s.split(',')
-            if len(parts) >= 3:
-                try:
-                    t = float(parts[2])
-                    if first_ms is None or t < first_ms:
-                        first_ms = t
-                    if last_ms is None or t > last_ms:
-                        last_ms = t
-                except Exception:
-                    pass
-    except Exception:
-        return 0.0, 0.0
-    return float(first_ms or 0.0), float(last_ms or 0.0)
+# Windows produced together whenever a beatmap's strains are extracted
+TIMESERIES_WINDOWS = (1, 5, 10)
 
 
-def _first_two_hitobject_times_ms(osu_bytes: bytes) -> list[float]:
-    """Return the first two hitobject start times in ms (sorted, unique).
+def _clock_rate_for_mods(mods: Optional[str]) -> float:
+    mods_up = (mods or "").upper()
+    if "DT" in mods_up:
+        return 1.5
+    if "HT" in mods_up:
+        return 0.75
+    return 1.0
 
-    Returns an empty list on failure or if fewer than two are present.
-    """
-    try:
-        text = osu_bytes.decode('utf-8', errors='ignore')
-        lines = text.splitlines()
-        in_hit = False
-        times: list[float] = []
-        for line in lines:
-            s = line.strip()
-            if not s:
-                continue
-            if s.startswith('[') and s.endswith(']'):
-                in_hit = (s.lower() == '[hitobjects]')
-                continue
-            if not in_hit:
-                continue
-            parts = s.split(',')
-            if len(parts) >= 3:
-                try:
-                    t = float(parts[2])
-                    times.append(t)
-                except Exception:
-                    pass
-        if not times:
-            return []
-        times_sorted = sorted(set(times))
-        return times_sorted[:2]
-    except Exception:
-        return []
 
-def compute_timeseries_from_osu_bytes(
-    osu_bytes: bytes,
-    window_seconds: int = 5,
-    mods: Optional[str] = None,
-) -> Optional[Dict]:
-    """Compute 10-second mean strains (aim, speed, total) using rosu.
+# Site mode names (Beatmap.mode / Tag.MODE_*) -> rosu GameMode member
+ROSU_GAME_MODES = {
+    "osu": "Osu", "std": "Osu", "standard": "Osu", "0": "Osu",
+    "taiko": "Taiko", "1": "Taiko",
+    "fruits": "Catch", "catch": "Catch", "ctb": "Catch", "2": "Catch",
+    "mania": "Mania", "3": "Mania",
+}
 
-    Returns a JSON-serialisable dict or None on failure.
+
+def _rosu_mode_name(mode) -> Optional[str]:
+    if not mode:
+        return "Osu"
+    return ROSU_GAME_MODES.get(str(mode).lower())
+
+
+def _load_rosu_beatmap(path: str, mode=None):
+    """Parse a .osu file, converting it when the beatmap is played in another mode."""
+    bm = rosu.Beatmap(path=path)
+    name = _rosu_mode_name(mode)
+    if name and str(bm.mode) != f"GameMode.{name}":
+        bm.convert(getattr(rosu.GameMode, name))
+    return bm
+
+
+def _strain_channels(strains):
+    """Map rosu's per-mode strain fields onto the two timeseries channels.
+
+    Returns (primary, secondary, labels); a None label marks an unused channel
+    (catch and mania have a single strain skill).
+    """
+    mode = str(getattr(strains, "mode", "GameMode.Osu"))
+    if mode.endswith("Taiko"):
+        color = np.asarray(strains.color, dtype=np.float64)
+        rhythm = np.asarray(strains.rhythm, dtype=np.float64)
+        stamina = np.asarray(strains.stamina, dtype=np.float64)
+        return color + rhythm, stamina, {"aim": "Color+Rhythm", "speed": "Stamina"}
+    if mode.endswith("Catch"):
+        movement = np.asarray(strains.movement, dtype=np.float64)
+        return movement, np.zeros_like(movement), {"aim": "Movement", "speed": None}
+    if mode.endswith("Mania"):
+        values = np.asarray(strains.strains, dtype=np.float64)
+        return values, np.zeros_like(values), {"aim": "Strain", "speed": None}
+    aim = np.asarray(strains.aim, dtype=np.float64)
+    speed = np.asarray(strains.speed, dtype=np.float64)
+    return aim, speed, {"aim": "Aim", "speed": "Speed"}
+
+
+def extract_strains(osu_bytes: bytes, mods: Optional[str] = None, mode: Optional[str] = None) -> Optional[Dict]:
+    """Run rosu once and return raw strain sections plus timing metadata.
+
+    `mode` is the beatmap's site mode (osu/taiko/fruits/mania); per-mode skills
+    are mapped onto the aim/speed channels by _strain_channels().
+    The result feeds bin_strains() for any number of window sizes.
+    Returns None on failure.
     """
     if rosu is None:
         return None
@@ -149,7 +152,7 @@ def compute_timeseries_from_osu_bytes(
             tmp.write(osu_bytes)
             tmp.flush()
 
-            bm = rosu.Beatmap(path=tmp.name)
+            bm = _load_rosu_beatmap(tmp.name, mode)
 
             # Apply mods if provided (string acronyms like "DT", "HR", "EZ", "HT", "FL")
             # This affects strain computation (AR/CS/OD/HP, speed mods, etc.).
@@ -164,220 +167,602 @@ def compute_timeseries_from_osu_bytes(
             except Exception:
                 stars_val = 0.0
             strains = diff.strains(bm)
-
-            section_ms: float = float(strains.section_length)
-            # Determine how many strain sections fit into the requested window
-            # and compute the effective window size in seconds based on the
-            # integer bin size actually used.
-            bin_size_float = (window_seconds * 1000.0) / section_ms
-            bin_size = max(1, int(round(bin_size_float)))
-            if bin_size <= 0:
-                return None
-
-            aim = list(map(float, list(strains.aim)))
-            speed = list(map(float, list(strains.speed)))
-
-            aim_binned = _bin_mean(aim, bin_size)
-            speed_binned = _bin_mean(speed, bin_size)
-            # Align length
-            n = min(len(aim_binned), len(speed_binned))
-            aim_binned = aim_binned[:n]
-            speed_binned = speed_binned[:n]
-            total_binned_all = [a + s for a, s in zip(aim_binned, speed_binned)]
-
-            # Center time of each window (relative timeline from first object)
-            effective_window_s = (bin_size * section_ms) / 1000.0
-
-
-            mods_up = (mods or "").upper()
-            clock_rate = 1.0
-            times_rel = [((i + 0.5) * effective_window_s) / clock_rate for i in range(n)]
-
-            # Determine first/last hitobject times to trim/stretch accurately
-            first_ms, t_last_ms = _first_last_hitobject_ms_from_osu(osu_bytes)
-            # Always set origin to the second hitobject when present
-            first_two = _first_two_hitobject_times_ms(osu_bytes)
-            if len(first_two) >= 2:
-                t0_ms = float(first_two[1])
-            else:
-                t0_ms = float(first_ms or 0.0)
-            # Determine clock rate from speed mods for correct time scaling on the X axis
-            mods_up = (mods or "").upper()
-            clock_rate = 1.0
-            if "DT" in mods_up:
-                clock_rate = 1.5
-            elif "HT" in mods_up:
-                clock_rate = 0.75
-            # Convert hitobject times to seconds under the applied clock rate
-            t0_s = (t0_ms / 1000.0) / clock_rate if t0_ms else 0.0
-            t_end_s = (t_last_ms / 1000.0) / clock_rate if t_last_ms else 0.0
-            tmax_rel_s = max(0.0, t_end_s - t0_s)
-
-            # Clip bins to slightly beyond last object by half-window to avoid overshoot
-            keep_idx = [i for i, t in enumerate(times_rel) if t <= (tmax_rel_s + (effective_window_s * 0.5))]
-            if keep_idx:
-                times_s = [times_rel[i] for i in keep_idx]
-                aim_binned = [aim_binned[i] for i in keep_idx]
-                speed_binned = [speed_binned[i] for i in keep_idx]
-                total_binned = [total_binned_all[i] for i in keep_idx]
-            else:
-                times_s = times_rel
-                total_binned = total_binned_all
-
-            return {
-                "version": 3,
-                "window_s": window_seconds,
-                "section_ms": section_ms,
-                "t0_s": t0_s,
-                "t_end_s": t_end_s,
-                "times_s": times_s,
-                "aim": aim_binned,
-                "speed": speed_binned,
-                "total": total_binned,
-                "effective_window_s": effective_window_s,
-                # Expose clock rate so the frontend can align tag overlays with the modded timeline
-                "clock_rate": clock_rate,
-                # Provide modded star rating so the frontend can scale Y correctly
-                "stars": stars_val,
-            }
+            section_ms = float(strains.section_length)
+            aim, speed, labels = _strain_channels(strains)
+            rosu_mode = str(strains.mode).split(".")[-1].lower()
     except Exception:
         return None
 
+    # Determine first/last hitobject times to trim/stretch accurately (one pass over the bytes)
+    scan = scan_osu(osu_bytes)
+    t_last_ms = float(scan.last_ms or 0.0)
+    # Always set origin to the second hitobject when present
+    t0_ms = float(scan.second_ms if scan.second_ms is not None else (scan.first_ms or 0.0))
+    # Convert hitobject times to seconds under the applied clock rate
+    clock_rate = _clock_rate_for_mods(mods)
+    t0_s = (t0_ms / 1000.0) / clock_rate if t0_ms else 0.0
+    t_end_s = (t_last_ms / 1000.0) / clock_rate if t_last_ms else 0.0
+
+    return {
+        "aim": aim,
+        "speed": speed,
+        "section_ms": section_ms,
+        "stars": stars_val,
+        "clock_rate": clock_rate,
+        "t0_s": t0_s,
+        "t_end_s": t_end_s,
+        "mode": rosu_mode,
+        "labels": labels,
+    }
+
+
+def bin_strains(strains: Dict, window_seconds: int) -> Optional[Dict]:
+    """Bin extracted strains into `window_seconds` means; returns the version 3 timeseries dict."""
+    section_ms = strains["section_ms"]
+    if section_ms <= 0:
+        return None
+    # Determine how many strain sections fit into the requested window
+    # and compute the effective window size in seconds based on the
+    # integer bin size actually used.
+    bin_size = max(1, int(round((window_seconds * 1000.0) / section_ms)))
+
+    # Start from the coarsest pyramid level whose factor divides bin_size; means of
+    # equal-size blocks compose, so the result equals binning the raw sections.
+    factor, aim, speed = 1, strains["aim"], strains["speed"]
+    for level_factor, level_aim, level_speed in strains.get("pyramid") or ():
+        if level_factor > factor and bin_size % level_factor == 0:
+            factor, aim, speed = level_factor, level_aim, level_speed
+    step = bin_size // factor
+
+    # Align length and drop the trailing partial bin
+    n = min(len(aim), len(speed)) // step
+    aim_binned = np.asarray(aim[: n * step], dtype=np.float64).reshape(n, step).mean(axis=1)
+    speed_binned = np.asarray(speed[: n * step], dtype=np.float64).reshape(n, step).mean(axis=1)
+    total_binned = aim_binned + speed_binned
+
+    # Center time of each window (relative timeline from first object)
+    effective_window_s = (bin_size * section_ms) / 1000.0
+    times_s = (np.arange(n, dtype=np.float64) + 0.5) * effective_window_s
+
+    # Clip bins to slightly beyond last object by half-window to avoid overshoot
+    tmax_rel_s = max(0.0, strains["t_end_s"] - strains["t0_s"])
+    keep = times_s <= (tmax_rel_s + (effective_window_s * 0.5))
+    if keep.any():
+        times_s = times_s[keep]
+        aim_binned = aim_binned[keep]
+        speed_binned = speed_binned[keep]
+        total_binned = total_binned[keep]
+
+    return {
+        "version": 3,
+        "window_s": window_seconds,
+        "section_ms": section_ms,
+        "t0_s": strains["t0_s"],
+        "t_end_s": strains["t_end_s"],
+        "times_s": times_s.tolist(),
+        "aim": aim_binned.tolist(),
+        "speed": speed_binned.tolist(),
+        "total": total_binned.tolist(),
+        "effective_window_s": effective_window_s,
+        # Expose clock rate so the frontend can align tag overlays with the modded timeline
+        "clock_rate": strains["clock_rate"],
+        # Provide modded star rating so the frontend can scale Y correctly
+        "stars": strains["stars"],
+        # Channel names for non-standard modes (aim/speed carry e.g. movement for catch)
+        "mode": strains.get("mode", "osu"),
+        "labels": strains.get("labels") or {"aim": "Aim", "speed": "Speed"},
+    }
+
+
+def compute_timeseries_windows(
+    osu_bytes: bytes,
+    windows=TIMESERIES_WINDOWS,
+    mods: Optional[str] = None,
+    mode: Optional[str] = None,
+) -> Dict[int, Dict]:
+    """Compute several window sizes from a single strain extraction.
+
+    Returns {window_seconds: timeseries}; empty on failure.
+    """
+    strains = extract_strains(osu_bytes, mods=mods, mode=mode)
+    if strains is None:
+        return {}
+    out: Dict[int, Dict] = {}
+    for window_seconds in windows:
+        ts = bin_strains(strains, int(window_seconds))
+        if ts is not None:
+            out[int(window_seconds)] = ts
+    return out
 
-def get_or_compute_timeseries(
-    beatmap,
+
+def compute_timeseries_from_osu_bytes(
+    osu_bytes: bytes,
     window_seconds: int = 5,
     mods: Optional[str] = None,
+    mode: Optional[str] = None,
 ) -> Optional[Dict]:
-    """Fetch or compute the timeseries for a Beatmap instance.
+    """Compute mean strains (aim, speed, total) per window using rosu.
 
-    Persistence strategy:
-      - Prefer reading from S3 (default_storage) at a deterministic path
-      - If missing, compute from the .osu file and write JSON to S3
-      - For legacy installs, if a DB-cached nomod timeseries exists, return it
-        and opportunistically upload it to S3 for future requests
+    Returns a JSON-serialisable dict or None on failure.
     """
-    # Only compute for osu! standard for now
-    if getattr(beatmap, "mode", None) and str(beatmap.mode).lower() not in ("osu", "standard", "std", "0"):
-        return None
-
-    # Prefer S3-cached JSON
-    key = _timeseries_storage_key(beatmap.beatmap_id, window_seconds, mods)
+    return compute_timeseries_windows(osu_bytes, windows=(window_seconds,), mods=mods, mode=mode).get(int(window_seconds))
+
+
+# ----------------------------- Strain blobs ----------------------------- #
+#
+# One artifact per (beatmap, mods) replaces the per-window JSON files:
+#   b"ETS1" | uint32 LE meta length | meta JSON | float32 LE arrays
+# Arrays are stored per pyramid level (aim then speed); level k holds means of
+# 2**k raw strain sections, so any window is sliced without recomputing rosu.
+
+STRAIN_BLOB_MAGIC = b"ETS1"
+STRAIN_BLOB_VERSION = 1
+STRAIN_PYRAMID_LEVELS = 8
+# Shape of the JSON built by bin_strains; bump it whenever that payload changes so
+# timeseries_etag stops matching responses cached by clients.
+TIMESERIES_PAYLOAD_VERSION = 4
+
+
+def build_strain_pyramid(aim, speed) -> list:
+    """Return [(factor, aim, speed), ...] with factor 1, 2, 4, ... (trailing partial blocks dropped)."""
+    aim = np.asarray(aim, dtype=np.float64)
+    speed = np.asarray(speed, dtype=np.float64)
+    n = min(len(aim), len(speed))
+    aim, speed = aim[:n], speed[:n]
+    levels = []
+    for k in range(STRAIN_PYRAMID_LEVELS):
+        factor = 1 << k
+        m = n // factor
+        if k and m < 1:
+            break
+        levels.append((
+            factor,
+            aim[: m * factor].reshape(m, factor).mean(axis=1).astype("<f4"),
+            speed[: m * factor].reshape(m, factor).mean(axis=1).astype("<f4"),
+        ))
+    return levels
+
+
+def encode_strain_blob(strains: Dict) -> bytes:
+    pyramid = strains.get("pyramid") or build_strain_pyramid(strains["aim"], strains["speed"])
+    meta = {
+        "version": STRAIN_BLOB_VERSION,
+        "section_ms": strains["section_ms"],
+        "stars": strains["stars"],
+        "clock_rate": strains["clock_rate"],
+        "t0_s": strains["t0_s"],
+        "t_end_s": strains["t_end_s"],
+        "mode": strains.get("mode", "osu"),
+        "labels": strains.get("labels") or {"aim": "Aim", "speed": "Speed"},
+        "levels": [[factor, int(len(a))] for factor, a, _ in pyramid],
+    }
+    meta_bytes = json.dumps(meta, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    parts = [STRAIN_BLOB_MAGIC, struct.pack("<I", len(meta_bytes)), meta_bytes]
+    for _, a, sp in pyramid:
+        parts.append(np.asarray(a, dtype="<f4").tobytes())
+        parts.append(np.asarray(sp, dtype="<f4").tobytes())
+    return b"".join(parts)
+
+
+def decode_strain_blob(data: bytes) -> Optional[Dict]:
+    """Inverse of encode_strain_blob; returns None for foreign or corrupt blobs."""
     try:
-        if default_storage.exists(key):
-            with default_storage.open(key, "rb") as fh:
-                data = fh.read()
-                try:
-                    return json.loads(data.decode("utf-8"))
-                except Exception:
-                    # Corrupt JSON → fall through to recompute
-                    pass
+        if data[:4] != STRAIN_BLOB_MAGIC:
+            return None
+        (meta_len,) = struct.unpack_from("<I", data, 4)
+        offset = 8 + meta_len
+        meta = json.loads(data[8:offset].decode("utf-8"))
+        if int(meta.get("version") or 0) != STRAIN_BLOB_VERSION:
+            return None
+        pyramid = []
+        for factor, length in meta["levels"]:
+            a = np.frombuffer(data, dtype="<f4", count=length, offset=offset)
+            offset += 4 * length
+            sp = np.frombuffer(data, dtype="<f4", count=length, offset=offset)
+            offset += 4 * length
+            pyramid.append((int(factor), a, sp))
     except Exception:
-        # Storage access failure → fall through to legacy/compute paths
-        pass
-
-    # Legacy fallback: use DB field if present for nomod and seed S3
-    if mods in (None, ""):
-        legacy = getattr(beatmap, "rosu_timeseries", None)
-        if isinstance(legacy, dict):
-            try:
-                if (
-                    "times_s" in legacy
-                    and "total" in legacy
-                    and int(legacy.get("window_s") or 0) == int(window_seconds)
-                    and int(legacy.get("version") or 0) >= 3
-                ):
-                    try:
-                        default_storage.save(key, ContentFile(json.dumps(legacy).encode("utf-8")))
-                    except Exception:
-                        pass
-                    return legacy
-            except Exception:
-                pass
-
-    storage_name = ensure_osu_file_available(beatmap.beatmap_id)
-    if not storage_name:
         return None
-
+    if not pyramid:
+        return None
+    return {
+        "aim": pyramid[0][1],
+        "speed": pyramid[0][2],
+        "pyramid": pyramid,
+        "section_ms": float(meta["section_ms"]),
+        "stars": float(meta["stars"]),
+        "clock_rate": float(meta["clock_rate"]),
+        "t0_s": float(meta["t0_s"]),
+        "t_end_s": float(meta["t_end_s"]),
+        # Blobs written before mode support are osu!standard
+        "mode": meta.get("mode", "osu"),
+        "labels": meta.get("labels") or {"aim": "Aim", "speed": "Speed"},
+    }
+
+
+def get_or_compute_strains(beatmap, mods: Optional[str] = None, build: bool = True) -> Optional[Dict]:
+    """Load the (beatmap, mods) strain blob from storage, computing and storing it on a miss.
+
+    With build=False a miss returns None without touching the .osu file or rosu. That is
+    the poll path while a compute job writes the blob in the worker, so it skips the
+    process-local negative cache.
+    """
+    key = _timeseries_blob_key(beatmap.beatmap_id, mods)
     try:
-        with default_storage.open(storage_name, "rb") as fh:
-            osu_bytes = fh.read()
+        data = storage.read_bytes(key, use_negative_cache=build)
+        strains = decode_strain_blob(data) if data else None
+        if strains is not None:
+            return strains
     except Exception:
+        # Storage access failure or corrupt blob → fall through to recompute
+        pass
+    if not build:
         return None
 
-    ts = compute_timeseries_from_osu_bytes(
-        osu_bytes,
-        window_seconds=window_seconds,
-        mods=mods,
-    )
-    if ts is None:
+    osu_bytes = read_osu_bytes(beatmap.beatmap_id)
+    if not osu_bytes:
         return None
 
-    # Persist JSON to S3 for all variants (nomod and modded)
+    raw = extract_strains(osu_bytes, mods=mods, mode=getattr(beatmap, "mode", None))
+    if raw is None:
+        return None
+    blob = encode_strain_blob(raw)
     try:
-        try:
-            # Ensure stable key without versioned suffixes when FILE_OVERWRITE=False
-            default_storage.delete(key)
-        except Exception:
-            pass
-        payload = json.dumps(ts, separators=(",", ":")).encode("utf-8")
-        default_storage.save(key, ContentFile(payload))
+        storage.write_bytes(key, blob)
     except Exception:
         # Best-effort persistence; still return the computed value
         pass
-    return ts
+    # Serve exactly what later reads will see (float32 pyramid)
+    return decode_strain_blob(blob)
+
+
+def timeseries_etag(beatmap, window_seconds: int, mods: Optional[str]) -> str:
+    """Deterministic strong ETag for a timeseries response.
+
+    Derived from the beatmap id, mods, window, the blob/output format versions and
+    the beatmap's last_updated, so it can be checked without loading any strains.
+    """
+    last_updated = getattr(beatmap, "last_updated", None)
+    token = ":".join([
+        str(beatmap.beatmap_id),
+        (mods or "").strip().upper() or "NOMOD",
+        str(int(window_seconds)),
+        f"b{STRAIN_BLOB_VERSION}",
+        f"v{TIMESERIES_PAYLOAD_VERSION}",
+        last_updated.isoformat() if last_updated else "",
+    ])
+    return '"' + hashlib.sha1(token.encode("utf-8")).hexdigest() + '"'
+
+
+def timeseries_supported(beatmap) -> bool:
+    return _rosu_mode_name(getattr(beatmap, "mode", None)) is not None
+
+
+def get_or_compute_timeseries(
+    beatmap,
+    window_seconds: int = 5,
+    mods: Optional[str] = None,
+    build: bool = True,
+) -> Optional[Dict]:
+    """Fetch or compute the timeseries for a Beatmap instance.
+
+    All window sizes are sliced from one stored strain blob per (beatmap, mods),
+    so a new window never triggers another rosu run or storage object.
+    With build=False only an already stored blob is used.
+    """
+    if not timeseries_supported(beatmap):
+        return None
+    strains = get_or_compute_strains(beatmap, mods=mods, build=build)
+    if strains is None:
+        return None
+    return bin_strains(strains, max(1, int(window_seconds)))
+
 
+# ----------------------------- PP cache ----------------------------- #
 
+# Process-local memo in front of the BeatmapPPCache table: {key: (expires_at, pp)}
+PP_MEMO_MAX_ENTRIES = 20000
+PP_MEMO_TTL_SECONDS = 3600
+_pp_memo: "OrderedDict[tuple, tuple[float, object]]" = OrderedDict()
+_pp_memo_lock = threading.Lock()
 
 
-def get_or_compute_pp(beatmap, accuracy: float = 100.0, misses: int = 0, lazer: bool = True, mods: Optional[str] = None) -> Optional[float]:
+def _pp_source_version(beatmap) -> str:
+    """Version token for cached PP; changes whenever the beatmap's last_updated does."""
+    last_updated = getattr(beatmap, "last_updated", None)
+    return last_updated.isoformat() if last_updated else ""
+
+
+def _normalize_mods(mods: Optional[str]) -> str:
+    return (mods or "").strip().upper().replace(",", "").replace(" ", "")
+
+
+def _pp_memo_get(key: tuple):
+    with _pp_memo_lock:
+        hit = _pp_memo.get(key)
+        if hit is None:
+            return None
+        if hit[0] < time.monotonic():
+            _pp_memo.pop(key, None)
+            return None
+        _pp_memo.move_to_end(key)
+        return hit[1]
+
+
+def _pp_memo_set(key: tuple, value) -> None:
+    with _pp_memo_lock:
+        _pp_memo[key] = (time.monotonic() + PP_MEMO_TTL_SECONDS, value)
+        _pp_memo.move_to_end(key)
+        while len(_pp_memo) > PP_MEMO_MAX_ENTRIES:
+            _pp_memo.popitem(last=False)
+
+
+def invalidate_pp_cache(beatmap_id: str | int) -> None:
+    """Drop memoized and persisted PP for a beatmap (e.g. after its .osu file changed)."""
+    bid = str(beatmap_id)
+    with _pp_memo_lock:
+        for key in [k for k in _pp_memo if k[0] == bid]:
+            _pp_memo.pop(key, None)
+    try:
+        from ..models import BeatmapPPCache, BeatmapPPCurve
+        BeatmapPPCache.objects.filter(beatmap__beatmap_id=bid).delete()
+        BeatmapPPCurve.objects.filter(beatmap__beatmap_id=bid).delete()
+    except Exception:
+        pass
+
+
+def get_or_compute_pp(
+    beatmap,
+    accuracy: float = 100.0,
+    misses: int = 0,
+    lazer: bool = True,
+    mods: Optional[str] = None,
+    persist: bool = True,
+) -> Optional[float]:
     """Return cached PP if present; otherwise compute with rosu-pp and cache.
 
+    Lookup order: process memo -> BeatmapPPCache row (matching source version) -> rosu.
+    With persist=False a computed value only goes to the bounded process memo.
     Returns None if rosu is unavailable or computation fails.
     """
-    if rosu is None:
+    from ..models import BeatmapPPCache
+
+    mods_key = _normalize_mods(mods)
+    try:
+        acc_centi = int(round(float(accuracy) * 100))
+        misses = max(0, int(misses or 0))
+    except (TypeError, ValueError):
         return None
+    version = _pp_source_version(beatmap)
+    memo_key = (str(beatmap.beatmap_id), version, mods_key, acc_centi, misses, bool(lazer))
+
+    cached_pp = _pp_memo_get(memo_key)
+    if cached_pp is not None:
+        return cached_pp
 
-    # Use cached value if available (only for nomod)
-    if mods is None:
-        cached_pp = getattr(beatmap, 'pp', None)
+    lookup = dict(mods=mods_key, accuracy_centi=acc_centi, misses=misses, lazer=bool(lazer))
+    if getattr(beatmap, "pk", None):
         try:
-            if cached_pp is not None:
-                return float(cached_pp)
+            row = BeatmapPPCache.objects.filter(beatmap_id=beatmap.pk, **lookup).only("pp", "source_version").first()
+            if row is not None and row.source_version == version:
+                _pp_memo_set(memo_key, float(row.pp))
+                return float(row.pp)
         except Exception:
             pass
 
-    storage_name = ensure_osu_file_available(beatmap.beatmap_id)
-    if not storage_name:
+    if rosu is None:
         return None
 
-    try:
-        with default_storage.open(storage_name, "rb") as fh:
-            osu_bytes = fh.read()
+    osu_bytes = read_osu_bytes(beatmap.beatmap_id)
+    if not osu_bytes:
+        return None
 
+    try:
         with tempfile.NamedTemporaryFile(suffix=".osu", delete=True) as tmp:
             tmp.write(osu_bytes)
             tmp.flush()
 
             bm = rosu.Beatmap(path=tmp.name)
-            perf = rosu.Performance(accuracy=accuracy, misses=misses, lazer=lazer, mods=mods)
+            perf = rosu.Performance(accuracy=acc_centi / 100.0, misses=misses, lazer=lazer, mods=mods_key or None)
             attrs = perf.calculate(bm)
             pp_value = getattr(attrs, "pp", None)
             if pp_value is None:
                 return None
-            
-            # Only cache nomod PP
-            if mods is None:
-                try:
-                    beatmap.pp = float(pp_value)
-                    beatmap.save(update_fields=["pp"])
-                except Exception:
-                    # Silent failure to avoid impacting request path
-                    pass
-            return float(pp_value)
     except Exception:
         return None
 
+    pp_value = float(pp_value)
+    _pp_memo_set(memo_key, pp_value)
+    if persist and getattr(beatmap, "pk", None):
+        try:
+            BeatmapPPCache.objects.update_or_create(
+                beatmap_id=beatmap.pk,
+                **lookup,
+                defaults={"pp": pp_value, "source_version": version},
+            )
+        except Exception:
+            # Silent failure to avoid impacting request path
+            pass
+    return pp_value
+
+
+# ----------------------------- PP curves ----------------------------- #
+
+# Grid served by precomputed curves: 90-100% accuracy in 0.5% steps x 0-10 misses
+PP_CURVE_ACC_MIN = 90.0
+PP_CURVE_ACC_STEP = 0.5
+PP_CURVE_ACC_COUNT = 21
+PP_CURVE_MISS_MAX = 10
+PP_CURVE_MODS = ("", "HD", "HR", "DT", "HT", "EZ", "FL")
+
+
+class PPCurve:
+    """Decoded PP grid with bilinear-in-accuracy lookup (misses are exact rows)."""
+
+    __slots__ = ("acc_min", "acc_step", "acc_count", "miss_max", "values")
+
+    def __init__(self, acc_min: float, acc_step: float, acc_count: int, miss_max: int, values: array):
+        self.acc_min = float(acc_min)
+        self.acc_step = float(acc_step)
+        self.acc_count = int(acc_count)
+        self.miss_max = int(miss_max)
+        self.values = values
+
+    @classmethod
+    def from_row(cls, row) -> Optional["PPCurve"]:
+        values = array("f")
+        values.frombytes(bytes(row.data))
+        if sys.byteorder != "little":
+            values.byteswap()
+        if len(values) != row.acc_count * (row.miss_max + 1):
+            return None
+        return cls(row.acc_min, row.acc_step, row.acc_count, row.miss_max, values)
+
+    def to_bytes(self) -> bytes:
+        values = array("f", self.values)
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values.tobytes()
+
+    def pp_at(self, accuracy: float, misses: int) -> Optional[float]:
+        """Interpolated PP, or None when (accuracy, misses) lies outside the grid."""
+        try:
+            misses = int(misses or 0)
+            pos = (float(accuracy) - self.acc_min) / self.acc_step
+        except (TypeError, ValueError):
+            return None
+        if misses < 0 or misses > self.miss_max or pos < -1e-9 or pos > self.acc_count - 1 + 1e-9:
+            return None
+        pos = min(max(pos, 0.0), float(self.acc_count - 1))
+        lo = int(math.floor(pos))
+        hi = min(lo + 1, self.acc_count - 1)
+        frac = pos - lo
+        base = misses * self.acc_count
+        a = self.values[base + lo]
+        b = self.values[base + hi]
+        return float(a + (b - a) * frac)
+
+
+def compute_pp_curve_from_osu_bytes(osu_bytes: bytes, mods: Optional[str] = None, lazer: bool = True) -> Optional[PPCurve]:
+    """Evaluate the full PP grid; difficulty is computed once and reused for every point."""
+    if rosu is None:
+        return None
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".osu", delete=True) as tmp:
+            tmp.write(osu_bytes)
+            tmp.flush()
+            bm = rosu.Beatmap(path=tmp.name)
+            diff_attrs = rosu.Difficulty(mods=mods or None, lazer=lazer).calculate(bm)
+            values = array("f")
+            for misses in range(PP_CURVE_MISS_MAX + 1):
+                for i in range(PP_CURVE_ACC_COUNT):
+                    acc = PP_CURVE_ACC_MIN + i * PP_CURVE_ACC_STEP
+                    perf = rosu.Performance(accuracy=acc, misses=misses, lazer=lazer, mods=mods or None)
+                    values.append(float(getattr(perf.calculate(diff_attrs), "pp", 0.0) or 0.0))
+    except Exception:
+        return None
+    return PPCurve(PP_CURVE_ACC_MIN, PP_CURVE_ACC_STEP, PP_CURVE_ACC_COUNT, PP_CURVE_MISS_MAX, values)
+
+
+def get_pp_curve(beatmap, mods: Optional[str] = None, lazer: bool = True, build: bool = True) -> Optional[PPCurve]:
+    """Return the beatmap's PP curve: process memo -> BeatmapPPCurve row -> rosu (if build)."""
+    from ..models import BeatmapPPCurve
+
+    mods_key = _normalize_mods(mods)
+    version = _pp_source_version(beatmap)
+    memo_key = (str(beatmap.beatmap_id), version, "curve", mods_key, bool(lazer))
+    curve = _pp_memo_get(memo_key)
+    if curve is not None:
+        return curve
+
+    if getattr(beatmap, "pk", None):
+        try:
+            row = BeatmapPPCurve.objects.filter(beatmap_id=beatmap.pk, mods=mods_key, lazer=bool(lazer)).first()
+            if row is not None and row.source_version == version:
+                curve = PPCurve.from_row(row)
+                if curve is not None:
+                    _pp_memo_set(memo_key, curve)
+                    return curve
+        except Exception:
+            pass
+
+    if not build or rosu is None:
+        return None
+    osu_bytes = read_osu_bytes(beatmap.beatmap_id)
+    if not osu_bytes:
+        return None
+    curve = compute_pp_curve_from_osu_bytes(osu_bytes, mods=mods_key, lazer=lazer)
+    if curve is None:
+        return None
+    _pp_memo_set(memo_key, curve)
+    if getattr(beatmap, "pk", None):
+        try:
+            BeatmapPPCurve.objects.update_or_create(
+                beatmap_id=beatmap.pk,
+                mods=mods_key,
+                lazer=bool(lazer),
+                defaults={
+                    "acc_min": curve.acc_min,
+                    "acc_step": curve.acc_step,
+                    "acc_count": curve.acc_count,
+                    "miss_max": curve.miss_max,
+                    "data": curve.to_bytes(),
+                    "source_version": version,
+                },
+            )
+        except Exception:
+            pass
+    return curve
+
+
+def get_pp_for_params(
+    beatmap,
+    accuracy: float = 100.0,
+    misses: int = 0,
+    lazer: bool = True,
+    mods: Optional[str] = None,
+    build: bool = True,
+) -> Optional[float]:
+    """PP for arbitrary accuracy/misses, interpolated from the curve.
+
+    Outside the curve grid, build=True runs rosu for the exact values; those are kept
+    in the bounded process memo only, never as BeatmapPPCache rows. With build=False
+    off-grid values (and missing curves) give None.
+    """
+    curve = get_pp_curve(beatmap, mods=mods, lazer=lazer, build=build)
+    if curve is not None:
+        value = curve.pp_at(accuracy, misses)
+        if value is not None:
+            return value
+    if not build:
+        return None
+    return get_or_compute_pp(beatmap, accuracy=accuracy, misses=misses, lazer=lazer, mods=mods, persist=False)
+
+
+def pp_table_from_stored_curves(beatmaps, accuracy: float = 100.0, misses: int = 0, lazer: bool = True) -> Dict[str, Dict[str, float]]:
+    """Bulk PP for a page of beatmaps from stored curves only (one query, no .osu access).
+
+    Returns {beatmap_id: {"pp_nomod": x, "pp_hd": y, ...}} for beatmaps with fresh curves.
+    """
+    from ..models import BeatmapPPCurve
+
+    by_pk = {bm.pk: bm for bm in beatmaps if getattr(bm, "pk", None)}
+    if not by_pk:
+        return {}
+    out: Dict[str, Dict[str, float]] = {}
+    rows = BeatmapPPCurve.objects.filter(beatmap_id__in=list(by_pk), lazer=bool(lazer), mods__in=PP_CURVE_MODS)
+    for row in rows:
+        bm = by_pk.get(row.beatmap_id)
+        if bm is None or row.source_version != _pp_source_version(bm):
+            continue
+        curve = PPCurve.from_row(row)
+        value = curve.pp_at(accuracy, misses) if curve is not None else None
+        if value is None:
+            continue
+        field = f"pp_{row.mods.lower()}" if row.mods else "pp_nomod"
+        out.setdefault(str(bm.beatmap_id), {})[field] = round(value, 2)
+    return out
+
 
 def get_or_compute_modded_pps(
     beatmap,
@@ -387,7 +772,7 @@ def get_or_compute_modded_pps(
 ) -> Optional[dict]:
     """Compute and cache PP for common single-mod variants.
 
-    Populates the following fields on the Beatmap model (osu!std only):
+    Populates the following fields on the Beatmap model (all modes):
       - pp_nomod, pp_hd, pp_hr, pp_dt, pp_ht, pp_ez, pp_fl
 
     Returns a dict of computed values or None on failure.
@@ -395,23 +780,20 @@ def get_or_compute_modded_pps(
     if rosu is None:
         return None
 
-    # Only compute for osu! standard for now
-    if getattr(beatmap, "mode", None) and str(beatmap.mode).lower() not in ("osu", "standard", "std", "0"):
+    mode = getattr(beatmap, "mode", None)
+    if _rosu_mode_name(mode) is None:
         return None
 
-    storage_name = ensure_osu_file_available(beatmap.beatmap_id)
-    if not storage_name:
+    osu_bytes = read_osu_bytes(beatmap.beatmap_id)
+    if not osu_bytes:
         return None
 
     try:
-        with default_storage.open(storage_name, "rb") as fh:
-            osu_bytes = fh.read()
-
         with tempfile.NamedTemporaryFile(suffix=".osu", delete=True) as tmp:
             tmp.write(osu_bytes)
             tmp.flush()
 
-            bm = rosu.Beatmap(path=tmp.name)
+            bm = _load_rosu_beatmap(tmp.name, mode)
 
             def _calc(mods=None):
                 perf = rosu.Performance(accuracy=accuracy, misses=misses, lazer=lazer, mods=mods)
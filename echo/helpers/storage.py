@@ -0,0 +1,171 @@
+"""Thin access layer over default_storage for small cached artifacts.
+
+Reads are a single optimistic GET: a missing object is a cache miss, not an
+error, so callers never pay for an exists() round trip first. Absent keys are
+remembered briefly in a process-local negative cache, and every operation is
+timed into per-operation counters readable via get_storage_metrics().
+
+On S3 (django-storages) reads go straight to GetObject and writes to a single
+upload, bypassing the HEAD requests that S3File and get_available_name add.
+Other backends use the regular Storage API.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+try:
+    from botocore.exceptions import ClientError
+except Exception:  # pragma: no cover - boto3 is optional outside S3 deployments
+    ClientError = None  # type: ignore
+
+
+# Absent keys are trusted for this long before another remote lookup
+NEGATIVE_CACHE_TTL_SECONDS = 60
+NEGATIVE_CACHE_MAX_ENTRIES = 10000
+
+_S3_MISSING_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def _is_s3(storage) -> bool:
+    return hasattr(storage, "bucket") and hasattr(storage, "_normalize_name")
+
+
+def _is_missing_error(exc: Exception) -> bool:
+    if ClientError is None or not isinstance(exc, ClientError):
+        return False
+    code = str(exc.response.get("Error", {}).get("Code", ""))
+    return code in _S3_MISSING_CODES
+
+
+# ----------------------------- Metrics ----------------------------- #
+
+_metrics: Dict[str, Dict[str, float]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(op: str, elapsed: float, **flags: int) -> None:
+    with _metrics_lock:
+        row = _metrics.setdefault(op, {"count": 0, "errors": 0, "misses": 0, "total_ms": 0.0, "max_ms": 0.0})
+        row["count"] += 1
+        ms = elapsed * 1000.0
+        row["total_ms"] += ms
+        row["max_ms"] = max(row["max_ms"], ms)
+        for key, value in flags.items():
+            row[key] = row.get(key, 0) + value
+
+
+@contextmanager
+def _timed(op: str):
+    started = time.monotonic()
+    flags: Dict[str, int] = {}
+    try:
+        yield flags
+    except Exception:
+        flags["errors"] = flags.get("errors", 0) + 1
+        raise
+    finally:
+        _record(op, time.monotonic() - started, **flags)
+
+
+def get_storage_metrics() -> Dict[str, Dict[str, float]]:
+    """Snapshot of per-operation counters for this process (count, errors, misses, total_ms, max_ms)."""
+    with _metrics_lock:
+        return {op: dict(row) for op, row in _metrics.items()}
+
+
+def reset_storage_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+
+
+# ----------------------------- Negative cache ----------------------------- #
+
+_absent: Dict[str, float] = {}
+_absent_lock = threading.Lock()
+
+
+def _known_absent(name: str) -> bool:
+    with _absent_lock:
+        expires = _absent.get(name)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            _absent.pop(name, None)
+            return False
+        return True
+
+
+def _mark_absent(name: str) -> None:
+    with _absent_lock:
+        if len(_absent) >= NEGATIVE_CACHE_MAX_ENTRIES:
+            _absent.clear()
+        _absent[name] = time.monotonic() + NEGATIVE_CACHE_TTL_SECONDS
+
+
+def _forget_absent(name: str) -> None:
+    with _absent_lock:
+        _absent.pop(name, None)
+
+
+# ----------------------------- Operations ----------------------------- #
+
+def read_bytes(name: str, storage=None, use_negative_cache: bool = True) -> Optional[bytes]:
+    """Return the object's bytes, or None if it does not exist. Other failures raise.
+
+    use_negative_cache=False always asks the backend, e.g. when polling for an object
+    another process is about to write.
+    """
+    storage = storage or default_storage
+    if use_negative_cache and _known_absent(name):
+        _record("read", 0.0, misses=1, negative_hits=1)
+        return None
+    with _timed("read") as flags:
+        try:
+            if _is_s3(storage):
+                key = storage._normalize_name(name)
+                data = storage.bucket.Object(key).get()["Body"].read()
+            else:
+                with storage.open(name, "rb") as fh:
+                    data = fh.read()
+            _forget_absent(name)
+            return data
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            if not _is_missing_error(exc):
+                raise
+        flags["misses"] = 1
+    _mark_absent(name)
+    return None
+
+
+def write_bytes(name: str, data: bytes, storage=None) -> str:
+    """Create or overwrite `name` with `data`; returns the stored name."""
+    storage = storage or default_storage
+    with _timed("write"):
+        if _is_s3(storage):
+            # Direct upload: overwrite in place without get_available_name's HEAD
+            stored = storage._save(name, ContentFile(data))
+        else:
+            try:
+                # Keep a stable name on backends that would otherwise suffix duplicates
+                storage.delete(name)
+            except Exception:
+                pass
+            stored = storage.save(name, ContentFile(data))
+    _forget_absent(name)
+    return stored
+
+
+def delete(name: str, storage=None) -> None:
+    storage = storage or default_storage
+    with _timed("delete"):
+        storage.delete(name)
+    _mark_absent(name)
@@ -0,0 +1,72 @@
+"""Packed bitset index of beatmaps per tag, for tagset intersections.
+
+TagBitsetIndex maps every beatmap of a corpus to a bit position and stores one
+packed bit row per tag, so the beatmaps carrying all tags of a tagset are a
+bitwise AND over a few rows and their number a popcount. This replaces building
+Python sets per tag and intersecting them element by element; support counts for
+hundreds of candidate tagsets stay in the microsecond range.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# Bits set in every byte value (numpy < 2 has no bitwise_count)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class TagBitsetIndex:
+    """Beatmaps per tag as packed bit rows over a shared, sorted beatmap index."""
+
+    __slots__ = ("beatmap_ids", "rows", "_row_by_tag")
+
+    def __init__(self, beatmap_ids: np.ndarray, tag_ids: Sequence[int], rows: np.ndarray):
+        self.beatmap_ids = beatmap_ids
+        self.rows = rows
+        self._row_by_tag: Dict[int, int] = {int(t): i for i, t in enumerate(tag_ids)}
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[int, int]]) -> "TagBitsetIndex":
+        """Build from (beatmap_id, tag_id) pairs; duplicates are harmless."""
+        flat = np.fromiter((int(v) for pair in pairs for v in pair), dtype=np.int64)
+        beatmaps, tags = flat[0::2], flat[1::2]
+        beatmap_ids, columns = np.unique(beatmaps, return_inverse=True)
+        tag_ids, row_idx = np.unique(tags, return_inverse=True)
+        # Set bits in place (np.packbits layout: column j is bit 7 - j % 8 of byte j // 8)
+        rows = np.zeros((len(tag_ids), (len(beatmap_ids) + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(rows, (row_idx, columns >> 3), (0x80 >> (columns & 7)).astype(np.uint8))
+        return cls(beatmap_ids, tag_ids.tolist(), rows)
+
+    @classmethod
+    def from_tag_lists(cls, tags_by_beatmap: Dict[int, Iterable[int]]) -> "TagBitsetIndex":
+        """Build from {beatmap_id: [tag_id, ...]}."""
+        return cls.from_pairs((bm_id, tid) for bm_id, tags in tags_by_beatmap.items() for tid in tags)
+
+    def _intersection(self, tag_ids: Iterable[int]):
+        rows: List[int] = []
+        for tid in tag_ids:
+            row = self._row_by_tag.get(int(tid))
+            if row is None:
+                # A tag without beatmaps empties the whole intersection
+                return None
+            rows.append(row)
+        if not rows:
+            return None
+        return np.bitwise_and.reduce(self.rows[rows], axis=0)
+
+    def count(self, tag_ids: Iterable[int]) -> int:
+        """Number of beatmaps carrying every tag in `tag_ids`."""
+        bits = self._intersection(tag_ids)
+        if bits is None:
+            return 0
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+    def beatmaps(self, tag_ids: Iterable[int]) -> List[int]:
+        """Beatmap ids carrying every tag in `tag_ids`, ascending."""
+        bits = self._intersection(tag_ids)
+        if bits is None:
+            return []
+        hits = np.flatnonzero(np.unpackbits(bits, count=len(self.beatmap_ids)))
+        return self.beatmap_ids[hits].tolist()
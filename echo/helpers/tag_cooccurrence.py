@@ -0,0 +1,361 @@
+"""Precomputed tag co-occurrence for the statistics tag map (TagCooccurrence).
+
+The tag map endpoint needs, per (mode, status_filter) corpus, how many beatmaps
+carry each tag (support) and each pair of tags (co-occurrence). Instead of
+rebuilding these with a Python double loop over every beatmap's tags on every
+request, they are stored as compact int32 arrays: a support vector plus a sparse
+upper-triangle matrix in COO form. Each beatmap's tag list (CSR) is stored next
+to them, so sector assignment reads the same corpus state as the support counts
+without scanning the tag applications. Requests only slice the rows for the tags
+they picked and apply thresholds, kNN and clustering on top.
+
+refresh_tag_cooccurrence() rebuilds the rows (run periodically by the
+refresh_tag_cooccurrence command); record_tag_cooccurrence_change() folds a
+single tag write in after commit. Bulk admin writes (prediction uploads/flushes)
+are picked up by the next periodic refresh.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+STATUS_FILTERS = ('ranked', 'unranked', 'all')
+# Beatmap status buckets (mirrors search.py)
+STATUS_BUCKETS = {
+    'ranked': ['Ranked', 'Approved'],
+    'unranked': ['Graveyard', 'WIP', 'Pending', 'Qualified', 'Loved'],
+}
+
+_INT = '<i4'
+
+
+def tag_map_corpus(mode: str, status_filter: str):
+    """Tag applications the tag map is built from.
+
+    Excludes explicit negatives and "legacy" rows where user is null but not marked prediction;
+    both user-applied and predicted tags are included.
+    """
+    from ..models import TagApplication
+
+    ta = (
+        TagApplication.objects
+        .filter(true_negative=False, tag__mode=mode)
+        .exclude(user__isnull=True, is_prediction=False)
+    )
+    statuses = STATUS_BUCKETS.get(status_filter)
+    if statuses:
+        ta = ta.filter(beatmap__status__in=statuses)
+    return ta
+
+
+def status_filters_for(beatmap_status: Optional[str]) -> List[str]:
+    """Corpora (status filters) a beatmap with this status belongs to."""
+    filters = [name for name, statuses in STATUS_BUCKETS.items() if beatmap_status in statuses]
+    filters.append('all')
+    return filters
+
+
+# ----------------------------- Arrays ----------------------------- #
+
+class CooccurrenceData:
+    """Decoded TagCooccurrence row; arrays are read-only views over the stored bytes."""
+
+    __slots__ = (
+        "mode", "status_filter", "total_maps", "tag_ids", "support", "rows", "cols", "counts",
+        "beatmap_ids", "beatmap_tag_ptr", "beatmap_tags",
+    )
+
+    def __init__(self, mode, status_filter, total_maps, tag_ids, support, rows, cols, counts,
+                 beatmap_ids, beatmap_tag_ptr, beatmap_tags):
+        self.mode = mode
+        self.status_filter = status_filter
+        self.total_maps = int(total_maps)
+        self.tag_ids = tag_ids
+        self.support = support
+        self.rows = rows
+        self.cols = cols
+        self.counts = counts
+        self.beatmap_ids = beatmap_ids
+        self.beatmap_tag_ptr = beatmap_tag_ptr
+        self.beatmap_tags = beatmap_tags
+
+    def top_tags(self, limit: int) -> List[Tuple[int, int]]:
+        """[(tag_id, support)] for the `limit` best-supported tags, highest first."""
+        order = np.argsort(-self.support, kind="stable")[:limit]
+        return [(int(self.tag_ids[i]), int(self.support[i])) for i in order if self.support[i] > 0]
+
+    def pair_arrays(self, tag_ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(lower tag ids, higher tag ids, counts) of the pairs among `tag_ids`, sorted by tag ids."""
+        mask = np.isin(self.tag_ids, np.fromiter(tag_ids, dtype=np.int64))
+        keep = mask[self.rows] & mask[self.cols] & (self.counts > 0)
+        a = self.tag_ids[self.rows[keep]].astype(np.int64)
+        b = self.tag_ids[self.cols[keep]].astype(np.int64)
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        order = np.lexsort((hi, lo))
+        return lo[order], hi[order], self.counts[keep][order].astype(np.int64)
+
+    def pair_counts(self, tag_ids: Iterable[int]) -> Counter:
+        """Co-occurrence counts among `tag_ids` as {(lower tag id, higher tag id): count}."""
+        lo, hi, counts = self.pair_arrays(tag_ids)
+        return Counter({(int(x), int(y)): int(c) for x, y, c in zip(lo, hi, counts)})
+
+    def beatmap_tag_lists(self, tag_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """{beatmap pk: [tag ids]} restricted to `tag_ids`, beatmaps by ascending pk.
+
+        Beatmaps carrying none of `tag_ids` are left out.
+        """
+        mask = np.isin(self.tag_ids, np.fromiter(tag_ids, dtype=np.int64))
+        keep = mask[self.beatmap_tags]
+        owners = np.repeat(np.arange(len(self.beatmap_ids)), np.diff(self.beatmap_tag_ptr))[keep]
+        tags = self.tag_ids[self.beatmap_tags[keep]].tolist()
+        if not len(owners):
+            return {}
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(owners)) + 1, [len(owners)]))
+        bm_ids = self.beatmap_ids[owners[starts[:-1]]].tolist()
+        return {bm: tags[a:b] for bm, a, b in zip(bm_ids, starts[:-1].tolist(), starts[1:].tolist())}
+
+
+def _to_bytes(values) -> bytes:
+    return np.asarray(values, dtype=_INT).tobytes()
+
+
+def _from_bytes(data) -> np.ndarray:
+    return np.frombuffer(bytes(data or b''), dtype=_INT)
+
+
+def _decode(row) -> CooccurrenceData:
+    return CooccurrenceData(
+        row.mode, row.status_filter, row.total_maps,
+        _from_bytes(row.tag_ids), _from_bytes(row.support),
+        _from_bytes(row.pair_rows), _from_bytes(row.pair_cols), _from_bytes(row.pair_counts),
+        _from_bytes(row.beatmap_ids), _from_bytes(row.beatmap_tag_ptr), _from_bytes(row.beatmap_tags),
+    )
+
+
+# ----------------------------- Full build ----------------------------- #
+
+def compute_tag_cooccurrence(mode: str, status_filter: str) -> Dict:
+    """Support vector, sparse co-occurrence matrix and per-beatmap tag lists for one corpus, from scratch."""
+    pairs = (
+        tag_map_corpus(mode, status_filter)
+        .values_list('beatmap_id', 'tag_id')
+        .distinct()
+        .order_by('beatmap_id', 'tag_id')
+    )
+    flat = np.fromiter(
+        (value for pair in pairs.iterator(chunk_size=5000) for value in pair),
+        dtype=np.int64,
+    )
+    beatmaps, tags = flat[0::2], flat[1::2]
+    tag_ids, tag_idx = np.unique(tags, return_inverse=True)
+    n = len(tag_ids)
+    support = np.bincount(tag_idx, minlength=n)
+
+    # Rows are grouped by beatmap with ascending tag ids, so the pair (i, i + d) inside one
+    # beatmap always has the lower tag index first. d runs up to the largest tag count per map.
+    keys = []
+    d = 1
+    while d < len(beatmaps):
+        same = beatmaps[:-d] == beatmaps[d:]
+        if not same.any():
+            break
+        keys.append(tag_idx[:-d][same] * n + tag_idx[d:][same])
+        d += 1
+    if keys:
+        pair_keys, pair_counts = np.unique(np.concatenate(keys), return_counts=True)
+    else:
+        pair_keys = pair_counts = np.zeros(0, dtype=np.int64)
+
+    map_ids, map_sizes = np.unique(beatmaps, return_counts=True)
+    return {
+        'total_maps': int(len(map_ids)),
+        'tag_ids': _to_bytes(tag_ids),
+        'support': _to_bytes(support),
+        'pair_rows': _to_bytes(pair_keys // max(n, 1)),
+        'pair_cols': _to_bytes(pair_keys % max(n, 1)),
+        'pair_counts': _to_bytes(pair_counts),
+        'beatmap_ids': _to_bytes(map_ids),
+        'beatmap_tag_ptr': _to_bytes(np.concatenate(([0], np.cumsum(map_sizes)))),
+        'beatmap_tags': _to_bytes(tag_idx),
+    }
+
+
+def refresh_tag_cooccurrence(modes: Optional[Iterable[str]] = None, status_filters: Optional[Iterable[str]] = None) -> list:
+    """Rebuild and store the rows for the given corpora (all by default); returns them."""
+    from ..models import Tag, TagCooccurrence
+
+    rows = []
+    for mode in (modes or [m for m, _ in Tag.MODE_CHOICES]):
+        for status_filter in (status_filters or STATUS_FILTERS):
+            values = compute_tag_cooccurrence(mode, status_filter)
+            row, _ = TagCooccurrence.objects.update_or_create(
+                mode=mode, status_filter=status_filter,
+                defaults={**values, 'built_at': timezone.now(), 'deltas_since_build': 0},
+            )
+            rows.append(row)
+    return rows
+
+
+def get_tag_cooccurrence(mode: str, status_filter: str) -> CooccurrenceData:
+    """The stored co-occurrence for one corpus, built on first use."""
+    from ..models import TagCooccurrence
+
+    row = TagCooccurrence.objects.filter(mode=mode, status_filter=status_filter).first()
+    if row is None:
+        row = refresh_tag_cooccurrence([mode], [status_filter])[0]
+    return _decode(row)
+
+
+def tag_data_version(mode: str, status_filter: str) -> str:
+    """Changes whenever the stored co-occurrence for a corpus is rebuilt or gets a delta."""
+    from ..models import TagCooccurrence
+
+    row = (
+        TagCooccurrence.objects.filter(mode=mode, status_filter=status_filter)
+        .values_list('pk', 'updated_at').first()
+    )
+    if row is None:
+        return 'none'
+    return f"{row[0]}:{row[1].timestamp():.6f}"
+
+
+# ----------------------------- Incremental deltas ----------------------------- #
+
+def _tag_index(tag_ids: np.ndarray, support: np.ndarray, tag_id: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    hit = np.flatnonzero(tag_ids == tag_id)
+    if len(hit):
+        return tag_ids, support, int(hit[0])
+    # New tags are appended so existing pair indices stay valid
+    return np.append(tag_ids, tag_id), np.append(support, 0), len(tag_ids)
+
+
+def _update_beatmap_tags(data: CooccurrenceData, beatmap_pk: int, t: int, delta: int):
+    """(beatmap ids, ptr, tag indices) with tag index `t` added to or removed from one beatmap."""
+    map_ids = data.beatmap_ids.astype(np.int64)
+    ptr = data.beatmap_tag_ptr.astype(np.int64)
+    tags = data.beatmap_tags.astype(np.int64)
+    if not len(ptr):
+        ptr = np.zeros(1, dtype=np.int64)
+    b = int(np.searchsorted(map_ids, beatmap_pk))
+    present = b < len(map_ids) and map_ids[b] == beatmap_pk
+    if delta > 0:
+        if not present:
+            map_ids = np.insert(map_ids, b, beatmap_pk)
+            ptr = np.insert(ptr, b + 1, ptr[b])
+        segment = tags[ptr[b]:ptr[b + 1]]
+        if t not in segment:
+            tags = np.insert(tags, ptr[b] + int(np.searchsorted(segment, t)), t)
+            ptr[b + 1:] += 1
+    elif present:
+        hit = np.flatnonzero(tags[ptr[b]:ptr[b + 1]] == t)
+        if len(hit):
+            tags = np.delete(tags, ptr[b] + hit[0])
+            ptr[b + 1:] -= 1
+        if ptr[b + 1] == ptr[b]:
+            map_ids = np.delete(map_ids, b)
+            ptr = np.delete(ptr, b + 1)
+    return map_ids, ptr, tags
+
+
+def apply_tag_cooccurrence_delta(
+    mode: str,
+    status_filter: str,
+    beatmap_pk: int,
+    tag_id: int,
+    other_tag_ids: List[int],
+    delta: int,
+    map_delta: int,
+) -> None:
+    """Add `delta` (+1/-1) to one tag's support, its pairs with `other_tag_ids` and the beatmap's tag list."""
+    from ..models import TagCooccurrence
+
+    with transaction.atomic():
+        row = (
+            TagCooccurrence.objects.select_for_update()
+            .filter(mode=mode, status_filter=status_filter).first()
+        )
+        if row is None:
+            # Nothing built yet; the first read builds it from scratch
+            return
+        data = _decode(row)
+        tag_ids, support = data.tag_ids.copy(), data.support.copy()
+        tag_ids, support, t = _tag_index(tag_ids, support, tag_id)
+        support[t] = max(0, support[t] + delta)
+
+        n = 1 << 20  # key packing only; indices are far below this
+        keys = data.rows.astype(np.int64) * n + data.cols
+        counts = data.counts.astype(np.int64)
+        for other in other_tag_ids:
+            tag_ids, support, o = _tag_index(tag_ids, support, other)
+            key = min(t, o) * n + max(t, o)
+            pos = int(np.searchsorted(keys, key))
+            if pos < len(keys) and keys[pos] == key:
+                counts[pos] = max(0, counts[pos] + delta)
+            elif delta > 0:
+                keys = np.insert(keys, pos, key)
+                counts = np.insert(counts, pos, delta)
+        nonzero = counts > 0
+        map_ids, map_ptr, map_tags = _update_beatmap_tags(data, beatmap_pk, t, delta)
+
+        row.total_maps = max(0, row.total_maps + map_delta)
+        row.tag_ids = _to_bytes(tag_ids)
+        row.support = _to_bytes(support)
+        row.pair_rows = _to_bytes(keys[nonzero] // n)
+        row.pair_cols = _to_bytes(keys[nonzero] % n)
+        row.pair_counts = _to_bytes(counts[nonzero])
+        row.beatmap_ids = _to_bytes(map_ids)
+        row.beatmap_tag_ptr = _to_bytes(map_ptr)
+        row.beatmap_tags = _to_bytes(map_tags)
+        row.deltas_since_build += 1
+        row.save()
+
+
+def record_tag_cooccurrence_change(beatmap_pk: int, tag_id: int, true_negative: bool, sign: int) -> None:
+    """Record one tag application create (sign=1) or delete (sign=-1) right after it happened.
+
+    Only writes that add the first or remove the last corpus application of a tag on a
+    beatmap change the matrix. The beatmap's tags are read now, inside the writing
+    transaction; the stored rows are updated on commit.
+    """
+    if true_negative:
+        return
+    from ..models import Beatmap, Tag
+
+    try:
+        mode = Tag.objects.filter(pk=tag_id).values_list('mode', flat=True).first()
+        status = Beatmap.objects.filter(pk=beatmap_pk).values_list('status', flat=True).first()
+        if mode is None:
+            return
+        tags_now = set(
+            tag_map_corpus(mode, 'all')
+            .filter(beatmap_id=beatmap_pk)
+            .values_list('tag_id', flat=True)
+        )
+        rows_now = tag_map_corpus(mode, 'all').filter(beatmap_id=beatmap_pk, tag_id=tag_id).count()
+    except Exception as exc:
+        logger.error(f"Tag co-occurrence delta skipped for beatmap {beatmap_pk}: {exc}")
+        return
+
+    # Presence of the tag on the beatmap only flips on the first add / last removal
+    if (sign > 0 and rows_now != 1) or (sign < 0 and rows_now != 0):
+        return
+    others = sorted(tags_now - {tag_id})
+    map_delta = 0 if others else sign
+
+    def _apply():
+        for status_filter in status_filters_for(status):
+            try:
+                apply_tag_cooccurrence_delta(mode, status_filter, beatmap_pk, tag_id, others, sign, map_delta)
+            except Exception as exc:
+                logger.error(f"Tag co-occurrence delta failed for {mode}/{status_filter}: {exc}")
+
+    transaction.on_commit(_apply)
@@ -0,0 +1,144 @@
+"""Vectorized NPMI / mutual-kNN tag graph for the statistics tag map.
+
+Works on the pair arrays of a stored co-occurrence matrix (helpers.tag_cooccurrence)
+with NumPy only: NPMI is computed for all pairs at once, the top-k neighbors per tag
+come from one lexsort over the directed edge list, and mutual-kNN components come
+from label propagation over the kept edges. SciPy is not a dependency, so the
+sparse graph routines are written directly against NumPy arrays.
+
+Results match the former per-pair Python loops up to tie order: neighbor lists are
+ordered by (NPMI, co-occurrence) descending, then by the pairs sorted by (lower,
+higher) tag id rather than the old dict iteration order, and components keep the
+order of the picked tags. Equal-weight ties can therefore resolve differently, which
+can change the overlap view's set count by a few sets.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+NPMI_EPS = 1e-12
+
+Neighbors = Dict[int, List[Tuple[int, float, int]]]
+
+
+def npmi_top_neighbors(
+    pairs: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    tag_support: Dict[int, int],
+    total_maps: int,
+    min_pair: int,
+    edge_threshold: float,
+    k: int,
+) -> Neighbors:
+    """{tag: [(other tag, npmi, co-occurrence)]} with at most `k` neighbors per tag.
+
+    `pairs` is (lower ids, higher ids, counts) sorted by (lower, higher), as returned
+    by CooccurrenceData.pair_arrays(). Edges need `min_pair` co-occurrences and an
+    NPMI of at least `edge_threshold`.
+    """
+    lo, hi, counts = pairs
+    if not len(lo) or total_maps <= 0:
+        return {}
+    support_ids = np.fromiter(tag_support.keys(), dtype=np.int64)
+    support_vals = np.fromiter(tag_support.values(), dtype=np.float64)
+    order = np.argsort(support_ids)
+    support_ids, support_vals = support_ids[order], support_vals[order]
+
+    def _support(ids):
+        pos = np.clip(np.searchsorted(support_ids, ids), 0, len(support_ids) - 1)
+        return np.where(support_ids[pos] == ids, support_vals[pos], 0.0)
+
+    ca, cb = _support(lo), _support(hi)
+    keep = (counts >= min_pair) & (ca > 0) & (cb > 0)
+    lo, hi, counts, ca, cb = lo[keep], hi[keep], counts[keep], ca[keep], cb[keep]
+
+    # PMI = log( P(a,b) / (P(a)P(b)) ); NPMI = PMI / -log(P(a,b))
+    total = float(total_maps)
+    pab = counts / total
+    pmi = np.log((pab + NPMI_EPS) / ((ca / total) * (cb / total) + NPMI_EPS))
+    denom = -np.log(pab + NPMI_EPS)
+    npmi = np.where(denom > 0, pmi / np.where(denom > 0, denom, 1.0), 0.0)
+    edge = (pab > 0) & (npmi >= edge_threshold)
+    lo, hi, counts, npmi = lo[edge], hi[edge], counts[edge], npmi[edge]
+    if not len(lo):
+        return {}
+
+    # Directed edges in visiting order: pair p adds lo->hi (2p) and hi->lo (2p + 1)
+    n = len(lo)
+    src = np.concatenate((lo, hi))
+    dst = np.concatenate((hi, lo))
+    weight = np.concatenate((npmi, npmi))
+    cooc = np.concatenate((counts, counts))
+    visit = np.concatenate((np.arange(n) * 2, np.arange(n) * 2 + 1))
+
+    # Per source: NPMI desc, co-occurrence desc, visiting order; then keep the first k
+    order = np.lexsort((visit, -cooc, -weight, src))
+    src, dst, weight, cooc, visit = src[order], dst[order], weight[order], cooc[order], visit[order]
+    starts = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+    lengths = np.diff(np.r_[starts, len(src)])
+
+    # Tags in the order they first gained an edge
+    first_visit = np.minimum.reduceat(visit, starts)
+    top: Neighbors = {}
+    for group in np.argsort(first_visit, kind='stable'):
+        start = starts[group]
+        stop = start + min(int(lengths[group]), max(k, 0))
+        if stop <= start:
+            continue
+        top[int(src[start])] = [
+            (int(o), float(w), int(c))
+            for o, w, c in zip(dst[start:stop], weight[start:stop], cooc[start:stop])
+        ]
+    return top
+
+
+def mutual_knn_components(
+    tag_ids: Sequence[int],
+    top: Neighbors,
+    tag_support: Dict[int, int],
+) -> List[List[int]]:
+    """Connected components of the mutual-kNN graph, largest total support first.
+
+    Members keep the order of `tag_ids`; tags without mutual edges are singletons.
+    """
+    ids = np.asarray(list(tag_ids), dtype=np.int64)
+    if not len(ids):
+        return []
+    sorter = np.argsort(ids)
+
+    def _index(values):
+        return sorter[np.searchsorted(ids, values, sorter=sorter)]
+
+    src_ids = np.fromiter((a for a, lst in top.items() for _ in lst), dtype=np.int64)
+    dst_ids = np.fromiter((b for lst in top.values() for b, _, _ in lst), dtype=np.int64)
+    known = np.isin(src_ids, ids) & np.isin(dst_ids, ids)
+    src, dst = _index(src_ids[known]), _index(dst_ids[known])
+
+    # An edge is mutual when the reverse direction was kept as well
+    m = len(ids)
+    keys = src * m + dst
+    mutual = np.isin(dst * m + src, keys)
+    src, dst = src[mutual], dst[mutual]
+
+    # Label propagation with pointer jumping: each tag ends up labelled by the
+    # smallest index in its component
+    labels = np.arange(m)
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, src, labels[dst])
+        np.minimum.at(labels, dst, labels[src])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+
+    # Components ordered by their first member, then stably by total support
+    comps: Dict[int, List[int]] = {}
+    for idx, label in enumerate(labels):
+        comps.setdefault(int(label), []).append(int(ids[idx]))
+    return sorted(
+        comps.values(),
+        key=lambda comp: sum(int(tag_support.get(t) or 0) for t in comp),
+        reverse=True,
+    )
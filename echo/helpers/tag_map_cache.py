@@ -0,0 +1,105 @@
+"""Process-local response cache for the statistics tag map endpoint.
+
+The tag map output depends only on its normalized parameters and the tag data,
+so responses are cached per canonical parameter tuple and tagged with the tag
+data version (see tag_cooccurrence.tag_data_version); a version bump makes every
+older entry a miss. Concurrent requests for the same missing entry share one
+computation (single flight), and the cache is bounded by entry count and by the
+total bytes of payloads and keys (custom tagsets put free text in the key),
+evicting least recently used entries first. Entries also expire after a TTL, so
+writes that do not bump the version (bulk prediction uploads) still show up.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+TAG_MAP_CACHE_MAX_BYTES = 32 * 1024 * 1024
+TAG_MAP_CACHE_MAX_ENTRIES = 1024
+# Larger entries (payload plus key) are served but not kept
+TAG_MAP_CACHE_MAX_ENTRY_BYTES = 2 * 1024 * 1024
+TAG_MAP_CACHE_TTL_SECONDS = 15 * 60
+# How long a request waits for another thread computing the same entry
+SINGLE_FLIGHT_WAIT_SECONDS = 30
+
+# key -> (version, expires, content, cost in bytes), least recently used first
+_entries: "OrderedDict[Hashable, Tuple[str, float, bytes, int]]" = OrderedDict()
+_size = 0
+_lock = threading.Lock()
+_inflight: Dict[Tuple[Hashable, str], threading.Event] = {}
+
+
+def _lookup(key: Hashable, version: str):
+    entry = _entries.get(key)
+    if entry is None:
+        return None
+    entry_version, expires, content, _ = entry
+    if entry_version != version or expires < time.monotonic():
+        _discard(key)
+        return None
+    _entries.move_to_end(key)
+    return content
+
+
+def _discard(key: Hashable) -> None:
+    global _size
+    entry = _entries.pop(key, None)
+    if entry is not None:
+        _size -= entry[3]
+
+
+def _store(key: Hashable, version: str, content: bytes) -> None:
+    global _size
+    _discard(key)
+    cost = len(content) + len(repr(key).encode('utf-8'))
+    if cost > TAG_MAP_CACHE_MAX_ENTRY_BYTES:
+        return
+    _entries[key] = (version, time.monotonic() + TAG_MAP_CACHE_TTL_SECONDS, content, cost)
+    _size += cost
+    while (_size > TAG_MAP_CACHE_MAX_BYTES or len(_entries) > TAG_MAP_CACHE_MAX_ENTRIES) and _entries:
+        _discard(next(iter(_entries)))
+
+
+def get_or_build_tag_map(key: Hashable, version: str, build: Callable[[], bytes]) -> bytes:
+    """Cached response bytes for `key` at `version`, building them at most once at a time."""
+    flight = (key, version)
+    while True:
+        with _lock:
+            content = _lookup(key, version)
+            if content is not None:
+                return content
+            event = _inflight.get(flight)
+            leader = event is None
+            if leader:
+                event = _inflight[flight] = threading.Event()
+        if leader:
+            break
+        if not event.wait(SINGLE_FLIGHT_WAIT_SECONDS):
+            # The computing thread is stuck; answer this request without caching
+            return build()
+        # The leader finished (or failed): look again
+
+    try:
+        content = build()
+        with _lock:
+            _store(key, version, content)
+        return content
+    finally:
+        with _lock:
+            _inflight.pop(flight, None)
+        event.set()
+
+
+def tag_map_cache_stats() -> Dict[str, int]:
+    with _lock:
+        return {'entries': len(_entries), 'bytes': _size, 'inflight': len(_inflight)}
+
+
+def clear_tag_map_cache() -> None:
+    global _size
+    with _lock:
+        _entries.clear()
+        _size = 0
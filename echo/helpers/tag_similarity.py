@@ -0,0 +1,245 @@
+"""Tag-vector similarity index over beatmaps (TagEmbeddingIndex).
+
+Every beatmap of a tag mode is embedded as a TF-IDF vector over that mode's tags:
+the term frequency of a tag is its number of applications on the map, with
+predicted applications counting 0.5 like in the search tag_weight, and the IDF
+down-weights tags carried by most of the corpus. Vectors are L2-normalized, so
+cosine similarity is a dot product. The vectors stay sparse: entries are kept
+grouped by tag, and a query only walks the entries of its own non-zero tags,
+so scores are exact without a dense (beatmaps x tags) matrix.
+
+refresh_tag_embeddings() rebuilds the stored rows (run periodically by the
+refresh_tag_embeddings command). Query vectors are built from the current tags
+of the seed beatmaps with the stored IDF, so a freshly tagged seed still works
+before the next rebuild.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.utils import timezone
+
+from .tag_cooccurrence import tag_map_corpus
+
+# Predicted applications count half (p_w in the search tag_weight)
+PREDICTED_WEIGHT = 0.5
+
+_INT = '<i4'
+_FLOAT = '<f4'
+
+
+def _to_bytes(values, dtype=_INT) -> bytes:
+    return np.asarray(values, dtype=dtype).tobytes()
+
+
+def _from_bytes(data, dtype=_INT) -> np.ndarray:
+    return np.frombuffer(bytes(data or b''), dtype=dtype)
+
+
+# ----------------------------- Index ----------------------------- #
+
+class TagEmbeddings:
+    """Decoded TagEmbeddingIndex row; the sparse vectors are kept column-wise (by tag).
+
+    col_ptr[c]:col_ptr[c + 1] slices col_rows / col_weights to the entries of tag column c.
+    """
+
+    __slots__ = ("mode", "version", "beatmap_ids", "tag_ids", "idf", "col_ptr", "col_rows", "col_weights", "_col_by_tag")
+
+    def __init__(self, mode, version, beatmap_ids, tag_ids, idf, col_ptr, col_rows, col_weights):
+        self.mode = mode
+        self.version = version
+        self.beatmap_ids = beatmap_ids
+        self.tag_ids = tag_ids
+        self.idf = idf
+        self.col_ptr = col_ptr
+        self.col_rows = col_rows
+        self.col_weights = col_weights
+        self._col_by_tag: Dict[int, int] = {int(t): i for i, t in enumerate(tag_ids)}
+
+    def query_vector(self, tag_weights: Dict[int, float]) -> Optional[np.ndarray]:
+        """Normalized TF-IDF vector for {tag_id: term frequency}; None without known tags."""
+        vector = np.zeros(len(self.tag_ids), dtype=np.float32)
+        for tag_id, tf in tag_weights.items():
+            col = self._col_by_tag.get(int(tag_id))
+            if col is not None:
+                vector[col] += float(tf) * self.idf[col]
+        norm = float(np.linalg.norm(vector))
+        if norm <= 0:
+            return None
+        return vector / norm
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every beatmap to `query`, from the entries of its non-zero tags."""
+        cols = np.flatnonzero(query)
+        starts, ends = self.col_ptr[cols], self.col_ptr[cols + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.zeros(len(self.beatmap_ids), dtype=np.float64)
+        # Entry positions of all selected columns, and the column each one belongs to
+        owner = np.repeat(np.arange(len(cols)), lengths)
+        positions = starts[owner] + (np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+        weights = self.col_weights[positions].astype(np.float64) * query[cols][owner]
+        return np.bincount(self.col_rows[positions], weights=weights, minlength=len(self.beatmap_ids))
+
+    def top_k(
+        self,
+        query: np.ndarray,
+        k: int,
+        candidates: Optional[Iterable[int]] = None,
+        exclude: Iterable[int] = (),
+    ) -> List[Tuple[int, float]]:
+        """[(beatmap pk, cosine similarity)] of the `k` most similar beatmaps, best first.
+
+        `candidates` restricts the search to these beatmap pks (prefiltering);
+        only maps with a positive score are returned and ties go to the lower pk.
+        """
+        if k <= 0 or not len(self.beatmap_ids):
+            return []
+        scores = self.scores(query)
+        if candidates is not None:
+            wanted = np.fromiter((int(c) for c in candidates), dtype=np.int64)
+            scores[~np.isin(self.beatmap_ids, wanted)] = -np.inf
+        excluded = np.fromiter((int(e) for e in exclude), dtype=np.int64)
+        if len(excluded):
+            scores[np.isin(self.beatmap_ids, excluded)] = -np.inf
+
+        # Maps sharing no tag with the query score 0 and are not similar at all
+        rows = np.flatnonzero(scores > 0)
+        if len(rows) > k:
+            # Keep the top k plus ties at the cut, then order exactly
+            cut = np.partition(scores[rows], len(rows) - k)[len(rows) - k]
+            rows = rows[scores[rows] >= cut]
+        # beatmap_ids ascend with the row, so the row breaks ties by lower pk
+        order = np.lexsort((rows, -scores[rows]))[:k]
+        return [(int(self.beatmap_ids[r]), float(scores[r])) for r in rows[order]]
+
+
+# ----------------------------- Build ----------------------------- #
+
+def _tag_frequencies(mode: str, beatmap_ids: Optional[Sequence[int]] = None):
+    """(beatmap pks, tag ids, term frequencies) per distinct (beatmap, tag) of the corpus."""
+    rows = tag_map_corpus(mode, 'all')
+    if beatmap_ids is not None:
+        rows = rows.filter(beatmap_id__in=list(beatmap_ids))
+    flat = np.fromiter(
+        (
+            value
+            for bm_id, tag_id, user_id in rows.values_list('beatmap_id', 'tag_id', 'user_id').order_by().iterator(chunk_size=5000)
+            for value in (bm_id, tag_id, 0 if user_id is None else 1)
+        ),
+        dtype=np.int64,
+    )
+    beatmaps, tags, human = flat[0::3], flat[1::3], flat[2::3]
+    weights = np.where(human == 1, 1.0, PREDICTED_WEIGHT)
+    if not len(beatmaps):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float64)
+    span = int(tags.max()) + 1
+    keys, inverse = np.unique(beatmaps * span + tags, return_inverse=True)
+    return keys // span, keys % span, np.bincount(inverse, weights=weights)
+
+
+def compute_tag_embeddings(mode: str) -> Dict:
+    """Sparse normalized TF-IDF vectors for every beatmap of one tag mode, from scratch."""
+    bm_of, tag_of, tf = _tag_frequencies(mode)
+    beatmap_ids, rows = np.unique(bm_of, return_inverse=True)
+    tag_ids, cols = np.unique(tag_of, return_inverse=True)
+
+    # Smoothed IDF: tags on every map still keep a small positive weight
+    df = np.bincount(cols, minlength=len(tag_ids))
+    idf = np.log((1.0 + len(beatmap_ids)) / (1.0 + df)) + 1.0
+    weights = tf * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(beatmap_ids)))
+    weights = weights / np.where(norms > 0, norms, 1.0)[rows]
+
+    return {
+        'beatmap_ids': _to_bytes(beatmap_ids),
+        'tag_ids': _to_bytes(tag_ids),
+        'idf': _to_bytes(idf, _FLOAT),
+        'entry_rows': _to_bytes(rows),
+        'entry_cols': _to_bytes(cols),
+        'entry_weights': _to_bytes(weights, _FLOAT),
+    }
+
+
+def refresh_tag_embeddings(modes: Optional[Iterable[str]] = None) -> list:
+    """Rebuild and store the index rows for the given tag modes (all by default); returns them."""
+    from ..models import Tag, TagEmbeddingIndex
+
+    rows = []
+    for mode in (modes or [m for m, _ in Tag.MODE_CHOICES]):
+        row, _ = TagEmbeddingIndex.objects.update_or_create(
+            mode=mode, defaults={**compute_tag_embeddings(mode), 'built_at': timezone.now()},
+        )
+        rows.append(row)
+    return rows
+
+
+def _decode(row) -> TagEmbeddings:
+    beatmap_ids = _from_bytes(row.beatmap_ids).astype(np.int64)
+    tag_ids = _from_bytes(row.tag_ids).astype(np.int64)
+    entry_cols = _from_bytes(row.entry_cols)
+    by_col = np.argsort(entry_cols, kind='stable')
+    col_ptr = np.zeros(len(tag_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(entry_cols, minlength=len(tag_ids)), out=col_ptr[1:])
+    return TagEmbeddings(
+        row.mode, row.updated_at, beatmap_ids, tag_ids, _from_bytes(row.idf, _FLOAT),
+        col_ptr, _from_bytes(row.entry_rows)[by_col], _from_bytes(row.entry_weights, _FLOAT)[by_col],
+    )
+
+
+# Decoded indexes per mode, replaced when the stored row changes
+_loaded: Dict[str, TagEmbeddings] = {}
+_loaded_lock = threading.Lock()
+
+
+def get_tag_embeddings(mode: str) -> TagEmbeddings:
+    """The index for one tag mode, built on first use and decoded once per stored version."""
+    from ..models import TagEmbeddingIndex
+
+    version = TagEmbeddingIndex.objects.filter(mode=mode).values_list('updated_at', flat=True).first()
+    with _loaded_lock:
+        cached = _loaded.get(mode)
+        if cached is not None and version is not None and cached.version == version:
+            return cached
+    row = TagEmbeddingIndex.objects.filter(mode=mode).first()
+    if row is None:
+        row = refresh_tag_embeddings([mode])[0]
+    embeddings = _decode(row)
+    with _loaded_lock:
+        _loaded[mode] = embeddings
+    return embeddings
+
+
+# ----------------------------- Queries ----------------------------- #
+
+def beatmaps_query_vector(embeddings: TagEmbeddings, beatmap_ids: Sequence[int]) -> Optional[np.ndarray]:
+    """Normalized mean of the beatmaps' current tag vectors (one beatmap: its own vector)."""
+    bm_of, tag_of, tf = _tag_frequencies(embeddings.mode, beatmap_ids)
+    total = np.zeros(len(embeddings.tag_ids), dtype=np.float32)
+    for bm_id in np.unique(bm_of):
+        mask = bm_of == bm_id
+        vector = embeddings.query_vector(dict(zip(tag_of[mask].tolist(), tf[mask].tolist())))
+        if vector is not None:
+            total += vector
+    norm = float(np.linalg.norm(total))
+    return total / norm if norm > 0 else None
+
+
+def similar_beatmaps(
+    mode: str,
+    beatmap_ids: Sequence[int],
+    k: int,
+    candidates: Optional[Iterable[int]] = None,
+    exclude_seeds: bool = True,
+) -> List[Tuple[int, float]]:
+    """[(beatmap pk, cosine similarity)] of the `k` beatmaps closest to the given seed beatmaps."""
+    embeddings = get_tag_embeddings(mode)
+    query = beatmaps_query_vector(embeddings, beatmap_ids)
+    if query is None:
+        return []
+    return embeddings.top_k(query, k, candidates=candidates, exclude=beatmap_ids if exclude_seeds else ())
@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...fetch_genre import (
+    claim_due_entries,
+    enqueue_genre_lookup,
+    normalize_genre_key,
+    process_genre_entry,
+)
+from ...models import Beatmap, GenreCacheEntry
+
+
+class Command(BaseCommand):
+    help = 'Fill the genre cache from Last.fm/MusicBrainz and apply results to beatmaps.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=50,
+                            help='Entries claimed per iteration.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Concurrent lookups (upstream rate limits still apply).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, polling for new work.')
+        parser.add_argument('--interval', type=float, default=15.0,
+                            help='Seconds to sleep when the queue is empty (with --loop).')
+        parser.add_argument('--backfill', action='store_true',
+                            help='Enqueue lookups for beatmaps that have no genres and no cache entry.')
+
+    def handle(self, *args, **options):
+        batch = max(1, int(options['batch']))
+        workers = max(1, int(options['workers']))
+
+        if options['backfill']:
+            enqueued = self._backfill()
+            self.stdout.write(self.style.SUCCESS(f'Enqueued {enqueued} genre lookups.'))
+
+        processed = 0
+        found = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                entries = claim_due_entries(limit=batch)
+                if not entries:
+                    if not options['loop']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['interval'])
+                    continue
+                for genres in pool.map(self._process, entries):
+                    processed += 1
+                    if genres:
+                        found += 1
+                self.stdout.write(f'Processed {processed} entries ({found} with genres)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Genre enrichment finished: processed={processed}, found={found}'
+        ))
+
+    @staticmethod
+    def _process(entry):
+        try:
+            return process_genre_entry(entry)
+        finally:
+            close_old_connections()
+
+    def _backfill(self):
+        known = set(GenreCacheEntry.objects.values_list('artist_key', 'title_key'))
+        enqueued = 0
+        qs = (
+            Beatmap.objects
+            .filter(genres__isnull=True)
+            .values_list('artist', 'title')
+            .distinct()
+        )
+        for artist, title in qs.iterator(chunk_size=2000):
+            key = (normalize_genre_key(artist), normalize_genre_key(title))
+            if not key[0] or key in known:
+                continue
+            enqueue_genre_lookup(artist, title)
+            known.add(key)
+            enqueued += 1
+        return enqueued
@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+from array import array
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...models import Beatmap, Tag, TagApplication
+
+
+FEATURE_FIELDS = (
+    'bpm', 'ar', 'cs', 'drain', 'accuracy', 'difficulty_rating',
+    'total_length', 'max_combo',
+    'pp_nomod', 'pp_hd', 'pp_hr', 'pp_dt', 'pp_ht', 'pp_ez', 'pp_fl',
+)
+
+MODE_CHOICES = ('osu', 'taiko', 'fruits', 'mania')
+
+# Flush buffered column values to disk once this many entries are pending
+FLUSH_EVERY = 65536
+
+
+class _ColumnWriter:
+    """Append-only typed column written as raw native-endian values."""
+
+    def __init__(self, path, typecode):
+        self.path = path
+        self.typecode = typecode
+        self.count = 0
+        self._buf = array(typecode)
+        self._fh = open(path, 'wb')
+
+    def append(self, value):
+        self._buf.append(value)
+        if len(self._buf) >= FLUSH_EVERY:
+            self.flush()
+
+    def extend(self, values):
+        self._buf.extend(values)
+        if len(self._buf) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            self._buf.tofile(self._fh)
+            self.count += len(self._buf)
+            self._buf = array(self.typecode)
+
+    def close(self):
+        self.flush()
+        self._fh.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Export the beatmap x tag matrix (CSR) and dense beatmap features as raw '
+        'columnar files plus a JSON manifest, suitable for numpy.memmap.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='exports/tag_matrix',
+                            help='Output directory (created if missing).')
+        parser.add_argument('--mode', choices=MODE_CHOICES, default=None,
+                            help='Only export beatmaps (and tags) of this game mode.')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows fetched per database round-trip.')
+
+    def handle(self, *args, **options):
+        out_dir = options['output']
+        mode = options['mode']
+        chunk_size = max(100, int(options['chunk_size'] or 5000))
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+        except OSError as exc:
+            raise CommandError(f'Cannot create output directory {out_dir}: {exc}')
+
+        def _path(name):
+            return os.path.join(out_dir, name)
+
+        # ── Columns: tags ordered by id ──
+        tag_qs = Tag.objects.order_by('id')
+        if mode:
+            tag_qs = tag_qs.filter(mode=Tag.normalize_mode(mode))
+        tags = list(tag_qs.values('id', 'name', 'mode'))
+        col_of = {t['id']: i for i, t in enumerate(tags)}
+
+        # ── Rows: beatmaps ordered by pk, streamed straight into the feature matrix ──
+        bm_qs = Beatmap.objects.order_by('id')
+        if mode:
+            bm_qs = bm_qs.filter(mode=mode)
+
+        row_of = {}
+        row_ids = _ColumnWriter(_path('row_ids.bin'), 'q')
+        row_beatmap_ids = _ColumnWriter(_path('row_beatmap_ids.bin'), 'q')
+        features = _ColumnWriter(_path('features.bin'), 'f')
+        nan = float('nan')
+        for values in bm_qs.values_list('id', 'beatmap_id', *FEATURE_FIELDS).iterator(chunk_size=chunk_size):
+            pk, beatmap_id = values[0], values[1]
+            row_of[pk] = len(row_of)
+            row_ids.append(pk)
+            try:
+                row_beatmap_ids.append(int(beatmap_id))
+            except (TypeError, ValueError):
+                row_beatmap_ids.append(-1)
+            features.extend(nan if v is None else float(v) for v in values[2:])
+        for w in (row_ids, row_beatmap_ids, features):
+            w.close()
+        n_rows = len(row_of)
+
+        # ── CSR: one entry per (beatmap, tag) pair with per-kind counts ──
+        # Applications are streamed pre-sorted by (beatmap, tag), which is both the
+        # row order and the column order, so entries can be appended directly.
+        indices = _ColumnWriter(_path('indices.bin'), 'i')
+        user_counts = _ColumnWriter(_path('user_count.bin'), 'i')
+        predicted_counts = _ColumnWriter(_path('predicted_count.bin'), 'i')
+        predicted = _ColumnWriter(_path('predicted_confidence.bin'), 'f')
+        true_negatives = _ColumnWriter(_path('true_negative_count.bin'), 'i')
+        row_nnz = array('q', bytes(8 * n_rows))
+
+        app_qs = (
+            TagApplication.objects
+            .order_by('beatmap_id', 'tag_id')
+            .values_list('beatmap_id', 'tag_id', 'user_id', 'is_prediction',
+                         'true_negative', 'prediction_confidence')
+        )
+        if mode:
+            app_qs = app_qs.filter(beatmap__mode=mode)
+
+        current = None
+        acc = [0, 0, 0.0, 0]
+
+        def _emit(key, acc):
+            row, col = key
+            row_nnz[row] += 1
+            indices.append(col)
+            user_counts.append(acc[0])
+            predicted_counts.append(acc[1])
+            predicted.append(acc[2])
+            true_negatives.append(acc[3])
+
+        skipped = 0
+        for bm_pk, tag_pk, user_id, is_pred, is_tn, conf in app_qs.iterator(chunk_size=chunk_size):
+            row = row_of.get(bm_pk)
+            col = col_of.get(tag_pk)
+            if row is None or col is None:
+                skipped += 1
+                continue
+            key = (row, col)
+            if key != current:
+                if current is not None:
+                    _emit(current, acc)
+                current = key
+                acc = [0, 0, 0.0, 0]
+            if is_tn:
+                acc[3] += 1
+            elif is_pred:
+                # Predictions carry a confidence; keep the strongest one
+                acc[1] += 1
+                acc[2] = max(acc[2], float(conf or 0.0))
+            elif user_id is not None:
+                acc[0] += 1
+        if current is not None:
+            _emit(current, acc)
+        for w in (indices, user_counts, predicted_counts, predicted, true_negatives):
+            w.close()
+
+        indptr = array('q', [0])
+        total = 0
+        for n in row_nnz:
+            total += n
+            indptr.append(total)
+        with open(_path('indptr.bin'), 'wb') as fh:
+            indptr.tofile(fh)
+
+        dtype_prefix = '<' if sys.byteorder == 'little' else '>'
+
+        def _spec(name, dtype, shape):
+            return {'path': name, 'dtype': f'{dtype_prefix}{dtype}', 'shape': shape}
+
+        nnz = indices.count
+        manifest = {
+            'format': 'echo-tag-matrix',
+            'version': 1,
+            'created_at': timezone.now().isoformat(),
+            'mode': mode,
+            'shape': [n_rows, len(tags)],
+            'nnz': nnz,
+            'arrays': {
+                'indptr': _spec('indptr.bin', 'i8', [n_rows + 1]),
+                'indices': _spec('indices.bin', 'i4', [nnz]),
+                'user_count': _spec('user_count.bin', 'i4', [nnz]),
+                'predicted_count': _spec('predicted_count.bin', 'i4', [nnz]),
+                'predicted_confidence': _spec('predicted_confidence.bin', 'f4', [nnz]),
+                'true_negative_count': _spec('true_negative_count.bin', 'i4', [nnz]),
+                'features': _spec('features.bin', 'f4', [n_rows, len(FEATURE_FIELDS)]),
+                'row_ids': _spec('row_ids.bin', 'i8', [n_rows]),
+                'row_beatmap_ids': _spec('row_beatmap_ids.bin', 'i8', [n_rows]),
+            },
+            'feature_names': list(FEATURE_FIELDS),
+            'columns': tags,
+        }
+        with open(_path('manifest.json'), 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported tag matrix to {out_dir}: rows={n_rows}, tags={len(tags)}, '
+            f'nnz={nnz}, skipped={skipped}'
+        ))
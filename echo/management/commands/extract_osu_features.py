@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from ...helpers.osu_features import update_beatmap_features
+from ...models import Beatmap
+
+
+class Command(BaseCommand):
+    help = 'Extract search features (density, streams, jumps, peak strains) from stored .osu files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('beatmap_ids', nargs='*',
+                            help='Limit to these osu! beatmap ids (default: all).')
+        parser.add_argument('--mode', default=None,
+                            help='Only beatmaps of this mode (osu, taiko, fruits, mania).')
+        parser.add_argument('--status', default=None,
+                            help='Only beatmaps with this status (e.g. Ranked).')
+        parser.add_argument('--force', action='store_true',
+                            help='Recompute rows that are already current.')
+
+    def handle(self, *args, **options):
+        qs = Beatmap.objects.order_by('id')
+        if options['beatmap_ids']:
+            qs = qs.filter(beatmap_id__in=[str(b) for b in options['beatmap_ids']])
+        if options['mode']:
+            qs = qs.filter(mode=options['mode'])
+        if options['status']:
+            qs = qs.filter(status=options['status'])
+
+        done = 0
+        failed = 0
+        for beatmap in qs.only('id', 'beatmap_id', 'mode', 'last_updated').iterator(chunk_size=500):
+            try:
+                row = update_beatmap_features(beatmap, force=options['force'])
+            except Exception as exc:
+                self.stderr.write(f'Beatmap {beatmap.beatmap_id}: {exc}')
+                row = None
+            if row is not None:
+                done += 1
+            else:
+                failed += 1
+            if (done + failed) % 100 == 0:
+                self.stdout.write(f'Processed {done + failed} beatmaps')
+
+        self.stdout.write(self.style.SUCCESS(f'Features ready: ok={done}, failed={failed}'))
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from ...models import Tag, TagApplication
+from ...models import Beatmap, Tag, TagApplication
 
 
 class Command(BaseCommand):
@@ -52,11 +52,11 @@ class Command(BaseCommand):
                 if conflict:
                     app.delete()
                     deleted_apps += 1
-                    continue
-
-                app.tag = new_tag
-                app.save(update_fields=['tag'])
-                reassigned += 1
+                else:
+                    app.tag = new_tag
+                    app.save(update_fields=['tag'])
+                    reassigned += 1
+                Beatmap.mark_tags_changed([beatmap.pk])
 
         self.stdout.write(self.style.SUCCESS(
             f'Processed tag mode mismatches: found={mismatches}, '
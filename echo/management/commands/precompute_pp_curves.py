@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from ...helpers.rosu_utils import PP_CURVE_MODS, get_pp_curve
+from ...models import Beatmap
+
+
+class Command(BaseCommand):
+    help = 'Precompute PP-vs-accuracy/misses curves for beatmaps (all common single mods).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('beatmap_ids', nargs='*',
+                            help='Limit to these osu! beatmap ids (default: all).')
+        parser.add_argument('--mode', default=None,
+                            help='Only beatmaps of this mode (osu, taiko, fruits, mania).')
+        parser.add_argument('--status', default=None,
+                            help='Only beatmaps with this status (e.g. Ranked).')
+        parser.add_argument('--classic', action='store_true',
+                            help='Compute stable (non-lazer) curves instead of lazer.')
+
+    def handle(self, *args, **options):
+        qs = Beatmap.objects.order_by('id')
+        if options['beatmap_ids']:
+            qs = qs.filter(beatmap_id__in=[str(b) for b in options['beatmap_ids']])
+        if options['mode']:
+            qs = qs.filter(mode=options['mode'])
+        if options['status']:
+            qs = qs.filter(status=options['status'])
+        lazer = not options['classic']
+
+        done = 0
+        failed = 0
+        for beatmap in qs.only('id', 'beatmap_id', 'last_updated').iterator(chunk_size=500):
+            # get_pp_curve is a no-op for beatmaps whose curve is already current
+            ok = all(get_pp_curve(beatmap, mods=mods or None, lazer=lazer) is not None for mods in PP_CURVE_MODS)
+            if ok:
+                done += 1
+            else:
+                failed += 1
+            if (done + failed) % 100 == 0:
+                self.stdout.write(f'Processed {done + failed} beatmaps')
+
+        self.stdout.write(self.style.SUCCESS(f'PP curves ready: ok={done}, failed={failed}'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from ...helpers.rosu_utils import get_or_compute_strains, timeseries_supported
+from ...models import Beatmap
+
+
+class Command(BaseCommand):
+    help = 'Precompute difficulty-graph strain blobs for beatmaps of every mode.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('beatmap_ids', nargs='*',
+                            help='Limit to these osu! beatmap ids (default: all).')
+        parser.add_argument('--mode', default=None,
+                            help='Only beatmaps of this mode (osu, taiko, fruits, mania).')
+        parser.add_argument('--status', default=None,
+                            help='Only beatmaps with this status (e.g. Ranked).')
+        parser.add_argument('--mods', nargs='*', default=[''],
+                            help='Mod combinations to build, e.g. --mods "" DT HR (default: nomod only).')
+
+    def handle(self, *args, **options):
+        qs = Beatmap.objects.order_by('id')
+        if options['beatmap_ids']:
+            qs = qs.filter(beatmap_id__in=[str(b) for b in options['beatmap_ids']])
+        if options['mode']:
+            qs = qs.filter(mode=options['mode'])
+        if options['status']:
+            qs = qs.filter(status=options['status'])
+        mods_list = [(m or '').strip().upper() for m in options['mods']] or ['']
+
+        done = 0
+        failed = 0
+        skipped = 0
+        for beatmap in qs.only('id', 'beatmap_id', 'mode').iterator(chunk_size=500):
+            if not timeseries_supported(beatmap):
+                skipped += 1
+                continue
+            # get_or_compute_strains is a no-op for blobs that already exist
+            ok = all(get_or_compute_strains(beatmap, mods=mods or None) is not None for mods in mods_list)
+            if ok:
+                done += 1
+            else:
+                failed += 1
+            if (done + failed) % 100 == 0:
+                self.stdout.write(f'Processed {done + failed} beatmaps')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Strain blobs ready: ok={done}, failed={failed}, skipped={skipped}'
+        ))
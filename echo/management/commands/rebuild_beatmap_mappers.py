@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...helpers.mappers import rebuild_beatmap_mappers
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized mapper index (BeatmapMapper) from listed_owner / listed_owner_id / creator.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows written per bulk insert.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild_beatmap_mappers(batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Mapper index rebuilt in {time.monotonic() - started:.2f}s: {written} rows'
+        ))
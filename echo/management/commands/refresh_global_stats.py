@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...helpers.global_stats import refresh_global_stats_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized global statistics snapshot shown on the statistics page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, refreshing every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=900.0,
+                            help='Seconds between refreshes (with --loop).')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            snapshot = refresh_global_stats_snapshot()
+            self.stdout.write(self.style.SUCCESS(
+                f'Global stats refreshed in {time.monotonic() - started:.2f}s: '
+                f'applications={snapshot.total_applications}, maps={snapshot.maps_tagged_count}'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...helpers.tag_cooccurrence import STATUS_FILTERS, refresh_tag_cooccurrence
+from ...models import Tag
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored tag co-occurrence matrices used by the statistics tag map.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=[m for m, _ in Tag.MODE_CHOICES],
+                            help='Only rebuild this tag mode (default: all modes).')
+        parser.add_argument('--status-filter', choices=STATUS_FILTERS,
+                            help='Only rebuild this status filter (default: all).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, rebuilding every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=1800.0,
+                            help='Seconds between rebuilds (with --loop).')
+
+    def handle(self, *args, **options):
+        modes = [options['mode']] if options['mode'] else None
+        status_filters = [options['status_filter']] if options['status_filter'] else None
+        while True:
+            started = time.monotonic()
+            rows = refresh_tag_cooccurrence(modes, status_filters)
+            for row in rows:
+                self.stdout.write(f'{row.mode}/{row.status_filter}: {row.total_maps} maps, '
+                                  f'{len(row.pair_counts) // 4} tag pairs')
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt {len(rows)} co-occurrence matrices in {time.monotonic() - started:.2f}s'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
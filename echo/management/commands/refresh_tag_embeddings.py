@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...helpers.tag_similarity import refresh_tag_embeddings
+from ...models import Tag
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the TF-IDF tag vector index used for similar-map search and related maps.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=[m for m, _ in Tag.MODE_CHOICES],
+                            help='Only rebuild this tag mode (default: all modes).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, rebuilding every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=3600.0,
+                            help='Seconds between rebuilds (with --loop).')
+
+    def handle(self, *args, **options):
+        modes = [options['mode']] if options['mode'] else None
+        while True:
+            started = time.monotonic()
+            rows = refresh_tag_embeddings(modes)
+            for row in rows:
+                self.stdout.write(f'{row.mode}: {len(row.beatmap_ids) // 4} beatmaps, '
+                                  f'{len(row.tag_ids) // 4} tags, {len(row.entry_weights) // 4} entries')
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt {len(rows)} tag vector indexes in {time.monotonic() - started:.2f}s'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
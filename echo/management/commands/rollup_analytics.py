@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...helpers.analytics_rollups import rollup_analytics
+
+
+class Command(BaseCommand):
+    help = 'Roll closed hours of search/click analytics into the hourly rollups read by the admin dashboard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Drop all rollups and roll every hour again from the first event.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, rolling up every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=300.0,
+                            help='Seconds between rollups (with --loop).')
+
+    def handle(self, *args, **options):
+        rebuild = options['rebuild']
+        while True:
+            started = time.monotonic()
+            state = rollup_analytics(rebuild=rebuild)
+            rebuild = False
+            self.stdout.write(self.style.SUCCESS(
+                f'Analytics rolled up until {state.rolled_until} '
+                f'(clicks checked up to id {state.last_click_id}) in {time.monotonic() - started:.2f}s'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
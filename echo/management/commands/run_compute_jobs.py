@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...helpers.compute_queue import claim_compute_jobs, run_compute_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued timeseries/PP curve computations (the 202 + poll URL request paths).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=20,
+                            help='Jobs claimed per iteration.')
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Concurrent jobs (.osu downloads still obey the osu.ppy.sh rate limit).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, polling for new work.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty (with --loop).')
+
+    def handle(self, *args, **options):
+        batch = max(1, int(options['batch']))
+        workers = max(1, int(options['workers']))
+
+        processed = 0
+        succeeded = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                jobs = claim_compute_jobs(limit=batch)
+                if not jobs:
+                    if not options['loop']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['interval'])
+                    continue
+                for ok in pool.map(self._run, jobs):
+                    processed += 1
+                    if ok:
+                        succeeded += 1
+                self.stdout.write(f'Processed {processed} jobs ({succeeded} succeeded)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Compute jobs finished: processed={processed}, succeeded={succeeded}'
+        ))
+
+    @staticmethod
+    def _run(job):
+        try:
+            return run_compute_job(job)
+        finally:
+            close_old_connections()
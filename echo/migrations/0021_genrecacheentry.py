@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0020_delete_hourlyactiveusercount_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenreCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artist_key', models.CharField(db_index=True, max_length=255)),
+                ('title_key', models.CharField(blank=True, default='', max_length=255)),
+                ('artist', models.CharField(blank=True, default='', max_length=1000)),
+                ('title', models.CharField(blank=True, default='', max_length=1000)),
+                ('genres', models.JSONField(blank=True, default=list)),
+                ('source', models.CharField(blank=True, default='', max_length=16)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('found', 'Found'), ('empty', 'Empty'), ('error', 'Error')], db_index=True, default='pending', max_length=16)),
+                ('attempts', models.IntegerField(default=0)),
+                ('requested_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('next_attempt_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='echo_genrec_status_4d69d6_idx')],
+                'unique_together': {('artist_key', 'title_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0021_genrecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeatmapPPCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mods', models.CharField(blank=True, default='', max_length=32)),
+                ('accuracy_centi', models.IntegerField()),
+                ('misses', models.IntegerField(default=0)),
+                ('lazer', models.BooleanField(default=True)),
+                ('pp', models.FloatField()),
+                ('source_version', models.CharField(blank=True, default='', max_length=64)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('beatmap', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pp_cache', to='echo.beatmap')),
+            ],
+            options={
+                'unique_together': {('beatmap', 'mods', 'accuracy_centi', 'misses', 'lazer')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0022_beatmapppcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeatmapPPCurve',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mods', models.CharField(blank=True, default='', max_length=32)),
+                ('lazer', models.BooleanField(default=True)),
+                ('acc_min', models.FloatField()),
+                ('acc_step', models.FloatField()),
+                ('acc_count', models.IntegerField()),
+                ('miss_max', models.IntegerField()),
+                ('data', models.BinaryField()),
+                ('source_version', models.CharField(blank=True, default='', max_length=64)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('beatmap', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pp_curves', to='echo.beatmap')),
+            ],
+            options={
+                'unique_together': {('beatmap', 'mods', 'lazer')},
+            },
+        ),
+    ]
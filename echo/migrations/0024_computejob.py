@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0023_beatmapppcurve'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComputeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=128, unique=True)),
+                ('kind', models.CharField(choices=[('timeseries', 'Timeseries'), ('pp_curve', 'PP curve')], max_length=16)),
+                ('mods', models.CharField(blank=True, default='', max_length=32)),
+                ('lazer', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('error', 'Error')], db_index=True, default='pending', max_length=16)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lease_until', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('beatmap', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compute_jobs', to='echo.beatmap')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='echo_comput_status_2e9e8c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0024_computejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeatmapFeatures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_count', models.IntegerField(default=0)),
+                ('density', models.FloatField(blank=True, db_index=True, null=True)),
+                ('slider_ratio', models.FloatField(blank=True, db_index=True, null=True)),
+                ('max_stream', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('avg_jump', models.FloatField(blank=True, db_index=True, null=True)),
+                ('peak_aim', models.FloatField(blank=True, db_index=True, null=True)),
+                ('peak_speed', models.FloatField(blank=True, db_index=True, null=True)),
+                ('source_version', models.CharField(blank=True, default='', max_length=64)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('beatmap', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='osu_features', to='echo.beatmap')),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0025_beatmapfeatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlobalStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_applications', models.IntegerField(default=0)),
+                ('maps_tagged_count', models.IntegerField(default=0)),
+                ('predicted_applications', models.IntegerField(default=0)),
+                ('predicted_only_maps_count', models.IntegerField(default=0)),
+                ('star_hist_labels', models.JSONField(blank=True, default=list)),
+                ('star_hist_counts', models.JSONField(blank=True, default=list)),
+                ('human_star_counts', models.JSONField(blank=True, default=list)),
+                ('pred_star_counts', models.JSONField(blank=True, default=list)),
+                ('top_mappers', models.JSONField(blank=True, default=list)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('deltas_since_refresh', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
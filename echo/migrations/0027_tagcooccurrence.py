@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0026_globalstatssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(max_length=16)),
+                ('status_filter', models.CharField(max_length=16)),
+                ('total_maps', models.IntegerField(default=0)),
+                ('tag_ids', models.BinaryField(default=b'')),
+                ('support', models.BinaryField(default=b'')),
+                ('pair_rows', models.BinaryField(default=b'')),
+                ('pair_cols', models.BinaryField(default=b'')),
+                ('pair_counts', models.BinaryField(default=b'')),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+                ('deltas_since_build', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('mode', 'status_filter')},
+            },
+        ),
+    ]
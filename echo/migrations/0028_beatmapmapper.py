@@ -0,0 +1,58 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def split_mappers(listed_owner, listed_owner_id, creator):
+    # Frozen copy of helpers.mappers.split_mappers as of this migration
+    names = [part.strip() for part in str(listed_owner or creator or '').split(',')]
+    ids = [part.strip() for part in str(listed_owner_id or '').split(',')]
+    ids = [i if i.isdigit() else None for i in ids]
+    rows = []
+    for pos in range(max(len(names), len(ids))):
+        name = names[pos] if pos < len(names) else ''
+        osu_id = ids[pos] if pos < len(ids) else None
+        if name or osu_id:
+            rows.append((name, osu_id))
+    return rows
+
+
+def backfill_mappers(apps, schema_editor):
+    Beatmap = apps.get_model('echo', 'Beatmap')
+    BeatmapMapper = apps.get_model('echo', 'BeatmapMapper')
+    batch = []
+    rows = Beatmap.objects.values_list('pk', 'listed_owner', 'listed_owner_id', 'creator').order_by('pk')
+    for pk, listed_owner, listed_owner_id, creator in rows.iterator(chunk_size=2000):
+        for pos, (name, osu_id) in enumerate(split_mappers(listed_owner, listed_owner_id, creator)):
+            batch.append(BeatmapMapper(beatmap_id=pk, position=pos, mapper_name=name, mapper_osu_id=osu_id))
+        if len(batch) >= 2000:
+            BeatmapMapper.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        BeatmapMapper.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0027_tagcooccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BeatmapMapper',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('mapper_name', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('mapper_osu_id', models.CharField(blank=True, db_index=True, max_length=50, null=True)),
+                ('beatmap', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mappers', to='echo.beatmap')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['mapper_osu_id', 'beatmap'], name='echo_beatma_mapper__968d2b_idx'), models.Index(fields=['mapper_name', 'beatmap'], name='echo_beatma_mapper__6469be_idx')],
+                'unique_together': {('beatmap', 'position')},
+            },
+        ),
+        migrations.RunPython(backfill_mappers, migrations.RunPython.noop),
+    ]
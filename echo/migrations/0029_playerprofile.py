@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0028_beatmapmapper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('osu_id', models.BigIntegerField()),
+                ('source', models.CharField(max_length=8)),
+                ('beatmap_ids', models.JSONField(blank=True, default=list)),
+                ('tag_names', models.JSONField(blank=True, default=list)),
+                ('tag_counts', models.JSONField(blank=True, default=list)),
+                ('median_star', models.FloatField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'unique_together': {('osu_id', 'source')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0029_playerprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagEmbeddingIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(max_length=16, unique=True)),
+                ('beatmap_ids', models.BinaryField(default=b'')),
+                ('tag_ids', models.BinaryField(default=b'')),
+                ('idf', models.BinaryField(default=b'')),
+                ('entry_rows', models.BinaryField(default=b'')),
+                ('entry_cols', models.BinaryField(default=b'')),
+                ('entry_weights', models.BinaryField(default=b'')),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
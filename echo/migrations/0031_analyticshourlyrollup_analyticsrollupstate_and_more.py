@@ -0,0 +1,74 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0030_tagembeddingindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(unique=True)),
+                ('searches', models.PositiveIntegerField(default=0)),
+                ('followups', models.PositiveIntegerField(default=0)),
+                ('staff_identities', models.PositiveIntegerField(default=0)),
+                ('user_identities', models.PositiveIntegerField(default=0)),
+                ('anon_identities', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalyticsRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rolled_until', models.DateTimeField(blank=True, null=True)),
+                ('last_click_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalyticsDailyIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateTimeField()),
+                ('kind', models.CharField(max_length=8)),
+                ('identity', models.CharField(max_length=64)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'identity', 'day'], name='echo_analyt_kind_0a3f5c_idx')],
+                'unique_together': {('day', 'kind', 'identity')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalyticsHourlyClicks',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('action', models.CharField(max_length=64)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('last_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['action', 'hour'], name='echo_analyt_action_8a37e2_idx')],
+                'unique_together': {('hour', 'action')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalyticsHourlySearchTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('tag', models.CharField(max_length=100)),
+                ('mode', models.CharField(max_length=16)),
+                ('searches', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('hour', 'tag', 'mode')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:16
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def backfill_tags_changed_at(apps, schema_editor):
+    # Deletions before this field existed are unknown; the newest application is the best guess
+    Beatmap = apps.get_model('echo', 'Beatmap')
+    TagApplication = apps.get_model('echo', 'TagApplication')
+    latest = (
+        TagApplication.objects.filter(beatmap_id=OuterRef('pk'))
+        .values('beatmap_id')
+        .annotate(latest=Max('created_at'))
+        .values('latest')
+    )
+    Beatmap.objects.update(tags_changed_at=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0031_analyticshourlyrollup_analyticsrollupstate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='beatmap',
+            name='tags_changed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_tags_changed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0032_beatmap_tags_changed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostRateLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('host', models.CharField(max_length=255, unique=True)),
+                ('tat', models.FloatField(default=0.0)),
+            ],
+        ),
+    ]
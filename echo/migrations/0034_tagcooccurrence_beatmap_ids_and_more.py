@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:28
+
+from django.db import migrations, models
+
+
+def drop_stored_cooccurrence(apps, schema_editor):
+    # Existing rows lack the beatmap tag lists; they are rebuilt on first use
+    apps.get_model('echo', 'TagCooccurrence').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('echo', '0033_hostratelimit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tagcooccurrence',
+            name='beatmap_ids',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='tagcooccurrence',
+            name='beatmap_tag_ptr',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='tagcooccurrence',
+            name='beatmap_tags',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(drop_stored_cooccurrence, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.db.models import Count
+from django.utils import timezone
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 import uuid
 
@@ -49,6 +50,8 @@ class Beatmap(models.Model):
     max_combo = models.IntegerField(null=True, blank=True, db_index=True)
     # How many times this beatmap was shown on a visible search results page (impressions).
     shown_in_search = models.IntegerField(default=0, db_index=True)
+    # Last time a TagApplication of this beatmap was created or deleted (incremental corpus exports).
+    tags_changed_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     class Meta:
         indexes = [
@@ -64,6 +67,13 @@ class Beatmap(models.Model):
             models.Index(fields=['artist', 'title']),
         ]
 
+    @classmethod
+    def mark_tags_changed(cls, beatmap_pks):
+        """Bump tags_changed_at for beatmaps whose tag applications were just written."""
+        pks = {pk for pk in beatmap_pks if pk is not None}
+        if pks:
+            cls.objects.filter(pk__in=pks).update(tags_changed_at=timezone.now())
+
     def get_weighted_tags(self):
         tags = self.tags.annotate(
             num_users=Count('tagapplication__user', distinct=True)
@@ -578,4 +588,396 @@ class AnalyticsClickEvent(models.Model):
 
 
 ## NOTE: Hourly active authenticated aggregates were removed in favor of per-event
-## hashed identity on AnalyticsSearchEvent/AnalyticsClickEvent.
\ No newline at end of file
+## hashed identity on AnalyticsSearchEvent/AnalyticsClickEvent.
+
+
+class AnalyticsHourlyRollup(models.Model):
+    """
+    Analytics aggregates of one closed UTC hour for the admin dashboard (helpers.analytics_rollups).
+    - searches counts search events with a non-empty query; followups those of them with a download click
+      from the same client (recounted when late clicks arrive).
+    - *_identities are distinct identities (hashed user id, else client_id) over search and click events.
+    """
+    hour = models.DateTimeField(unique=True)
+    searches = models.PositiveIntegerField(default=0)
+    followups = models.PositiveIntegerField(default=0)
+    staff_identities = models.PositiveIntegerField(default=0)
+    user_identities = models.PositiveIntegerField(default=0)
+    anon_identities = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"AnalyticsHourlyRollup({self.hour.isoformat()}: {self.searches} searches)"
+
+
+class AnalyticsHourlyClicks(models.Model):
+    """Click events per action in one closed UTC hour, with the time of the last one."""
+    hour = models.DateTimeField()
+    action = models.CharField(max_length=64)
+    clicks = models.PositiveIntegerField(default=0)
+    last_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('hour', 'action')
+        indexes = [
+            models.Index(fields=['action', 'hour']),
+        ]
+
+    def __str__(self):
+        return f"AnalyticsHourlyClicks({self.hour.isoformat()} {self.action}: {self.clicks})"
+
+
+class AnalyticsHourlySearchTag(models.Model):
+    """
+    Searches in one closed UTC hour whose query names a tag.
+    - tag is the lowercased tag string as searched; readers keep the ones matching an existing Tag.
+    """
+    hour = models.DateTimeField()
+    tag = models.CharField(max_length=100)
+    mode = models.CharField(max_length=16)
+    searches = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('hour', 'tag', 'mode')
+
+    def __str__(self):
+        return f"AnalyticsHourlySearchTag({self.hour.isoformat()} {self.tag}/{self.mode}: {self.searches})"
+
+
+class AnalyticsDailyIdentity(models.Model):
+    """
+    One distinct identity seen on a UTC day (day is its midnight), kind 'staff', 'user' or 'anon'.
+    - Lets day, week and all-time unique counts be exact COUNT(DISTINCT) over the rolled hours.
+    """
+    day = models.DateTimeField()
+    kind = models.CharField(max_length=8)
+    identity = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('day', 'kind', 'identity')
+        indexes = [
+            models.Index(fields=['kind', 'identity', 'day']),
+        ]
+
+    def __str__(self):
+        return f"AnalyticsDailyIdentity({self.day.date()} {self.kind})"
+
+
+class AnalyticsRollupState(models.Model):
+    """
+    Watermarks of the analytics rollups (a single row, pk=1).
+    - rolled_until: every hour before it is rolled up; last_click_id: clicks up to it were checked for late follow-ups.
+    """
+    SINGLETON_ID = 1
+
+    rolled_until = models.DateTimeField(null=True, blank=True)
+    last_click_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"AnalyticsRollupState(rolled until {self.rolled_until})"
+
+# ----------------------------- Genre Cache ----------------------------- #
+class GenreCacheEntry(models.Model):
+    """
+    Cached genre lookup keyed by normalized (artist, title).
+    - title_key == '' marks an artist-level entry shared by all of that artist's songs.
+    - Empty results are cached too (negative caching) and retried after next_attempt_at.
+    - Rows are created as 'pending' by request paths and filled by the enrich_genres worker.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FOUND = 'found'
+    STATUS_EMPTY = 'empty'
+    STATUS_ERROR = 'error'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_FOUND, 'Found'),
+        (STATUS_EMPTY, 'Empty'),
+        (STATUS_ERROR, 'Error'),
+    ]
+
+    artist_key = models.CharField(max_length=255, db_index=True)
+    title_key = models.CharField(max_length=255, blank=True, default='')
+    # Original spelling, used for upstream queries and matching beatmaps back
+    artist = models.CharField(max_length=1000, blank=True, default='')
+    title = models.CharField(max_length=1000, blank=True, default='')
+    genres = models.JSONField(default=list, blank=True)
+    source = models.CharField(max_length=16, blank=True, default='')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    attempts = models.IntegerField(default=0)
+    requested_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        unique_together = ('artist_key', 'title_key')
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        label = f"{self.artist_key} - {self.title_key}" if self.title_key else self.artist_key
+        return f"GenreCache({label}: {self.status})"
+
+
+# ----------------------------- PP Cache ----------------------------- #
+class BeatmapPPCache(models.Model):
+    """
+    Computed PP for one (beatmap, mods, accuracy, misses, lazer) combination.
+    - accuracy is stored in hundredths of a percent (98.50% -> 9850) for exact lookups.
+    - source_version ties the row to the beatmap's last_updated; stale rows are recomputed.
+    """
+    beatmap = models.ForeignKey(Beatmap, on_delete=models.CASCADE, related_name='pp_cache')
+    mods = models.CharField(max_length=32, blank=True, default='')
+    accuracy_centi = models.IntegerField()
+    misses = models.IntegerField(default=0)
+    lazer = models.BooleanField(default=True)
+    pp = models.FloatField()
+    source_version = models.CharField(max_length=64, blank=True, default='')
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('beatmap', 'mods', 'accuracy_centi', 'misses', 'lazer')
+
+    def __str__(self):
+        return f"PP({self.beatmap_id}, {self.mods or 'NM'}, {self.accuracy_centi / 100:.2f}%, {self.misses}x) = {self.pp:.2f}"
+
+
+class BeatmapPPCurve(models.Model):
+    """
+    Precomputed PP grid for one (beatmap, mods, lazer): accuracy steps x miss counts.
+    - data is a little-endian float32 blob of shape (miss_max + 1, acc_count), row-major.
+    - Accuracy points are acc_min + i * acc_step for i in range(acc_count).
+    """
+    beatmap = models.ForeignKey(Beatmap, on_delete=models.CASCADE, related_name='pp_curves')
+    mods = models.CharField(max_length=32, blank=True, default='')
+    lazer = models.BooleanField(default=True)
+    acc_min = models.FloatField()
+    acc_step = models.FloatField()
+    acc_count = models.IntegerField()
+    miss_max = models.IntegerField()
+    data = models.BinaryField()
+    source_version = models.CharField(max_length=64, blank=True, default='')
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('beatmap', 'mods', 'lazer')
+
+    def __str__(self):
+        return f"PPCurve({self.beatmap_id}, {self.mods or 'NM'}, lazer={self.lazer})"
+
+
+# ----------------------------- .osu Features ----------------------------- #
+class BeatmapFeatures(models.Model):
+    """
+    Features derived offline from a beatmap's .osu file (extract_osu_features command).
+    - density: hit objects per second of drain time; slider_ratio counts mania holds as sliders.
+    - max_stream: longest run of objects spaced at most a 1/4 beat apart (0 if none).
+    - avg_jump: mean osu!px distance between consecutive object starts (osu!standard only).
+    - peak_aim / peak_speed: largest raw strain of the two difficulty channels (see rosu_utils).
+    """
+    beatmap = models.OneToOneField(Beatmap, on_delete=models.CASCADE, related_name='osu_features')
+    object_count = models.IntegerField(default=0)
+    density = models.FloatField(null=True, blank=True, db_index=True)
+    slider_ratio = models.FloatField(null=True, blank=True, db_index=True)
+    max_stream = models.IntegerField(null=True, blank=True, db_index=True)
+    avg_jump = models.FloatField(null=True, blank=True, db_index=True)
+    peak_aim = models.FloatField(null=True, blank=True, db_index=True)
+    peak_speed = models.FloatField(null=True, blank=True, db_index=True)
+    source_version = models.CharField(max_length=64, blank=True, default='')
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Features({self.beatmap_id}: {self.density or 0:.2f} obj/s, stream {self.max_stream or 0})"
+
+
+class BeatmapMapper(models.Model):
+    """
+    One mapper of a beatmap, normalized from the comma-separated listed_owner / listed_owner_id.
+    - Names come from listed_owner, falling back to creator; ids are paired by position (null if unknown).
+    - Kept in sync by a post_save signal on Beatmap (helpers.mappers); rebuild_beatmap_mappers rebuilds all rows.
+    """
+    beatmap = models.ForeignKey(Beatmap, on_delete=models.CASCADE, related_name='mappers')
+    position = models.PositiveSmallIntegerField(default=0)
+    mapper_name = models.CharField(max_length=255, blank=True, db_index=True)
+    mapper_osu_id = models.CharField(max_length=50, null=True, blank=True, db_index=True)
+
+    class Meta:
+        unique_together = ('beatmap', 'position')
+        indexes = [
+            models.Index(fields=['mapper_osu_id', 'beatmap']),
+            models.Index(fields=['mapper_name', 'beatmap']),
+        ]
+
+    def __str__(self):
+        return f"{self.mapper_name or '?'} ({self.mapper_osu_id or '-'}) on {self.beatmap_id}"
+
+
+# ----------------------------- Global Statistics ----------------------------- #
+class GlobalStatsSnapshot(models.Model):
+    """
+    Materialized global aggregates for the statistics page (a single row, pk=1).
+    - Fully rebuilt by the refresh_global_stats command; single tag writes apply deltas.
+    - Histograms share star_hist_labels (0.25-wide bins starting at the lowest star rating, plus 15.00+).
+    """
+    SINGLETON_ID = 1
+
+    total_applications = models.IntegerField(default=0)
+    maps_tagged_count = models.IntegerField(default=0)
+    predicted_applications = models.IntegerField(default=0)
+    predicted_only_maps_count = models.IntegerField(default=0)
+    star_hist_labels = models.JSONField(default=list, blank=True)
+    star_hist_counts = models.JSONField(default=list, blank=True)
+    human_star_counts = models.JSONField(default=list, blank=True)
+    pred_star_counts = models.JSONField(default=list, blank=True)
+    top_mappers = models.JSONField(default=list, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    deltas_since_refresh = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def avg_tags_per_map(self) -> float:
+        if not self.maps_tagged_count:
+            return 0.0
+        return float(self.total_applications) / self.maps_tagged_count
+
+    def __str__(self):
+        return f"GlobalStats({self.total_applications} applications, refreshed {self.refreshed_at})"
+
+
+class PlayerProfile(models.Model):
+    """
+    Cached tag profile of an osu! player for the Player Statistics section, per (osu_id, source).
+    - source is 'top' (best 100 scores) or 'fav' (favourite beatmapsets); beatmap_ids are the matching Beatmap pks.
+    - tag_names / tag_counts: the most applied tags on those beatmaps; median_star: their median star rating.
+    - Rebuilt from the osu! API once older than PLAYER_PROFILE_TTL (helpers.player_profiles).
+    """
+    osu_id = models.BigIntegerField()
+    source = models.CharField(max_length=8)
+    beatmap_ids = models.JSONField(default=list, blank=True)
+    tag_names = models.JSONField(default=list, blank=True)
+    tag_counts = models.JSONField(default=list, blank=True)
+    median_star = models.FloatField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('osu_id', 'source')
+
+    def __str__(self):
+        return f"PlayerProfile({self.osu_id}/{self.source}: {len(self.beatmap_ids or [])} maps)"
+
+
+# ----------------------------- Tag Co-occurrence ----------------------------- #
+class TagCooccurrence(models.Model):
+    """
+    Sparse tag co-occurrence over the tag map corpus of one (mode, status_filter).
+    - tag_ids and support are aligned little-endian int32 arrays; support counts distinct beatmaps per tag.
+    - pair_rows / pair_cols / pair_counts are upper-triangle COO entries (indices into tag_ids, row < col),
+      sorted by (row, col); pair_counts is the number of beatmaps carrying both tags.
+    - beatmap_ids (ascending pks), beatmap_tag_ptr and beatmap_tags (indices into tag_ids) hold each
+      beatmap's tags in CSR form, so sector assignment needs no scan of the tag applications.
+    - Rebuilt by the refresh_tag_cooccurrence command; single tag writes apply deltas.
+    """
+    mode = models.CharField(max_length=16)
+    status_filter = models.CharField(max_length=16)
+    total_maps = models.IntegerField(default=0)
+    tag_ids = models.BinaryField(default=b'')
+    support = models.BinaryField(default=b'')
+    pair_rows = models.BinaryField(default=b'')
+    pair_cols = models.BinaryField(default=b'')
+    pair_counts = models.BinaryField(default=b'')
+    beatmap_ids = models.BinaryField(default=b'')
+    beatmap_tag_ptr = models.BinaryField(default=b'')
+    beatmap_tags = models.BinaryField(default=b'')
+    built_at = models.DateTimeField(null=True, blank=True)
+    deltas_since_build = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('mode', 'status_filter')
+
+    def __str__(self):
+        return f"TagCooccurrence({self.mode}/{self.status_filter}: {self.total_maps} maps)"
+
+
+class TagEmbeddingIndex(models.Model):
+    """
+    TF-IDF tag vectors of the tagged beatmaps of one tag mode, for cosine similarity search.
+    - beatmap_ids (ascending Beatmap pks) and tag_ids are little-endian int32 arrays; idf is float32 per tag.
+    - Vectors are stored sparse: entry_rows / entry_cols index beatmap_ids / tag_ids and entry_weights holds
+      the L2-normalized float32 weights; readers group them by tag and score queries sparsely (helpers.tag_similarity).
+    - Rebuilt by the refresh_tag_embeddings command.
+    """
+    mode = models.CharField(max_length=16, unique=True)
+    beatmap_ids = models.BinaryField(default=b'')
+    tag_ids = models.BinaryField(default=b'')
+    idf = models.BinaryField(default=b'')
+    entry_rows = models.BinaryField(default=b'')
+    entry_cols = models.BinaryField(default=b'')
+    entry_weights = models.BinaryField(default=b'')
+    built_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"TagEmbeddingIndex({self.mode}, built {self.built_at})"
+
+
+# ----------------------------- Compute Jobs ----------------------------- #
+class ComputeJob(models.Model):
+    """
+    Queued heavy computation (strain timeseries, PP curves) for one beatmap variant.
+    - key is unique per (kind, beatmap, params), so concurrent requests share one job.
+    - Rows are created by request paths and claimed with a lease by the run_compute_jobs worker.
+    """
+    KIND_TIMESERIES = 'timeseries'
+    KIND_PP_CURVE = 'pp_curve'
+    KIND_CHOICES = [
+        (KIND_TIMESERIES, 'Timeseries'),
+        (KIND_PP_CURVE, 'PP curve'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_ERROR = 'error'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_ERROR, 'Error'),
+    ]
+
+    key = models.CharField(max_length=128, unique=True)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    beatmap = models.ForeignKey(Beatmap, on_delete=models.CASCADE, related_name='compute_jobs')
+    mods = models.CharField(max_length=32, blank=True, default='')
+    lazer = models.BooleanField(default=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    lease_until = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"ComputeJob({self.key}: {self.status})"
+
+
+# ----------------------------- Outbound Rate Limits ----------------------------- #
+class HostRateLimit(models.Model):
+    """
+    Shared rate limit schedule of one outbound host (helpers.http_client).
+    - tat is the GCRA theoretical arrival time in epoch seconds; every process reserves
+      its request slot by advancing it with a compare-and-set update.
+    """
+    host = models.CharField(max_length=255, unique=True)
+    tat = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"HostRateLimit({self.host})"
@@ -243,6 +243,13 @@ def handle_attribute_equal_query(beatmaps, term):
         'EZ': 'pp_ez',
         'FL': 'pp_fl',
         'YEAR': 'last_updated__year',
+        # .osu-derived features (BeatmapFeatures side table)
+        'DENSITY': 'osu_features__density',
+        'SLIDERS': 'osu_features__slider_ratio',
+        'STREAM': 'osu_features__max_stream',
+        'JUMP': 'osu_features__avg_jump',
+        'AIM': 'osu_features__peak_aim',
+        'SPEED': 'osu_features__peak_speed',
     }
 
     field_name = field_map.get(attribute)
@@ -282,7 +289,7 @@ def handle_attribute_comparison_query(beatmaps, term):
     if '=>' in (term or '') or '=<'.strip() in (term or ''):
         term = (term or '').replace('=>', '>=').replace('=<', '<=')
 
-    match = re.match(r'(AR|CS|BPM|OD|HP|DRAIN|LENGTH|COUNT|FAV|PP|NM|HD|HR|DT|HT|EZ|FL|YEAR)(>=|<=|>|<)(\d+(\.\d+)?)', term, re.IGNORECASE)
+    match = re.match(r'(AR|CS|BPM|OD|HP|DRAIN|LENGTH|COUNT|FAV|PP|NM|HD|HR|DT|HT|EZ|FL|YEAR|DENSITY|SLIDERS|STREAM|JUMP|AIM|SPEED)(>=|<=|>|<)(\d+(\.\d+)?)', term, re.IGNORECASE)
     if match:
         attribute, operator, value, _ = match.groups()
         attribute = attribute.upper().strip()
@@ -314,6 +321,13 @@ def handle_attribute_comparison_query(beatmaps, term):
             'EZ': 'pp_ez',
             'FL': 'pp_fl',
             'YEAR': 'last_updated__year',
+            # .osu-derived features (BeatmapFeatures side table)
+            'DENSITY': 'osu_features__density',
+            'SLIDERS': 'osu_features__slider_ratio',
+            'STREAM': 'osu_features__max_stream',
+            'JUMP': 'osu_features__avg_jump',
+            'AIM': 'osu_features__peak_aim',
+            'SPEED': 'osu_features__peak_speed',
         }
         field_name = field_map.get(attribute)
         if lookup and attribute == 'PP':
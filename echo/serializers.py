@@ -2,6 +2,8 @@ from rest_framework import serializers
 from .models import TagApplication, Tag, Beatmap, UserProfile
 from django.contrib.auth.models import User
 from django.db import transaction
+from .helpers.global_stats import record_tag_application_change
+from .helpers.tag_cooccurrence import record_tag_cooccurrence_change
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,6 +31,14 @@ class TagSerializer(serializers.ModelSerializer):
 class BeatmapSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
 
+    def __init__(self, *args, **kwargs):
+        # Optional projection: BeatmapSerializer(qs, many=True, fields=['id', 'beatmap_id'])
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Beatmap
         fields = ['id', 'beatmap_id', 'title', 'artist', 'tags']
@@ -134,6 +144,8 @@ class TagApplicationToggleSerializer(serializers.Serializer):
                         # Tag exists, remove it
                         app = next(app for app in existing_applications if app.tag.name == tag_name)
                         app.delete()
+                        record_tag_application_change(beatmap.pk, user.pk, app.true_negative, -1)
+                        record_tag_cooccurrence_change(beatmap.pk, app.tag_id, app.true_negative, -1)
                         results.append({"tag": tag_name, "action": "removed"})
                     else:
                         # Tag doesn't exist, create it
@@ -142,6 +154,8 @@ class TagApplicationToggleSerializer(serializers.Serializer):
                             beatmap=beatmap,
                             user=user
                         )
+                        record_tag_application_change(beatmap.pk, user.pk, False, 1)
+                        record_tag_cooccurrence_change(beatmap.pk, tag.pk, False, 1)
                         results.append({"tag": tag_name, "action": "applied"})
                         
                 except Exception as e:
@@ -150,5 +164,6 @@ class TagApplicationToggleSerializer(serializers.Serializer):
                         "action": "error",
                         "message": str(e)
                     })
+            Beatmap.mark_tags_changed([beatmap.pk])
 
         return results
\ No newline at end of file
@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from .helpers.mappers import MAPPER_SOURCE_FIELDS, sync_beatmap_mappers
 from .models import Beatmap, ManiaKeyOption
 
 
@@ -12,6 +13,9 @@ def ensure_mania_key_option(sender, instance, **kwargs):
     ManiaKeyOption.ensure_for_value(instance.cs)
 
 
-
-
-
+@receiver(post_save, sender=Beatmap)
+def sync_mapper_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Saves that leave the owner fields alone keep the index as is
+    if raw or (update_fields is not None and not set(update_fields) & set(MAPPER_SOURCE_FIELDS)):
+        return
+    sync_beatmap_mappers(instance)
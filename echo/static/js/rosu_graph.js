@@ -9,6 +9,11 @@
   function drawGraph(canvas, ts, state) {
     if (!canvas || !ts || !Array.isArray(ts.times_s)) return;
 
+    // Per-mode channel names (taiko: color/rhythm + stamina; catch/mania have a single channel)
+    var labels = ts.labels || {};
+    var aimLabel = labels.aim || 'Aim';
+    var speedLabel = (labels.speed === null) ? null : (labels.speed || 'Speed');
+
     var ctx = canvas.getContext('2d');
     var dpr = window.devicePixelRatio || 1;
     var width = canvas.clientWidth * dpr;
@@ -214,7 +219,7 @@
       }
 
       drawSeries(aimS, '#ff4d6a', 1.5);
-      drawSeries(speedS, '#ffb000', 1.5);
+      if (speedLabel) drawSeries(speedS, '#ffb000', 1.5);
       drawSeries(totalS, '#00a8ff', 2.0);
 
     // Provide plotting metrics to tags overlay renderer
@@ -253,11 +258,9 @@
 
     // legend top-right (static)
     (function drawLegend() {
-      var items = [
-        { label: 'Aim', color: '#ff4d6a' },
-      { label: 'Speed', color: '#ffb000' },
-      { label: 'Total', color: '#00a8ff' }
-      ];
+      var items = [{ label: aimLabel, color: '#ff4d6a' }];
+      if (speedLabel) items.push({ label: speedLabel, color: '#ffb000' });
+      items.push({ label: 'Total', color: '#00a8ff' });
       var octx = state.staticCanvas.getContext('2d');
       var padding = state._cache.padding;
       octx.font = (11 * dpr) + 'px sans-serif';
@@ -324,8 +327,8 @@
       ctx.stroke();
       var tipPad = 6 * dpr;
       var tipText = formatTimeTenths(xVal) +
-                    '\nAim=' + aimS[nearest].toFixed(2) + '★' +
-                    '\nSpeed=' + speedS[nearest].toFixed(2) + '★' +
+                    '\n' + aimLabel + '=' + aimS[nearest].toFixed(2) + '★' +
+                    (speedLabel ? '\n' + speedLabel + '=' + speedS[nearest].toFixed(2) + '★' : '') +
                     '\nTotal=' + totalS[nearest].toFixed(2) + '★';
       var lines = tipText.split('\n');
       ctx.font = (11 * dpr) + 'px sans-serif';
@@ -386,23 +389,43 @@
       return u;
     }
 
+    function drawMessage(text) {
+      var ctx = canvas.getContext('2d');
+      var dpr = window.devicePixelRatio || 1;
+      var width = canvas.clientWidth * dpr || 800;
+      var height = canvas.clientHeight * dpr || 280;
+      canvas.width = width; canvas.height = height;
+      ctx.fillStyle = '#111';
+      ctx.fillRect(0, 0, width, height);
+      ctx.fillStyle = '#aaa';
+      ctx.font = (12 * dpr) + 'px sans-serif';
+      ctx.fillText(text, 12, 24);
+    }
+
+    // 202 = the series is being computed by the worker; ask again after Retry-After
+    var MAX_PENDING_POLLS = 30;
+    function fetchTimeseries(url, polls) {
+      // Default caching: the endpoint sends ETag/max-age, so repeat visits revalidate or hit the cache
+      return fetch(url, { credentials: 'same-origin' })
+      .then(function (r) {
+        if (r.status === 202 && polls < MAX_PENDING_POLLS) {
+          if (polls === 0) drawMessage('Computing difficulty timeline...');
+          var waitS = parseFloat(r.headers.get('Retry-After')) || 2;
+          return new Promise(function (resolve) { setTimeout(resolve, waitS * 1000); })
+            .then(function () { return fetchTimeseries(url, polls + 1); });
+        }
+        return r.status === 200 ? r.json() : null;
+      });
+    }
+
     function fetchAndDraw() {
       var url = buildUrl();
-      fetch(url, { credentials: 'same-origin', cache: 'no-store' })
-      .then(function (r) { return r.ok ? r.json() : null; })
+      fetchTimeseries(url, 0)
       .then(function (ts) {
+        if (url !== buildUrl()) return; // mods changed while we were waiting
         if (!ts) {
           // draw empty state
-          var ctx = canvas.getContext('2d');
-          var dpr = window.devicePixelRatio || 1;
-          var width = canvas.clientWidth * dpr || 800;
-          var height = canvas.clientHeight * dpr || 280;
-          canvas.width = width; canvas.height = height;
-          ctx.fillStyle = '#111';
-          ctx.fillRect(0, 0, width, height);
-          ctx.fillStyle = '#aaa';
-          ctx.font = (12 * dpr) + 'px sans-serif';
-          ctx.fillText('No difficulty timeline available', 12, 24);
+          drawMessage('No difficulty timeline available');
           return;
         }
         var state = { hoverX: null, needFullRedraw: true, staticCanvas: null, _cache: null, viewMinX: null, viewMaxX: null };
@@ -842,15 +842,33 @@
             requestData.mods = mod;
           }
           
-          $.ajax({
-            url: '/api/calculate-pp/',
-            method: 'POST',
-            data: JSON.stringify(requestData),
-            contentType: 'application/json',
-            headers: {
-              'X-CSRFToken': csrf
-            }
-          }).done(function(response) {
+          // 202 = the PP curve is being built by the worker; repeat after Retry-After
+          function requestPP(polls) {
+            return $.ajax({
+              url: '/api/calculate-pp/',
+              method: 'POST',
+              data: JSON.stringify(requestData),
+              contentType: 'application/json',
+              headers: {
+                'X-CSRFToken': csrf
+              }
+            }).then(function(response, textStatus, xhr) {
+              if (xhr.status === 202 && polls < 30) {
+                var waitS = parseFloat(xhr.getResponseHeader('Retry-After')) || 2;
+                var deferred = $.Deferred();
+                setTimeout(function() {
+                  requestPP(polls + 1).then(deferred.resolve, deferred.reject);
+                }, waitS * 1000);
+                return deferred.promise();
+              }
+              if (xhr.status === 202) {
+                return $.Deferred().reject(xhr).promise();
+              }
+              return response;
+            });
+          }
+
+          requestPP(0).done(function(response) {
             results[modFields[index]] = response.pp;
             completed++;
             
@@ -968,8 +986,8 @@
         var current = new URL(window.location.href);
         // Preserve existing params
         current.searchParams.forEach(function(value, key) {
-          // Drop pagination when changing filters
-          if (key === 'page') return;
+          // Drop pagination when changing filters, and the similar-map seed (set explicitly)
+          if (key === 'page' || key === 'similar_to') return;
           url.searchParams.set(key, value);
         });
       } catch (e) { /* no-op */ }
@@ -1223,11 +1241,6 @@
           try {
             var arr = Array.isArray(tags) ? tags : [];
             var top = arr.slice(0, 10);
-            var tagTokens = top.map(function(t){
-              var name = (t && t.name) ? String(t.name) : '';
-              if (!name) return null;
-              return /\s/.test(name) ? '"' + name.replace(/\"/g, '') + '"' : name;
-            }).filter(Boolean);
             // Derive attribute filters based on tags and compute windows from card
             var tagNames = top.map(function(t){ return (t && t.name) ? String(t.name) : ''; }).filter(Boolean);
             var filters = deriveFiltersFromTagsClient(tagNames);
@@ -1266,9 +1279,10 @@
               attrTokens.push('PP<=' + fmt(windows['pp_max'], 1));
             }
             var url = buildSearchUrl();
-            var allTokens = tagTokens.concat(attrTokens);
-            if (allTokens.length) { url.searchParams.set('query', allTokens.join(' ')); }
+            // Results are ranked by tag similarity to this map; the query only narrows attributes
+            if (attrTokens.length) { url.searchParams.set('query', attrTokens.join(' ')); }
             else { url.searchParams.delete('query'); }
+            url.searchParams.set('similar_to', String(localBeatmapId));
             // Derive a star window from displayed star rating (±15%)
             url.searchParams.set('star_min', fmt(windows.star_min, 2));
             url.searchParams.set('star_max', fmt(windows.star_max, 2));
@@ -1285,6 +1299,7 @@
               fallback.searchParams.set('star_max', fmt(mx, 2));
             }
             fallback.searchParams.set('sort', 'tag_weight');
+            fallback.searchParams.set('similar_to', String(localBeatmapId));
             navTo(fallback);
           }
         }).fail(function(){
@@ -1298,6 +1313,7 @@
             url.searchParams.set('star_max', fmt(smax, 2));
           }
           url.searchParams.set('sort', 'tag_weight');
+          url.searchParams.set('similar_to', String(localBeatmapId));
           navTo(url);
         });
       });
@@ -1387,9 +1403,20 @@
             // Expand the calculator
             $calculator.find('.pp-calc-content').show();
             $calculator.find('.pp-calc-toggle').attr('aria-expanded', 'true');
-            
-            // Trigger calculation
-            $calculator.find('.pp-calc-calculate').click();
+
+            // Use server-interpolated values when every mod is covered; otherwise calculate
+            var bmId = String($calculator.data('beatmap-id') || '');
+            var known = (params.pp_values || {})[bmId];
+            var modFields = {nm: 'pp_nomod', hd: 'pp_hd', hr: 'pp_hr', dt: 'pp_dt', ht: 'pp_ht', ez: 'pp_ez', fl: 'pp_fl'};
+            var complete = !!known && Object.keys(modFields).every(function(k) { return known[modFields[k]] !== undefined; });
+            if (complete) {
+              var $card = $calculator.closest('.beatmap-card-wrapper');
+              Object.keys(modFields).forEach(function(k) {
+                $card.find('.pp-' + k + ' .pp-val').text(Math.round(known[modFields[k]]));
+              });
+            } else {
+              $calculator.find('.pp-calc-calculate').click();
+            }
           }
         });
       }, 200); // Wait for calculators to be initialized
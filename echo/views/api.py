@@ -7,14 +7,24 @@ tag management.
 """
 
 
+# ---------------------------------------------------------------------------
+# Standard library imports
+# ---------------------------------------------------------------------------
+import json
+import zlib
+from datetime import datetime
+
 # ---------------------------------------------------------------------------
 # Django imports
 # ---------------------------------------------------------------------------
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
 from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.dateparse import parse_date, parse_datetime
 
 # ---------------------------------------------------------------------------
 # REST framework imports
@@ -39,6 +49,7 @@ from django.utils import timezone
 from ..authentication import CustomTokenAuthentication
 from ..models import (
     Beatmap,
+    ComputeJob,
     CustomToken,
     Tag,
     TagApplication,
@@ -112,6 +123,11 @@ class BeatmapViewSet(viewsets.ReadOnlyModelViewSet):
           - Returns a simple list of beatmaps (BeatmapSerializer) in deterministic order.
           - Useful for bulk export/import without paging through DRF pagination objects.
 
+        GET /api/beatmaps/tags/?batch_size=500&after_id=0&fields=id,beatmap_id
+          - Keyset cursor mode: returns {"results": [...], "next_cursor": <id or null>}.
+          - Pass `next_cursor` back as `after_id`; cost per page is constant at any depth.
+          - `fields` optionally restricts the serialized fields (works with offset mode too).
+
         POST /api/beatmaps/tags/
           - Aggregate tag counts for many beatmaps in a single request.
 
@@ -126,20 +142,45 @@ class BeatmapViewSet(viewsets.ReadOnlyModelViewSet):
         """
         self.throttle_scope = 'bulk'
 
-        # ── GET: bulk list beatmaps (simple list, offset-based) ────────────────
+        # ── GET: bulk list beatmaps (offset-based, or keyset cursor via after_id) ──
         if request.method.upper() == 'GET':
             try:
                 batch_size = int((request.query_params.get('batch_size') or '500').strip())
             except Exception:
                 batch_size = 500
+            batch_size = max(1, min(batch_size, 500))
+
+            # Optional projection; unknown names are ignored, empty => all fields
+            allowed_fields = list(BeatmapSerializer.Meta.fields)
+            requested = [s.strip() for s in (request.query_params.get('fields') or '').split(',') if s.strip()]
+            fields = [f for f in allowed_fields if f in requested] or allowed_fields
+
+            qs = Beatmap.objects.all().order_by('id')
+            # Only load the concrete columns we serialize; prefetch tags only when requested
+            qs = qs.only(*[f for f in fields if f != 'tags'] or ['id'])
+            if 'tags' in fields:
+                qs = qs.prefetch_related('tags__parents')
+
+            raw_after = request.query_params.get('after_id')
+            if raw_after is not None:
+                try:
+                    after_id = max(0, int(raw_after.strip() or '0'))
+                except Exception:
+                    return Response({'after_id': ['Must be an integer.']}, status=400)
+                page = list(qs.filter(id__gt=after_id)[:batch_size])
+                next_cursor = page[-1].id if len(page) == batch_size else None
+                return Response({
+                    'results': self.get_serializer(page, many=True, fields=fields).data,
+                    'next_cursor': next_cursor,
+                })
+
             try:
                 offset = int((request.query_params.get('offset') or '0').strip())
             except Exception:
                 offset = 0
-            batch_size = max(1, min(batch_size, 500))
             offset = max(0, offset)
-            qs = Beatmap.objects.all().order_by('id')[offset:offset + batch_size]
-            return Response(self.get_serializer(qs, many=True).data)
+            qs = qs[offset:offset + batch_size]
+            return Response(self.get_serializer(qs, many=True, fields=fields).data)
 
         # ── POST: aggregate tag counts for a provided id list ──────────────────
         payload = request.data if isinstance(request.data, dict) else {}
@@ -508,6 +549,8 @@ def admin_upload_predictions(request):
         return Response({'detail': 'Invalid payload.'}, status=400)
 
     created, updated, skipped, errors = 0, 0, 0, []
+    # Beatmaps whose tag applications were created or deleted (Beatmap.tags_changed_at)
+    touched = set()
 
     def _ensure_beatmap(bm_id: str) -> Beatmap:
         bm_id = str(bm_id)
@@ -541,7 +584,8 @@ def admin_upload_predictions(request):
                         continue
                     # If a true negative exists for this beatmap+tag, ensure no predictions are kept
                     if TagApplication.objects.filter(tag=tag, beatmap=beatmap, true_negative=True).exists():
-                        TagApplication.objects.filter(tag=tag, beatmap=beatmap, user__isnull=True, is_prediction=True).delete()
+                        if TagApplication.objects.filter(tag=tag, beatmap=beatmap, user__isnull=True, is_prediction=True).delete()[0]:
+                            touched.add(beatmap.pk)
                         skipped += 1
                         continue
                     obj, created_row = TagApplication.objects.get_or_create(
@@ -550,6 +594,7 @@ def admin_upload_predictions(request):
                     )
                     if created_row:
                         created += 1
+                        touched.add(beatmap.pk)
                     else:
                         # Update confidence if provided
                         if confidence is not None:
@@ -577,7 +622,8 @@ def admin_upload_predictions(request):
                 continue
             # Skip and delete predicted if a true negative exists
             if TagApplication.objects.filter(tag=tag, beatmap=beatmap, true_negative=True).exists():
-                TagApplication.objects.filter(tag=tag, beatmap=beatmap, user__isnull=True, is_prediction=True).delete()
+                if TagApplication.objects.filter(tag=tag, beatmap=beatmap, user__isnull=True, is_prediction=True).delete()[0]:
+                    touched.add(beatmap.pk)
                 skipped += 1
                 continue
             obj, created_row = TagApplication.objects.get_or_create(
@@ -586,6 +632,7 @@ def admin_upload_predictions(request):
             )
             if created_row:
                 created += 1
+                touched.add(beatmap.pk)
             else:
                 if confidence is not None:
                     obj.is_prediction = True
@@ -597,6 +644,7 @@ def admin_upload_predictions(request):
         except Exception as exc:
             errors.append(str(exc))
 
+    Beatmap.mark_tags_changed(touched)
     return Response({'status': 'ok', 'created': created, 'updated': updated, 'skipped': skipped, 'errors': errors})
 
 
@@ -625,6 +673,7 @@ def admin_upload_tag_applications(request):
         return Response({'detail': 'Invalid payload.'}, status=400)
 
     created, skipped, errors = 0, 0, []
+    touched = set()
 
     for entry in items:
         try:
@@ -727,11 +776,13 @@ def admin_upload_tag_applications(request):
             )
             if created_row:
                 created += 1
+                touched.add(beatmap.pk)
             else:
                 skipped += 1
         except Exception as exc:
             errors.append(str(exc))
 
+    Beatmap.mark_tags_changed(touched)
     return Response({'status': 'ok', 'created': created, 'skipped': skipped, 'errors': errors})
 
 
@@ -966,15 +1017,10 @@ def admin_refresh_beatmaps(request):
             except Exception:
                 pass
 
-            # Best-effort: assign genres using external services
+            # Best-effort: assign genres from the cache (misses are enqueued for the worker)
             try:
-                from ..fetch_genre import fetch_genres, get_or_create_genres
-                genres = fetch_genres(beatmap.artist or '', beatmap.title or '')
-                if genres:
-                    genre_objects = get_or_create_genres(genres)
-                    beatmap.genres.set(genre_objects)
-                else:
-                    beatmap.genres.clear()
+                from ..fetch_genre import apply_cached_genres
+                apply_cached_genres(beatmap)
             except Exception:
                 pass
         except Exception as exc:
@@ -1025,7 +1071,10 @@ def admin_flush_predictions(request):
         return Response({'status': 'ok', 'deleted': 0})
 
     qs = TagApplication.objects.filter(beatmap__beatmap_id__in=ids, user__isnull=True, is_prediction=True)
-    deleted_count, _ = qs.delete()
+    with transaction.atomic():
+        touched = set(qs.values_list('beatmap_id', flat=True).distinct())
+        deleted_count, _ = qs.delete()
+        Beatmap.mark_tags_changed(touched)
     return Response({'status': 'ok', 'deleted': deleted_count, 'beatmap_ids': ids})
 
 
@@ -1039,10 +1088,168 @@ def admin_flush_all_predictions(request):
         return Response({'detail': 'Admin privileges required.'}, status=403)
 
     qs = TagApplication.objects.filter(user__isnull=True, is_prediction=True)
-    deleted_count, _ = qs.delete()
+    with transaction.atomic():
+        touched = set(qs.values_list('beatmap_id', flat=True).distinct())
+        deleted_count, _ = qs.delete()
+        Beatmap.mark_tags_changed(touched)
     return Response({'status': 'ok', 'deleted': deleted_count})
 
 
+# ----------------------------- Admin Export ----------------------------- #
+
+EXPORT_BEATMAP_FIELDS = (
+    'id', 'beatmap_id', 'beatmapset_id', 'title', 'version', 'artist',
+    'creator', 'listed_owner', 'listed_owner_id', 'mode', 'status',
+    'total_length', 'bpm', 'cs', 'drain', 'accuracy', 'ar', 'difficulty_rating',
+    'playcount', 'favourite_count', 'max_combo',
+    'pp_nomod', 'pp_hd', 'pp_hr', 'pp_dt', 'pp_ht', 'pp_ez', 'pp_fl',
+    'last_updated',
+)
+
+
+def _parse_export_since(raw):
+    """Parse an ISO datetime or date into an aware datetime; None when unparseable."""
+    raw = (raw or '').strip()
+    if not raw:
+        return None
+    try:
+        dt = parse_datetime(raw)
+    except ValueError:
+        dt = None
+    if dt is None:
+        try:
+            d = parse_date(raw)
+        except ValueError:
+            d = None
+        if d is None:
+            return None
+        dt = datetime(d.year, d.month, d.day)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _iter_export_lines(beatmap_qs, tag_meta, chunk_size):
+    """Yield one NDJSON line per beatmap with aggregated user/predicted tag counts.
+
+    Beatmaps are read with a server-side iterator; tag counts are aggregated with
+    one GROUP BY query per chunk so memory stays bounded by chunk_size.
+    """
+    rows = beatmap_qs.values(*EXPORT_BEATMAP_FIELDS).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _export_chunk_lines(chunk, tag_meta)
+            chunk = []
+    if chunk:
+        yield from _export_chunk_lines(chunk, tag_meta)
+
+
+def _export_chunk_lines(chunk, tag_meta):
+    ids = [row['id'] for row in chunk]
+    counts = (
+        TagApplication.objects
+        .filter(beatmap_id__in=ids, true_negative=False)
+        .filter(Q(user__isnull=False) | Q(is_prediction=True))
+        .values('beatmap_id', 'tag_id')
+        .annotate(
+            user_count=Count('id', filter=Q(user__isnull=False, is_prediction=False)),
+            predicted_count=Count('id', filter=Q(is_prediction=True)),
+        )
+        .order_by('beatmap_id', 'tag_id')
+    )
+    tags_by_beatmap = {}
+    for c in counts:
+        name, mode = tag_meta.get(c['tag_id'], (None, None))
+        tags_by_beatmap.setdefault(c['beatmap_id'], []).append({
+            'id': c['tag_id'],
+            'name': name,
+            'mode': mode,
+            'user_count': c['user_count'],
+            'predicted_count': c['predicted_count'],
+        })
+    for row in chunk:
+        row['tags'] = tags_by_beatmap.get(row['id'], [])
+        yield json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n'
+
+
+def _gzip_stream(lines, flush_bytes=64 * 1024):
+    """Gzip-compress an iterable of text lines, emitting compressed blocks as they fill."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = []
+    pending_size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= flush_bytes:
+            out = compressor.compress(b''.join(pending))
+            pending, pending_size = [], 0
+            if out:
+                yield out
+    if pending:
+        out = compressor.compress(b''.join(pending))
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+@api_view(['GET'])
+@authentication_classes([CustomTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def admin_export_corpus(request):
+    """Stream the full beatmap/tag corpus as (gzip-compressed) NDJSON (admin only).
+
+    Query params:
+      - since: ISO datetime or date; only beatmaps with last_updated >= since or whose
+        tag applications were created or deleted since then (tags_changed_at) are
+        exported (incremental export). Each exported row carries the beatmap's full
+        current tag list, so consumers replace rather than merge it.
+      - chunk_size: rows per DB round-trip (default 2000, 100..10000).
+      - compress: 1 (default) for gzip, 0 for plain NDJSON.
+
+    The X-Export-Generated-At response header holds the export start time; pass it
+    back as `since` on the next run to pick up only what changed.
+    """
+    user = request.user
+    if not getattr(user, 'is_staff', False):
+        return Response({'detail': 'Admin privileges required.'}, status=403)
+
+    raw_since = request.query_params.get('since')
+    since = _parse_export_since(raw_since)
+    if raw_since and since is None:
+        return Response({'since': ['Must be an ISO 8601 datetime or date.']}, status=400)
+
+    try:
+        chunk_size = int((request.query_params.get('chunk_size') or '2000').strip())
+    except Exception:
+        chunk_size = 2000
+    chunk_size = max(100, min(chunk_size, 10000))
+
+    compress = (request.query_params.get('compress') or '1').strip().lower() not in ('0', 'false', 'no')
+
+    generated_at = timezone.now()
+    qs = Beatmap.objects.order_by('id')
+    if since is not None:
+        qs = qs.filter(Q(last_updated__gte=since) | Q(tags_changed_at__gte=since))
+
+    # Tag vocabulary is small; resolve names once instead of joining per row
+    tag_meta = {t['id']: (t['name'], t['mode']) for t in Tag.objects.values('id', 'name', 'mode')}
+
+    lines = _iter_export_lines(qs, tag_meta, chunk_size)
+    if compress:
+        response = StreamingHttpResponse(_gzip_stream(lines), content_type='application/gzip')
+        filename = 'beatmaps.ndjson.gz'
+    else:
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        filename = 'beatmaps.ndjson'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Export-Generated-At'] = generated_at.isoformat()
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
 # ----------------------------- PP Calculation ----------------------------- #
 
 @api_view(['POST'])
@@ -1068,6 +1275,11 @@ def calculate_pp(request):
         "max_combo": 600,
         "mods": "HD,HR"
     }
+
+    If the PP curve for these mods has not been built yet, responds 202 with a
+    poll_url (see helpers.compute_queue); repeat the request once the job is done.
+    Values are interpolated from the curve (90-100% accuracy, 0-10 misses); other
+    values are computed exactly with rosu-pp and not persisted.
     """
     try:
         beatmap_id = request.data.get('beatmap_id')
@@ -1108,8 +1320,25 @@ def calculate_pp(request):
             if valid_mods:
                 mods = ''.join(valid_mods)
         
-        # Calculate PP using rosu
-        from ..helpers.rosu_utils import get_or_compute_pp
+        if not (0.0 <= accuracy <= 100.0) or count_miss < 0:
+            return Response({'error': 'accuracy must be 0-100 and count_miss non-negative'}, status=400)
+
+        # Interpolate from the precomputed curve; only off-grid values run rosu here
+        from ..helpers.compute_queue import async_enabled, compute_job_payload, enqueue_compute_job
+        from ..helpers.rosu_utils import get_pp_curve, get_pp_for_params
+
+        curve = get_pp_curve(beatmap, mods=mods, lazer=True, build=False) if async_enabled() else None
+        # First request for this variant: queue the curve build instead of running it here
+        if async_enabled() and curve is None:
+            job = enqueue_compute_job(ComputeJob.KIND_PP_CURVE, beatmap, mods=mods, lazer=True)
+            if job.status == ComputeJob.STATUS_ERROR:
+                return Response({'error': 'Failed to calculate PP'}, status=500)
+            payload = compute_job_payload(job)
+            return Response(payload, status=202, headers={
+                'Location': payload['poll_url'],
+                'Retry-After': str(payload['retry_after']),
+                'Cache-Control': 'no-store',
+            })
         
         # Calculate accuracy from hit counts if not provided directly
         if count_100 > 0 or count_50 > 0 or count_miss > 0:
@@ -1119,13 +1348,16 @@ def calculate_pp(request):
             pass
         
         # Calculate PP with custom parameters
-        pp_value = get_or_compute_pp(
-            beatmap, 
-            accuracy=accuracy, 
-            misses=count_miss, 
-            lazer=True,
-            mods=mods
-        )
+        pp_value = curve.pp_at(accuracy, count_miss) if curve is not None else None
+        if pp_value is None:
+            # Off the curve grid, or no compute worker (COMPUTE_QUEUE_ASYNC off)
+            pp_value = get_pp_for_params(
+                beatmap,
+                accuracy=accuracy,
+                misses=count_miss,
+                lazer=True,
+                mods=mods
+            )
         
         if pp_value is None:
             return Response({'error': 'Failed to calculate PP'}, status=500)
@@ -1138,7 +1370,7 @@ def calculate_pp(request):
             'accuracy': accuracy,
             'count_100': count_100,
             'count_50': count_50,
-            'count_miss': count_miss
+            'count_miss': count_miss,
         })
         
     except Exception as e:
@@ -9,6 +9,7 @@ were removed.
 # ---------------------------------------------------------------------------
 # Standard library imports
 # ---------------------------------------------------------------------------
+import json
 import logging
 import re
 
@@ -17,8 +18,14 @@ import re
 # ---------------------------------------------------------------------------
 from django.db.models import Count
 from django.db import transaction
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.cache import never_cache
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_POST, require_GET
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -26,8 +33,8 @@ from django.contrib import messages
 # ---------------------------------------------------------------------------
 # Local application imports
 # ---------------------------------------------------------------------------
-from ..models import Beatmap, TagApplication
-from ..fetch_genre import fetch_genres, get_or_create_genres  # genre helpers
+from ..models import Beatmap, ComputeJob, TagApplication
+from ..fetch_genre import apply_cached_genres  # genre cache helper
 from .auth import api  # shared Ossapi instance
 from .secrets import redirect_uri, logger
 from .shared import (
@@ -38,7 +45,12 @@ from .shared import (
     build_similar_maps_query,
     format_length_hms,
 )
-from ..helpers.rosu_utils import get_or_compute_timeseries, get_or_compute_pp, get_or_compute_modded_pps
+from ..helpers.compute_queue import async_enabled, compute_job_payload, enqueue_compute_job
+from ..helpers.rosu_utils import (
+    get_or_compute_timeseries, get_or_compute_pp, get_or_compute_modded_pps,
+    timeseries_etag, timeseries_supported,
+)
+from ..helpers.storage import write_bytes as storage_write_bytes
 from ..helpers.timestamps import consensus_intervals, normalize_intervals
 from rest_framework.authtoken.models import Token
 from django.core.cache import cache
@@ -92,7 +104,7 @@ def beatmap_detail(request, beatmap_id):
     filters_to_apply = derive_filters_from_tags(top_tags)
 
     # Build the query string and extra params
-    similar_query, extra_params = build_similar_maps_query(filters_to_apply, windows, tags_query_string)
+    similar_query, extra_params = build_similar_maps_query(filters_to_apply, windows, tags_query_string, similar_to=beatmap.beatmap_id)
 
 
 
@@ -126,19 +138,30 @@ def beatmap_detail(request, beatmap_id):
 
 
 @require_GET
+@gzip_page
 def beatmap_timeseries(request, beatmap_id: int):
     """Return cached or computed rosu difficulty time-series for a beatmap.
 
     Query params:
-      - window_s: int seconds for binning (default 1)
+      - window_s: int seconds for binning (default 1, clamped to 1..60)
       - mods: comma-free acronyms, e.g., "DT", "HR", "EZ", "HT", "FL"; combinations allowed,
               but mutually exclusive groups DT/HT and HR/EZ will be resolved by keeping the last.
+
+    Responses carry a deterministic ETag, Last-Modified and a public max-age
+    (settings.TIMESERIES_CACHE_MAX_AGE); conditional requests get a 304 before any
+    strain data is read. With settings.TIMESERIES_REDIRECT_TO_STORAGE the payload is
+    written once to an ETag-named JSON object and clients are redirected to its storage
+    URL (the bucket needs CORS for the front end's fetch).
+
+    A series that has not been computed yet is queued (see helpers.compute_queue) and
+    answered with 202 plus a poll URL; clients retry the same URL once the job is done.
     """
     beatmap = get_object_or_404(Beatmap, beatmap_id=str(beatmap_id))
     try:
         window_s = int(request.GET.get("window_s", 1))
     except Exception:
         window_s = 1
+    window_s = max(1, min(window_s, 60))
     raw_mods = (request.GET.get("mods", "") or "").upper().strip()
     # Normalise mods string: keep only supported DT/HT/HR/EZ/FL; drop incompatible duplicates
     allowed = ["DT", "HT", "HR", "EZ", "FL"]
@@ -164,10 +187,79 @@ def beatmap_timeseries(request, beatmap_id: int):
                 seen.add(token)
                 mods_out.append(token)
     mods_str = "".join(mods_out) or None
-    ts = get_or_compute_timeseries(beatmap, window_seconds=window_s, mods=mods_str)
+
+    # Conditional GET: the ETag is derived from ids/versions, so a 304 needs no strain data
+    etag = timeseries_etag(beatmap, window_s, mods_str)
+    last_modified = beatmap.last_updated.timestamp() if beatmap.last_updated else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _with_timeseries_cache_headers(not_modified, etag, last_modified)
+
+    # Optional: hand the bytes off to storage/CDN via an immutable, ETag-named JSON object
+    redirect_enabled = getattr(settings, 'TIMESERIES_REDIRECT_TO_STORAGE', False)
+    if redirect_enabled:
+        cached_url = cache.get(f'ts_url:{etag}')
+        if cached_url:
+            return _with_timeseries_cache_headers(HttpResponseRedirect(cached_url), etag, last_modified)
+
+    if async_enabled() and timeseries_supported(beatmap):
+        # Never download/compute in the request thread: a missing blob becomes a queued job
+        ts = get_or_compute_timeseries(beatmap, window_seconds=window_s, mods=mods_str, build=False)
+        if ts is None:
+            job = enqueue_compute_job(ComputeJob.KIND_TIMESERIES, beatmap, mods=mods_str)
+            if job.status != ComputeJob.STATUS_ERROR:
+                return _compute_job_accepted(job)
+    else:
+        ts = get_or_compute_timeseries(beatmap, window_seconds=window_s, mods=mods_str)
     if ts is None:
         return JsonResponse({"detail": "Timeseries unavailable"}, status=404)
-    return JsonResponse(ts, safe=False)
+    # Compact, key-sorted JSON so identical series serialise to identical bytes
+    dumps_params = {"separators": (",", ":"), "sort_keys": True}
+
+    if redirect_enabled:
+        try:
+            digest = etag.strip('"')
+            key = f"beatmaps/timeseries/{beatmap.beatmap_id}/json/{digest}.json"
+            storage_write_bytes(key, json.dumps(ts, **dumps_params).encode("utf-8"))
+            url = default_storage.url(key)
+            cache.set(f'ts_url:{etag}', url, 24 * 3600)
+            return _with_timeseries_cache_headers(HttpResponseRedirect(url), etag, last_modified)
+        except Exception:
+            # Fall back to serving the payload directly
+            pass
+
+    response = JsonResponse(ts, safe=False, json_dumps_params=dumps_params)
+    return _with_timeseries_cache_headers(response, etag, last_modified)
+
+
+def _compute_job_accepted(job):
+    """202 pointing at the job's poll URL; never cached, so the client re-asks once it is done."""
+    payload = compute_job_payload(job)
+    response = JsonResponse(payload, status=202)
+    response['Location'] = payload['poll_url']
+    response['Retry-After'] = str(payload['retry_after'])
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+@require_GET
+@never_cache
+def compute_job_status(request, job_id):
+    """Poll endpoint for queued timeseries/PP computations."""
+    job = get_object_or_404(ComputeJob, id=job_id)
+    return JsonResponse(compute_job_payload(job))
+
+
+def _with_timeseries_cache_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=int(getattr(settings, 'TIMESERIES_CACHE_MAX_AGE', 86400)),
+    )
+    return response
 
 
 @require_POST
@@ -373,18 +465,9 @@ def update_beatmap_info(request):
             beatmap.save()
         logger.info(f'Saved Beatmap with ID: {beatmap_id}')
 
-        genres = fetch_genres(beatmap.artist, beatmap.title)
-        logger.debug(f"Fetched genres for Beatmap '{beatmap_id}': {genres}")
-
-        if genres:
-            genre_objects = get_or_create_genres(genres)
-            beatmap.genres.set(genre_objects)
-            logger.info(f"Associated genres {genres} with Beatmap '{beatmap_id}'.")
-        else:
-            logger.info(
-                f"No genres found for Beatmap '{beatmap_id}'. Clearing existing genres."
-            )
-            beatmap.genres.clear()
+        # Genres come from the cache only; misses are filled by the enrich_genres worker
+        if not apply_cached_genres(beatmap):
+            logger.info(f"Genres for Beatmap '{beatmap_id}' queued for lookup.")
 
         return JsonResponse({'message': 'Beatmap info updated successfully.'})
 
@@ -491,13 +574,9 @@ def quick_add_beatmap(request):
         except Exception:
             pass
 
-        # Update genres
+        # Update genres from the cache (misses are enqueued for the enrich_genres worker)
         try:
-            genres = fetch_genres(beatmap.artist, beatmap.title)
-            if genres:
-                beatmap.genres.set(get_or_create_genres(genres))
-            else:
-                beatmap.genres.clear()
+            apply_cached_genres(beatmap)
         except Exception:
             # Non-fatal
             pass
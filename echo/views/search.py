@@ -41,6 +41,8 @@ from django.db.models import (
     FloatField,
     ExpressionWrapper,
     FilteredRelation,
+    Case,
+    When,
 )
 from django.db.models.functions import Coalesce, Now, Greatest
 from django.shortcuts import render, redirect
@@ -56,6 +58,7 @@ from .shared import (
     compute_attribute_windows,
     derive_filters_from_tags,
     build_similar_maps_query,
+    attribute_window_q,
 )
 from ..operators import (
     handle_quotes,
@@ -66,6 +69,10 @@ from ..operators import (
     build_phrase_q,
 )
 from ..utils import QueryContext
+
+# Results of a similar_to= search (top-k by tag-vector similarity)
+SIMILAR_RESULTS_LIMIT = 200
+
 # -------------------------- Search History Actions -------------------------- #
 
 from django.views.decorators.http import require_POST
@@ -397,6 +404,41 @@ def search_results(request):
             )
         return qs
 
+    def order_by_similarity(qs, seed, apply_windows):
+        """Rank qs by tag-vector similarity to the seed beatmap (similar_to= mode).
+
+        Without a query, qs is first narrowed to the seed's attribute windows for the
+        filters its top tags suggest, like the Find Similar Maps link does.
+        """
+        if apply_windows:
+            seed_tags = list(
+                TagApplication.objects
+                .filter(beatmap=seed, true_negative=False)
+                .values('tag__name')
+                .annotate(c=Count('id'))
+                .order_by('-c')
+                .values_list('tag__name', flat=True)[:10]
+            )
+            qs = qs.filter(attribute_window_q(compute_attribute_windows(seed), derive_filters_from_tags(seed_tags)))
+        try:
+            from ..helpers.tag_similarity import similar_beatmaps
+            ranked = similar_beatmaps(
+                Tag.normalize_mode(seed.mode), [seed.pk], SIMILAR_RESULTS_LIMIT,
+                candidates=qs.values_list('pk', flat=True),
+            )
+        except Exception:
+            ranked = []
+        if not ranked:
+            return qs.none()
+        return (
+            qs.filter(pk__in=[pk for pk, _ in ranked])
+            .annotate(
+                tag_weight=Case(*[When(pk=pk, then=Value(score)) for pk, score in ranked], output_field=FloatField()),
+                similar_rank=Case(*[When(pk=pk, then=Value(i)) for i, (pk, _) in enumerate(ranked)], output_field=IntegerField()),
+            )
+            .order_by('similar_rank')
+        )
+
     # -------------------------------------------------------------
     # Query parameter handling begins here.
     # -------------------------------------------------------------
@@ -426,6 +468,7 @@ def search_results(request):
     star_min = star_min_raw
     star_max = star_max_raw
     sort = request.GET.get('sort', '')
+    similar_to = (request.GET.get('similar_to') or '').strip()
     exclude_player = (request.GET.get('exclude_player') or 'none').strip().lower()
     fetch_exclude_now = (request.GET.get('fetch_exclude_now') or '1').strip()
     requested_keys = (request.GET.get('keys') or '').strip()
@@ -584,6 +627,15 @@ def search_results(request):
     include_like_tags = sorted(set(include_tags or []) | set(required_tags or []))
     exact_tags = identify_exact_match_tags(include_like_tags, parsed_terms)
 
+    # similar_to=<beatmap_id>: rank the filtered maps by tag similarity to that beatmap
+    similar_seed = None
+    if similar_to.isdigit():
+        similar_seed = Beatmap.objects.filter(beatmap_id=similar_to).first()
+    if similar_seed is not None:
+        sort = 'tag_weight'
+    else:
+        similar_to = ''
+
     if sort not in ['tag_weight', 'popularity']:
         if not request.user.is_authenticated:
             # For unauthenticated users, prefer tag_weight by default
@@ -608,7 +660,9 @@ def search_results(request):
         params_snapshot.pop('keys', None)
     current_params_json = _json.dumps(params_snapshot, sort_keys=True)
 
-    if include_like_tags:
+    if similar_seed is not None:
+        beatmaps = order_by_similarity(beatmaps, similar_seed, apply_windows=not query)
+    elif include_like_tags:
         # Use exact token-matched tags for weighting to avoid substring expansions
         # affecting scores when '.' is used. Gating was already applied earlier.
         beatmaps = annotate_and_order_beatmaps(beatmaps, exact_tags, exact_tags, sort, predicted_mode)
@@ -653,6 +707,19 @@ def search_results(request):
 
     annotate_search_results_with_tags(page_obj.object_list, request.user, predicted_mode in ['include', 'only'])
 
+    # acc=/miss= searches: fill PP pills for the whole page from stored curves in one query
+    if pp_calc_params:
+        try:
+            from ..helpers.rosu_utils import pp_table_from_stored_curves
+            pp_calc_params = dict(pp_calc_params)
+            pp_calc_params['pp_values'] = pp_table_from_stored_curves(
+                page_obj.object_list,
+                accuracy=pp_calc_params.get('accuracy', 100.0),
+                misses=pp_calc_params.get('misses', 0),
+            )
+        except Exception:
+            pass
+
     # Attach derived, lightweight display fields only
     seen_high_confidence = False
     threshold_set = False
@@ -781,6 +848,8 @@ def search_results(request):
             'current_search_params_json': current_params_json,
             'mania_key_options': mania_key_options,
             'selected_keys': selected_keys,
+            'similar_to': similar_to,
+            'similar_seed': similar_seed,
         },
     )
 
@@ -1177,7 +1246,7 @@ def annotate_search_results_with_tags(beatmaps, user, include_predicted_toggle=F
         windows = compute_attribute_windows(bm)
         filters_to_apply = derive_filters_from_tags(top_tags)
         tags_query_string = ' '.join([f'"{t}"' if ' ' in t else t for t in top_tags])
-        similar_query, extra_params = build_similar_maps_query(filters_to_apply, windows, tags_query_string)
+        similar_query, extra_params = build_similar_maps_query(filters_to_apply, windows, tags_query_string, similar_to=bm.beatmap_id)
         bm.similar_query = similar_query
         bm.similar_extra_params = extra_params
     return beatmaps
@@ -1,5 +1,7 @@
 # echosu/views/shared.py
 
+from django.db.models import Q
+
 GAME_MODE_MAPPING = {
     'GameMode.OSU': 'osu',
     'GameMode.TAIKO': 'taiko',
@@ -150,20 +152,49 @@ def derive_filters_from_tags(tag_names):
     return suggested
 
 
-def build_similar_maps_query(filters_to_apply, windows, tags_query_string):
+# Beatmap field behind each attribute window of compute_attribute_windows
+ATTRIBUTE_WINDOW_FIELDS = {
+    'star': 'difficulty_rating',
+    'bpm': 'bpm',
+    'ar': 'ar',
+    'cs': 'cs',
+    'drain': 'drain',
+    'accuracy': 'accuracy',
+    'length': 'total_length',
+    'pp': 'pp_nomod',
+}
+
+
+def attribute_window_q(windows, filters_to_apply):
+    """Q restricting beatmaps to the given attribute windows (keys like derive_filters_from_tags).
+
+    Windows without numbers are skipped, like in build_similar_maps_query.
+    """
+    q = Q()
+    for key in filters_to_apply or []:
+        field = ATTRIBUTE_WINDOW_FIELDS.get(key)
+        lo, hi = windows.get(f'{key}_min'), windows.get(f'{key}_max')
+        if field and lo is not None and hi is not None:
+            q &= Q(**{f'{field}__gte': lo, f'{field}__lte': hi})
+    return q
+
+
+def build_similar_maps_query(filters_to_apply, windows, tags_query_string, similar_to=None):
     """Build the search URL parameters string for the Find Similar Maps link.
 
     filters_to_apply: iterable like {'bpm','ar','cs'}
     windows: dict from compute_attribute_windows
     tags_query_string: string of tags to include in the 'query=' parameter
+    similar_to: beatmap_id for the tag-vector similarity search mode; the tags
+        are then left out of the query and results ranked by similarity instead
 
     Returns a tuple (query_param, extra_params_dict)
     where query_param is a string suitable for 'query=' and extra_params_dict
     contains additional GET params such as star_min/star_max.
     """
     parts = []
-    # Always include tags if present
-    if tags_query_string:
+    # Include tags if present (similar_to ranks by the beatmap's tags itself)
+    if tags_query_string and not similar_to:
         parts.append(tags_query_string)
 
     # Comparison fragments use the syntax parsed by handle_attribute_queries
@@ -203,6 +234,8 @@ def build_similar_maps_query(filters_to_apply, windows, tags_query_string):
         'star_min': f"{float(windows.get('star_min', 0.0)):.2f}",
         'star_max': f"{float(windows.get('star_max', 10.0)):.2f}",
     }
+    if similar_to:
+        extra['similar_to'] = str(similar_to)
     return query, extra
 
 
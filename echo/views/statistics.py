@@ -15,7 +15,8 @@ from ossapi.enums import ScoreType, GameMode, UserBeatmapType, UserLookupKey
 # Django
 from django.db.models import Q, Count, F, Value, IntegerField, Subquery, OuterRef, Exists, Max
 from django.db.models.functions import Coalesce, TruncHour, TruncDate
-from django.http import HttpRequest, JsonResponse
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -26,44 +27,41 @@ from ..models import AnalyticsSearchEvent, AnalyticsClickEvent
 from collections import Counter
 from .auth import api
 from .shared import format_length_hms
-from ..helpers.rosu_utils import get_or_compute_pp
+from ..helpers.analytics_rollups import (
+    compute_hour_stats, followup_search_ids, query_contains_phrase, rollup_analytics, rollup_click_counts,
+    rollup_click_last_used, rollup_search_tag_counts, rollup_series, rollup_totals, rolled_until,
+    tokenize_query_terms,
+)
+from ..helpers.global_stats import get_global_stats_snapshot
+from ..helpers.histograms import star_histograms
+from ..helpers.mappers import beatmaps_by_mapper_id, mappers_by_beatmap
+from ..helpers.player_profiles import get_player_profile, most_related_beatmap_id, similar_beatmap_id
+from ..helpers.tag_bitsets import TagBitsetIndex
+from ..helpers.tag_cooccurrence import get_tag_cooccurrence, tag_data_version, tag_map_corpus
+from ..helpers.tag_map_cache import get_or_build_tag_map
+from ..helpers.tag_graph import mutual_knn_components, npmi_top_neighbors
+from ..helpers.rosu_utils import get_or_compute_pp, get_pp_curve
 from collections import defaultdict
 
 
-def _tokenize_query_terms(raw_query: str) -> set[str]:
-    terms: set[str] = set()
-    if not raw_query:
-        return terms
-    pattern = r'[-.]?"[^"]+"|[-.]?[^"\s]+'
-    for match in re.findall(pattern, raw_query):
-        token = match.strip()
-        if not token:
-            continue
-        if token[0] in '.-':
-            token = token[1:]
-        token = token.strip('"').strip("'").strip()
-        if token:
-            terms.add(token.lower())
-    return terms
-
-
-def _query_contains_phrase(raw_query: str, phrase_lower: str) -> bool:
-    if not (raw_query and phrase_lower):
-        return False
-    raw = raw_query.lower()
-    pattern = r'(^|[\s,.;:\-])' + re.escape(phrase_lower) + r'($|[\s,.;:\-])'
-    return re.search(pattern, raw) is not None
+OSU_USER_CACHE_SECONDS = 60 * 60
 
 
 def _resolve_osu_user(user_query: str) -> Tuple[int | None, str | None, str | None]:
     """Return (user_id, username, error_message). Accepts id or username."""
     if not user_query:
         return None, None, None
+    # osu! treats spaces and underscores in usernames alike
+    cache_key = 'osu_user:' + user_query.lower().replace(' ', '_')
+    cached = cache.get(cache_key)
+    if cached:
+        return cached[0], cached[1], None
     try:
         if user_query.isdigit():
             u = api.user(int(user_query), key=UserLookupKey.ID)
         else:
             u = api.user(user_query, key=UserLookupKey.USERNAME)
+        cache.set(cache_key, (int(u.id), str(u.username)), OSU_USER_CACHE_SECONDS)
         return int(u.id), str(u.username), None
     except Exception as exc:
         return None, None, f"Could not resolve user '{user_query}': {exc}"
@@ -170,76 +168,66 @@ def _compute_weighted_queryset(qs, include_tags: Iterable[str], exact_tags: Iter
     return qs
 
 
-def _attach_display_extras(beatmaps: Iterable[Beatmap]):
+def _attach_display_extras(beatmaps: Iterable[Beatmap], compute_pp: bool = True):
+    """Attach pp and formatted length; with compute_pp=False only stored PP is used (no rosu)."""
     for bm in beatmaps:
         try:
-            bm.pp = get_or_compute_pp(bm)
+            if compute_pp:
+                bm.pp = get_or_compute_pp(bm)
+            else:
+                curve = get_pp_curve(bm, build=False)
+                bm.pp = (curve.pp_at(100.0, 0) if curve is not None else None) or bm.pp_nomod
         except Exception:
             bm.pp = None
         bm.length_formatted = format_length_hms(getattr(bm, 'total_length', None))
     return beatmaps
 
 
-def _compute_player_stats(osu_id: int | None, source: str):
-    """Compute player tag distribution and most related map for given source.
-
-    Returns (labels, counts, most_related_beatmap_or_None)
-    """
-    if not osu_id:
-        return [], [], None
-
-    beatmaps_for_player = Beatmap.objects.none()
+def _fetch_player_beatmap_ids(osu_id: int, source: str) -> List[int] | None:
+    """Beatmap pks of a player's top 100 scores or favourite sets; None if the osu! API fails."""
     try:
         if source == 'top':
             scores = api.user_scores(osu_id, ScoreType.BEST, mode=GameMode.OSU, limit=100)
             ids = [str(getattr(s.beatmap, 'id', '')) for s in scores if getattr(s, 'beatmap', None)]
             ids = [i for i in ids if i]
-            if ids:
-                beatmaps_for_player = Beatmap.objects.filter(beatmap_id__in=ids)
+            beatmaps = Beatmap.objects.filter(beatmap_id__in=ids)
         else:  # 'fav'
             fav_sets = api.user_beatmaps(osu_id, UserBeatmapType.FAVOURITE, limit=100)
             set_ids = [str(getattr(bs, 'id', '')) for bs in fav_sets]
             set_ids = [i for i in set_ids if i]
-            if set_ids:
-                beatmaps_for_player = Beatmap.objects.filter(beatmapset_id__in=set_ids)
+            beatmaps = Beatmap.objects.filter(beatmapset_id__in=set_ids)
+        return list(beatmaps.order_by('pk').values_list('pk', flat=True))
     except Exception:
-        beatmaps_for_player = Beatmap.objects.none()
+        return None
+
 
-    if not beatmaps_for_player.exists():
+def _compute_player_stats(osu_id: int | None, source: str):
+    """Compute player tag distribution and most related map for given source.
+
+    The player's tags and median star rating come from the cached PlayerProfile; the
+    most related map is their nearest neighbour in the tag vector index.
+    Returns (labels, counts, most_related_beatmap_or_None)
+    """
+    if not osu_id:
         return [], [], None
 
-    rows = (
-        TagApplication.objects
-        .filter(beatmap__in=beatmaps_for_player, true_negative=False)
-        .values('tag__name')
-        .annotate(c=Count('id'))
-        .order_by('-c')[:15]
-    )
-    player_labels = [r['tag__name'] for r in rows if r['tag__name']]
-    player_counts = [int(r['c']) for r in rows]
+    profile = get_player_profile(osu_id, source, _fetch_player_beatmap_ids)
+    if profile is None or not profile.beatmap_ids:
+        return [], [], None
 
-    include_tags = player_labels
-    exact_tags = include_tags
+    player_labels = list(profile.tag_names or [])
+    player_counts = list(profile.tag_counts or [])
     most_related = None
-    if include_tags:
-        # Start with all beatmaps annotated by tag weight
-        annotated_all = _compute_weighted_queryset(Beatmap.objects.all(), include_tags, exact_tags, predicted_mode='include')
-
-        # Compute median star rating from the player's maps to guide similarity
-        stars = list(beatmaps_for_player.values_list('difficulty_rating', flat=True))
-        stars = [s for s in stars if s is not None]
-        if stars:
-            stars_sorted = sorted(stars)
-            n = len(stars_sorted)
-            median_star = stars_sorted[n//2] if n % 2 == 1 else (stars_sorted[n//2 - 1] + stars_sorted[n//2]) / 2.0
-            # Apply a reasonable star window around the median (±10% of median, min width 0.5)
-            delta = max(0.5, float(median_star) * 0.10)
-            star_min = max(0.0, float(median_star) - delta)
-            star_max = min(15.0, float(median_star) + delta)
-            annotated_all = annotated_all.filter(difficulty_rating__gte=star_min, difficulty_rating__lte=star_max)
-
-        most_related = annotated_all.order_by('-tag_weight').first()
-        _attach_display_extras([m for m in [most_related] if m])
+    if player_labels:
+        try:
+            related_id = similar_beatmap_id(profile)
+        except Exception:
+            related_id = None
+        if not related_id:
+            related_id = most_related_beatmap_id(player_labels, profile.median_star)
+        if related_id:
+            most_related = Beatmap.objects.filter(pk=related_id).first()
+        _attach_display_extras([m for m in [most_related] if m], compute_pp=False)
     return player_labels, player_counts, most_related
 
 
@@ -281,116 +269,18 @@ def statistics(request: HttpRequest):
     global_top_mappers = []
 
     try:
-        # Totals
-        ta_pos = TagApplication.objects.filter(true_negative=False)
-        global_total_applications = ta_pos.count()
-        global_maps_tagged_count = ta_pos.values('beatmap_id').distinct().count()
-        global_avg_tags_per_map = (float(global_total_applications) / global_maps_tagged_count) if global_maps_tagged_count else 0.0
-        global_predicted_applications = ta_pos.filter(user__isnull=True).count()
-
-        # Predicted-only maps
-        pred_only_ids = (
-            Beatmap.objects
-            .annotate(user_pos=Count('tagapplication', filter=Q(tagapplication__true_negative=False, tagapplication__user__isnull=False)))
-            .annotate(pred_pos=Count('tagapplication', filter=Q(tagapplication__true_negative=False, tagapplication__user__isnull=True)))
-            .filter(user_pos=0, pred_pos__gt=0)
-            .values_list('id', flat=True)
-        )
-        global_predicted_only_maps_count = len(list(pred_only_ids))
-
-        # Helper: bin list of stars into 0.25 width with final 14.75+
-        def bin_stars(stars_list: List[float]) -> tuple[list[str], list[int]]:
-            stars_list = [float(s) for s in stars_list if s is not None]
-            if not stars_list:
-                return [], []
-            bin_w = 0.25
-            upper_cap = 15.0
-            last_bin_start = upper_cap - bin_w  # 14.75
-            s_min = min(stars_list)
-            start_val = bin_w * math.floor(max(0.0, s_min) / bin_w)
-            # Bins up to and including 14.75, plus an overflow bin for 15.00+
-            num_base = int(round((last_bin_start - start_val) / bin_w)) + 1
-            if num_base < 1:
-                num_base = 1
-                start_val = last_bin_start
-            bins = [0] * (num_base + 1)  # extra overflow at the end
-            for s in stars_list:
-                if s >= upper_cap:
-                    idx = num_base  # overflow bin (15.00+)
-                else:
-                    idx = int(math.floor((s - start_val) / bin_w))
-                    if idx < 0:
-                        idx = 0
-                    if idx >= num_base:
-                        idx = num_base - 1
-                bins[idx] += 1
-            labels = [f"{(start_val + i * bin_w):.2f}" for i in range(num_base)]
-            labels.append(f"{upper_cap:.2f}+")
-            return labels, bins
-
-        # Global star distribution over ALL maps in DB (not only tagged)
-        all_stars = list(Beatmap.objects.values_list('difficulty_rating', flat=True))
-        global_star_hist_labels, global_star_hist_counts = bin_stars([float(s) for s in all_stars if s is not None])
-
-        # Human vs Predicted distributions
-        human_ids = list(
-            TagApplication.objects
-            .filter(true_negative=False, user__isnull=False)
-            .values_list('beatmap_id', flat=True)
-            .distinct()
-        )
-        pred_only_ids_list = list(pred_only_ids)
-        human_stars = list(Beatmap.objects.filter(id__in=human_ids).values_list('difficulty_rating', flat=True))
-        pred_only_stars = list(Beatmap.objects.filter(id__in=pred_only_ids_list).values_list('difficulty_rating', flat=True))
-
-        # Align bins between human and predicted using global labels as base if available
-        # If global labels not available, compute from human set
-        if global_star_hist_labels:
-            # Build mapping for index by start value (strip '+' for last)
-            def build_bins_with_labels(stars_list: List[float], labels: List[str]) -> List[int]:
-                bin_w = 0.25
-                # Extract start values
-                starts: List[float] = []
-                for i, lb in enumerate(labels):
-                    if lb.endswith('+'):
-                        starts.append(float(lb[:-1]))
-                    else:
-                        starts.append(float(lb))
-                counts = [0] * len(labels)
-                last_start = starts[-1]
-                for s in stars_list:
-                    if s is None:
-                        continue
-                    s = float(s)
-                    if s >= last_start:
-                        idx = len(labels) - 1
-                    else:
-                        idx = int(math.floor((s - starts[0]) / bin_w))
-                        if idx < 0:
-                            idx = 0
-                        if idx >= len(labels):
-                            idx = len(labels) - 1
-                    counts[idx] += 1
-                return counts
-
-            global_human_star_counts = build_bins_with_labels([float(s) for s in human_stars if s is not None], global_star_hist_labels)
-            global_pred_star_counts = build_bins_with_labels([float(s) for s in pred_only_stars if s is not None], global_star_hist_labels)
-        else:
-            # Fallback to independent binning
-            _, global_human_star_counts = bin_stars([float(s) for s in human_stars if s is not None])
-            _, global_pred_star_counts = bin_stars([float(s) for s in pred_only_stars if s is not None])
-
-        # Top mappers by distinct maps with human-applied tags
-        top_rows = (
-            TagApplication.objects
-            .filter(true_negative=False, user__isnull=False)
-            .values('beatmap__listed_owner')
-            .annotate(map_count=Count('beatmap_id', distinct=True))
-            .exclude(beatmap__listed_owner__isnull=True)
-            .exclude(beatmap__listed_owner='')
-            .order_by('-map_count', 'beatmap__listed_owner')[:25]
-        )
-        global_top_mappers = [{'listed_owner': r['beatmap__listed_owner'], 'count': int(r['map_count'])} for r in top_rows]
+        # One materialized row (see helpers.global_stats); refreshed periodically plus tag-write deltas
+        snapshot = get_global_stats_snapshot()
+        global_total_applications = snapshot.total_applications
+        global_maps_tagged_count = snapshot.maps_tagged_count
+        global_avg_tags_per_map = snapshot.avg_tags_per_map
+        global_predicted_applications = snapshot.predicted_applications
+        global_predicted_only_maps_count = snapshot.predicted_only_maps_count
+        global_star_hist_labels = snapshot.star_hist_labels
+        global_star_hist_counts = snapshot.star_hist_counts
+        global_human_star_counts = snapshot.human_star_counts
+        global_pred_star_counts = snapshot.pred_star_counts
+        global_top_mappers = snapshot.top_mappers
     except Exception:
         pass
 
@@ -430,50 +320,13 @@ def statistics(request: HttpRequest):
             with_consensus = user_apps.annotate(has_other=Exists(other_exists)).filter(has_other=True).count()
             my_consensus_rate = ((with_consensus / float(my_total_applications)) * 100.0) if my_total_applications else 0.0
 
-            # Star histogram (0.25 bins) over distinct maps you've tagged
-            # Cap at 15.0 and group anything >= 14.75 into the last ("14.75+") bin
-            # Important: count DISTINCT BEATMAPS, not distinct star values.
-            # First get distinct beatmap ids you've tagged, then fetch their stars.
-            id_list = list(
-                TagApplication.objects
-                .filter(user=request.user, true_negative=False)
-                .values_list('beatmap_id', flat=True)
-                .distinct()
-            )
-            stars = list(
-                Beatmap.objects
-                .filter(id__in=id_list)
-                .values_list('difficulty_rating', flat=True)
-            )
-            stars = [float(s) for s in stars if s is not None]
-            if stars:
-                bin_w = 0.25
-                upper_cap = 15.0
-                last_bin_start = upper_cap - bin_w  # 14.75
-                # Use observed minimum to keep chart compact
-                s_min = min(stars)
-                start_val = bin_w * math.floor(max(0.0, s_min) / bin_w)
-                # Number of bins from start_val up to and including [14.75, 15.0]
-                num_base = int(round((last_bin_start - start_val) / bin_w)) + 1
-                if num_base < 1:
-                    # If all data are >= 14.75, show that base bin plus overflow
-                    num_base = 1
-                    start_val = last_bin_start
-                bins = [0] * (num_base + 1)  # extra overflow bin for 15.00+
-                for s in stars:
-                    if s >= upper_cap:
-                        idx = num_base  # overflow
-                    else:
-                        idx = int(math.floor((s - start_val) / bin_w))
-                        if idx < 0:
-                            idx = 0
-                        if idx >= num_base:
-                            idx = num_base - 1
-                    bins[idx] += 1
-                labels = [f"{(start_val + i * bin_w):.2f}" for i in range(num_base)]
-                labels.append(f"{upper_cap:.2f}+")
-                my_star_hist_counts = bins
-                my_star_hist_labels = labels
+            # Star histogram (0.25 bins, 15.00+ overflow) over distinct maps you've tagged,
+            # bucketed by the database. Counts DISTINCT BEATMAPS, not applications.
+            my_maps = Beatmap.objects.filter(Exists(
+                TagApplication.objects.filter(beatmap_id=OuterRef('pk'), user=request.user, true_negative=False)
+            ))
+            my_star_hist_labels, my_star_counts = star_histograms(my_maps, {'mine': Q()})
+            my_star_hist_counts = my_star_counts['mine']
 
             # Most-tagged mappers (by distinct maps you've tagged)
             mapper_rows = (
@@ -570,9 +423,7 @@ def statistics(request: HttpRequest):
                 my_osu_id = None
 
             if my_osu_id:
-                user_maps_qs = Beatmap.objects.filter(
-                    listed_owner_id__regex=r'(^|,)\s*%s(\s*,|$)' % re.escape(str(my_osu_id))
-                )
+                user_maps_qs = beatmaps_by_mapper_id(my_osu_id)
                 my_mapper_has_maps = user_maps_qs.exists()
                 if my_mapper_has_maps:
                     try:
@@ -662,7 +513,7 @@ def statistics(request: HttpRequest):
         # -------------------- Mapper Statistics --------------------
         # Only consider maps where this user is the listed owner (by id).
         # Support CSV ids when multiple owners are present.
-        user_maps = Beatmap.objects.filter(listed_owner_id__regex=r'(^|,)\s*%s(\s*,|$)' % re.escape(str(osu_id)))
+        user_maps = beatmaps_by_mapper_id(osu_id)
 
         mapper_tag_rows = (
             TagApplication.objects
@@ -851,31 +702,85 @@ def statistics_latest_maps(request: HttpRequest):
     except Exception:
         return JsonResponse({ 'html': '' })
 
-class _UnionFind:
-    def __init__(self, items):
-        self.parent = {i: i for i in items}
-        self.rank = {i: 0 for i in items}
-
-    def find(self, x):
-        p = self.parent.get(x, x)
-        if p != x:
-            self.parent[x] = self.find(p)
-        return self.parent.get(x, x)
-
-    def union(self, a, b):
-        ra = self.find(a)
-        rb = self.find(b)
-        if ra == rb:
-            return
-        rka = self.rank.get(ra, 0)
-        rkb = self.rank.get(rb, 0)
-        if rka < rkb:
-            self.parent[ra] = rb
-        elif rka > rkb:
-            self.parent[rb] = ra
-        else:
-            self.parent[rb] = ra
-            self.rank[ra] = rka + 1
+
+# Advanced tuning overrides accepted by the tag map (public; bounded): name -> (type, min, max)
+_TAG_MAP_OVERRIDES = {
+    'tagsets_min_support': (int, 1, 50),
+    'tagsets_min_pair': (int, 1, 50),
+    'tagsets_edge_threshold': (float, 0.0, 1.0),
+    'tagsets_k': (int, 1, 80),
+    'tagsets_max_sets': (int, 2, 200),
+    'tagsets_max_set_size': (int, 2, 30),
+    'overlap_min_pair': (int, 1, 50),
+    'overlap_edge_threshold': (float, 0.0, 1.0),
+    'overlap_k': (int, 1, 80),
+    'overlap_max_sets': (int, 20, 400),
+    'overlap_macro_size': (int, 3, 10),
+    'overlap_seed_cores': (int, 10, 400),
+    'overlap_triads_per_node': (int, 1, 60),
+}
+
+
+def _tag_map_params(request: HttpRequest) -> dict:
+    """Parse tag map inputs (mirrors `tag_map.js`) into canonical, clamped values.
+
+    Floats are rounded to 0.01 so near-identical slider values share one cache entry.
+    """
+    def _number(key: str, cast):
+        try:
+            raw = (request.GET.get(key) or '').strip()
+            if not raw:
+                return None
+            value = float(raw)
+            if not math.isfinite(value):
+                return None
+            return int(value) if cast is int else round(value, 2)
+        except Exception:
+            return None
+
+    def _clamped(key: str, cast, lo, hi, default=None):
+        value = _number(key, cast)
+        if value is None:
+            return default
+        return max(lo, min(hi, value))
+
+    mode = Tag.normalize_mode((request.GET.get('mode') or Tag.MODE_STD).strip())
+    status_filter = (request.GET.get('status_filter') or 'ranked').strip().lower()
+    if status_filter not in ['ranked', 'unranked', 'all']:
+        status_filter = 'ranked'
+    view = (request.GET.get('view') or 'tagsets').strip().lower()
+    if view not in ['tagsets', 'single', 'overlap', 'crafted']:
+        view = 'tagsets'
+    params = {
+        'mode': mode,
+        'status_filter': status_filter,
+        'view': view,
+        'custom_tagset': ' '.join((request.GET.get('custom_tagset') or '').split()),
+        # Default consolidation (what the old slider % mapped to as value/100).
+        'consolidation': _clamped('consolidation', float, 0.0, 1.0, default=0.02),
+        'max_tags': _clamped('max_tags', int, 20, 400, default=150),
+        'max_mappers': _clamped('max_mappers', int, 10, 200, default=60),
+    }
+    for key, (cast, lo, hi) in _TAG_MAP_OVERRIDES.items():
+        params[key] = _clamped(key, cast, lo, hi)
+    return params
+
+
+def _tag_map_cache_key(params: dict) -> tuple:
+    """The parameters that affect the output of this request's view, in a fixed order."""
+    base = (params['mode'], params['status_filter'], params['max_mappers'])
+    if params['view'] == 'crafted':
+        return base + ('crafted',)
+    if params['custom_tagset']:
+        return base + ('custom', params['custom_tagset'].lower())
+    view = params['view']
+    prefix = f'{view}_'
+    # Tag picking (min support) is shared by the tagsets, overlap and single views
+    overrides = tuple(
+        (k, params[k]) for k in _TAG_MAP_OVERRIDES
+        if k.startswith(prefix) or k == 'tagsets_min_support'
+    )
+    return base + (view, params['consolidation'], params['max_tags']) + overrides
 
 
 def statistics_tag_map_data(request: HttpRequest):
@@ -892,916 +797,637 @@ def statistics_tag_map_data(request: HttpRequest):
     - **Consolidation slider**: Controls graph threshold / kNN density (higher = fewer, larger sectors).
     """
     try:
-        # ---- Parse inputs (mirrors `tag_map.js`) ----
-        mode = Tag.normalize_mode((request.GET.get('mode') or Tag.MODE_STD).strip())
-        status_filter = (request.GET.get('status_filter') or 'ranked').strip().lower()
-        if status_filter not in ['ranked', 'unranked', 'all']:
-            status_filter = 'ranked'
-        view = (request.GET.get('view') or 'tagsets').strip().lower()
-        if view not in ['tagsets', 'single', 'overlap', 'crafted']:
-            view = 'tagsets'
-        custom_tagset_raw = (request.GET.get('custom_tagset') or '').strip()
-        # Default consolidation (what the old slider % mapped to as value/100).
-        # Non-staff users are locked to this stable default.
-        consolidation = 0.02
-        CONS_STRICT_EPS = 0.01
-        CONS_MEGA_EPS = 0.99
+        params = _tag_map_params(request)
+        key = _tag_map_cache_key(params)
+        version = tag_data_version(params['mode'], params['status_filter'])
+        content = get_or_build_tag_map(key, version, lambda: _build_tag_map_data(params).content)
+        return HttpResponse(content, content_type='application/json')
+    except Exception:
+        return JsonResponse({'sets': []})
 
-        try:
-            max_tags = int((request.GET.get('max_tags') or '150').strip())
-        except Exception:
-            max_tags = 150
-        max_tags = max(20, min(400, max_tags))
 
-        try:
-            max_mappers = int((request.GET.get('max_mappers') or '60').strip())
-        except Exception:
-            max_mappers = 60
-        max_mappers = max(10, min(200, max_mappers))
+def _build_tag_map_data(params: dict) -> JsonResponse:
+    """Compute the tag map response for canonical parameters (see statistics_tag_map_data).
 
-        # Tuning overrides (public; client-side experimentation; not persisted)
-        try:
-            raw = (request.GET.get('consolidation') or '').strip()
-            if raw:
-                consolidation = float(raw)
-        except Exception:
-            pass
-        consolidation = max(0.0, min(1.0, consolidation))
-        try:
-            raw = (request.GET.get('max_tags') or '').strip()
-            if raw:
-                max_tags = int(raw)
-        except Exception:
-            pass
-        max_tags = max(20, min(400, max_tags))
+    Errors propagate so the response cache never stores a failed build.
+    """
+    mode = params['mode']
+    status_filter = params['status_filter']
+    view = params['view']
+    custom_tagset_raw = params['custom_tagset']
+    consolidation = params['consolidation']
+    CONS_STRICT_EPS = 0.01
+    CONS_MEGA_EPS = 0.99
+    max_tags = params['max_tags']
+    max_mappers = params['max_mappers']
+
+    tagsets_min_support_override = params['tagsets_min_support']
+    tagsets_min_pair_override = params['tagsets_min_pair']
+    tagsets_edge_threshold_override = params['tagsets_edge_threshold']
+    tagsets_k_override = params['tagsets_k']
+    tagsets_max_sets_override = params['tagsets_max_sets']
+    tagsets_max_set_size_override = params['tagsets_max_set_size']
+
+    overlap_min_pair_override = params['overlap_min_pair']
+    overlap_edge_threshold_override = params['overlap_edge_threshold']
+    overlap_k_override = params['overlap_k']
+    overlap_max_sets_override = params['overlap_max_sets']
+    overlap_macro_size_override = params['overlap_macro_size']
+    overlap_seed_cores_override = params['overlap_seed_cores']
+    overlap_triads_per_node_override = params['overlap_triads_per_node']
+
+    # ---- Base corpus (tag applications) ----
+    # Excludes explicit negatives and legacy rows; always includes both user-applied and
+    # predicted tags. Status buckets mirror search.py.
+    ta = tag_map_corpus(mode, status_filter)
+
+    # Support vector + sparse co-occurrence for this corpus, precomputed (helpers.tag_cooccurrence)
+    cooc = get_tag_cooccurrence(mode, status_filter)
+    total_maps = cooc.total_maps
+    if not total_maps:
+        return JsonResponse({'sets': []})
+
+    # ---- Crafted Map (manual sectors) ----
+    # NOTE: Crafted Map uses the same corpus filters (mode/status/etc) as the other views.
+    if view == 'crafted':
+        import os
+        crafted_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'crafted_tagmap.json')
+        crafted_path = os.path.normpath(crafted_path)
+        with open(crafted_path, 'r', encoding='utf-8') as f:
+            cfg = json.load(f) or {}
+
+        # Accept either top-level `modes` (preferred) or `schema.modes` (backwards-compatible).
+        mode_cfg = []
         try:
-            raw = (request.GET.get('max_mappers') or '').strip()
-            if raw:
-                max_mappers = int(raw)
+            mode_cfg = (cfg.get('modes') or {}).get(mode) or []
         except Exception:
-            pass
-        max_mappers = max(10, min(200, max_mappers))
-
-        # Optional advanced overrides (public; bounded)
-        def _opt_int(key: str) -> int | None:
-            try:
-                raw = (request.GET.get(key) or '').strip()
-                if not raw:
-                    return None
-                return int(float(raw))
-            except Exception:
-                return None
-
-        def _opt_float(key: str) -> float | None:
+            mode_cfg = []
+        if not mode_cfg:
             try:
-                raw = (request.GET.get(key) or '').strip()
-                if not raw:
-                    return None
-                return float(raw)
+                mode_cfg = ((cfg.get('schema') or {}).get('modes') or {}).get(mode) or []
             except Exception:
-                return None
-
-        tagsets_min_support_override = _opt_int('tagsets_min_support')
-        tagsets_min_pair_override = _opt_int('tagsets_min_pair')
-        tagsets_edge_threshold_override = _opt_float('tagsets_edge_threshold')
-        tagsets_k_override = _opt_int('tagsets_k')
-        tagsets_max_sets_override = _opt_int('tagsets_max_sets')
-        tagsets_max_set_size_override = _opt_int('tagsets_max_set_size')
-
-        overlap_min_pair_override = _opt_int('overlap_min_pair')
-        overlap_edge_threshold_override = _opt_float('overlap_edge_threshold')
-        overlap_k_override = _opt_int('overlap_k')
-        overlap_max_sets_override = _opt_int('overlap_max_sets')
-        overlap_macro_size_override = _opt_int('overlap_macro_size')
-        overlap_seed_cores_override = _opt_int('overlap_seed_cores')
-        overlap_triads_per_node_override = _opt_int('overlap_triads_per_node')
-
-        def _split_mappers(raw: str | None) -> list[str]:
-            """Split comma-separated mapper strings into individual mapper names."""
-            try:
-                s = (raw or '').strip()
-            except Exception:
-                s = ''
-            if not s:
-                return ['(unknown)']
-            parts = []
-            for p in s.split(','):
-                try:
-                    pp = (p or '').strip()
-                except Exception:
-                    pp = ''
-                if pp:
-                    parts.append(pp)
-            return parts or ['(unknown)']
-
-        # ---- Base corpus (tag applications) ----
-        # Exclude explicit negatives and "legacy" rows where user is null but not marked prediction.
-        ta = (
-            TagApplication.objects
-            .filter(true_negative=False, tag__mode=mode)
-            .exclude(user__isnull=True, is_prediction=False)
-        )
-
-        # Beatmap status filter (mirrors search.py buckets)
-        if status_filter == 'ranked':
-            ta = ta.filter(beatmap__status__in=['Ranked', 'Approved'])
-        elif status_filter == 'unranked':
-            ta = ta.filter(beatmap__status__in=['Graveyard', 'WIP', 'Pending', 'Qualified', 'Loved'])
-        else:
-            # all: no filter
-            pass
-
-        # NOTE: Predicted include/exclude has been removed from this visualization.
-        # We always include both user-applied and predicted tags (excluding explicit negatives / legacy rows).
-
-        total_maps = ta.values('beatmap_id').distinct().count()
-        if not total_maps:
-            return JsonResponse({'sets': []})
-
-        # ---- Crafted Map (manual sectors) ----
-        # NOTE: Crafted Map uses the same corpus filters (mode/status/etc) as the other views.
-        if view == 'crafted':
-            try:
-                import os
-                crafted_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'crafted_tagmap.json')
-                crafted_path = os.path.normpath(crafted_path)
-                with open(crafted_path, 'r', encoding='utf-8') as f:
-                    cfg = json.load(f) or {}
-
-                # Accept either top-level `modes` (preferred) or `schema.modes` (backwards-compatible).
                 mode_cfg = []
-                try:
-                    mode_cfg = (cfg.get('modes') or {}).get(mode) or []
-                except Exception:
-                    mode_cfg = []
-                if not mode_cfg:
-                    try:
-                        mode_cfg = ((cfg.get('schema') or {}).get('modes') or {}).get(mode) or []
-                    except Exception:
-                        mode_cfg = []
-                if not isinstance(mode_cfg, list):
-                    mode_cfg = []
-
-                # Resolve all tags referenced by crafted sectors
-                sector_defs: list[dict] = []
-                all_tag_names: set[str] = set()
-                for s in mode_cfg:
-                    if not isinstance(s, dict):
-                        continue
-                    tags = s.get('tags') or []
-                    if not isinstance(tags, list):
-                        continue
-                    tags_norm = [str(t).strip().lower() for t in tags if str(t).strip()]
-                    if not tags_norm:
-                        continue
-                    sector_defs.append({'id': str(s.get('id') or ''), 'tags': tags_norm})
-                    all_tag_names.update(tags_norm)
-
-                if not sector_defs:
-                    return JsonResponse({'sets': []})
-
-                tag_rows = list(Tag.objects.filter(mode=mode, name__in=list(all_tag_names)).values('id', 'name'))
-                name_to_id = {str(r['name']): int(r['id']) for r in tag_rows if r.get('name') and r.get('id')}
-
-                sector_tag_ids: list[list[int]] = []
-                sector_tag_names: list[list[str]] = []
-                sector_labels: list[str] = []
-                for s in sector_defs:
-                    tids = []
-                    tnames = []
-                    for nm in s['tags']:
-                        tid = name_to_id.get(nm)
-                        if tid:
-                            tids.append(int(tid))
-                            tnames.append(nm)
-                    if tids:
-                        sector_tag_ids.append(tids)
-                        sector_tag_names.append(tnames)
-                        sector_labels.append((s.get('id') or '').strip() or 'Sector')
-
-                if not sector_tag_ids:
-                    return JsonResponse({'sets': []})
-
-                # Membership rule (Crafted Map):
-                # A beatmap belongs to a sector if EITHER:
-                #  - >= 50% of the beatmap's tags are contained in the sector  (map-centric)
-                #  - >= 50% of the sector's tags are contained in the beatmap (sector-centric)
-                # Multiple-sector membership is allowed.
-                threshold = 0.60
-
-                all_ids = sorted({tid for lst in sector_tag_ids for tid in lst})
-                if not all_ids:
-                    return JsonResponse({'sets': []})
-
-                # Candidate beatmaps: any beatmap that has at least one crafted-sector tag.
-                candidate_bm_ids = list(
-                    ta.filter(tag_id__in=all_ids)
-                    .values_list('beatmap_id', flat=True)
-                    .distinct()
-                )
-                if not candidate_bm_ids:
-                    return JsonResponse({'sets': []})
-
-                # Total tag count per beatmap (denominator)
-                bm_total_tags: dict[int, int] = {
-                    int(r['beatmap_id']): int(r['cnt'])
-                    for r in (
-                        ta.filter(beatmap_id__in=candidate_bm_ids)
-                        .values('beatmap_id')
-                        .annotate(cnt=Count('tag_id', distinct=True))
-                    )
-                }
-
-                # Crafted-tag set per beatmap (numerator intersection computed against this)
-                bm_crafted_tags: dict[int, set[int]] = defaultdict(set)
-                tag_to_bm: dict[int, set[int]] = defaultdict(set)
-                for bm_id, tag_id in (
-                    ta.filter(beatmap_id__in=candidate_bm_ids, tag_id__in=all_ids)
-                    .values_list('beatmap_id', 'tag_id')
-                    .distinct()
-                    .iterator(chunk_size=5000)
-                ):
-                    bmid = int(bm_id)
-                    tid = int(tag_id)
-                    bm_crafted_tags[bmid].add(tid)
-                    tag_to_bm[tid].add(bmid)
-
-                if not bm_crafted_tags:
-                    return JsonResponse({'sets': []})
-
-                # Mapper lookup (supports comma-separated mappers)
-                mapper_by_bm: dict[int, list[str]] = {}
-                for row in Beatmap.objects.filter(id__in=candidate_bm_ids).values('id', 'listed_owner', 'creator'):
-                    bm_pk = int(row.get('id'))
-                    mapper_field = row.get('listed_owner') or row.get('creator') or ''
-                    mapper_by_bm[bm_pk] = _split_mappers(mapper_field)
-
-                sets = []
-                for si, tids in enumerate(sector_tag_ids):
-                    sector_set = set(int(t) for t in tids)
-                    if not sector_set:
-                        continue
-                    # Candidates for this sector: union of beatmaps that have any tag in the sector.
-                    cand_ids: set[int] = set()
-                    for t in sector_set:
-                        cand_ids.update(tag_to_bm.get(int(t)) or set())
-                    if not cand_ids:
-                        continue
-
-                    chosen: list[int] = []
-                    m_ctr: Counter[str] = Counter()
-                    for bm_id in cand_ids:
-                        total = int(bm_total_tags.get(int(bm_id)) or 0)
-                        if total <= 0:
-                            continue
-                        bm_set = (bm_crafted_tags.get(int(bm_id)) or set())
-                        overlap = 0
-                        for t in bm_set:
-                            if t in sector_set:
-                                overlap += 1
-                        if overlap <= 0:
-                            continue
-                        # map-centric: overlap / total tags on map
-                        cond_map = (float(overlap) / float(total)) >= threshold
-                        # sector-centric: overlap / total tags in sector
-                        denom_sector = float(len(sector_set) or 0)
-                        cond_sector = False
-                        if denom_sector > 0:
-                            cond_sector = (float(overlap) / denom_sector) >= threshold
-
-                        if cond_map or cond_sector:
-                            chosen.append(int(bm_id))
-                            for m in (mapper_by_bm.get(int(bm_id)) or ['(unknown)']):
-                                if m:
-                                    m_ctr[m] += 1
-
-                    if not chosen:
-                        continue
-                    sets.append({
-                        'id': int(si),
-                        'label': sector_labels[int(si)] if int(si) < len(sector_labels) else 'Sector',
-                        'tags': sector_tag_names[int(si)],
-                        'map_count': int(len(chosen)),
-                        'top_mappers': [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)],
-                    })
-
-                sets.sort(key=lambda s: int(s.get('map_count') or 0), reverse=True)
-                return JsonResponse({'sets': sets})
-            except Exception:
-                return JsonResponse({'sets': []})
+        if not isinstance(mode_cfg, list):
+            mode_cfg = []
+
+        # Resolve all tags referenced by crafted sectors
+        sector_defs: list[dict] = []
+        all_tag_names: set[str] = set()
+        for s in mode_cfg:
+            if not isinstance(s, dict):
+                continue
+            tags = s.get('tags') or []
+            if not isinstance(tags, list):
+                continue
+            tags_norm = [str(t).strip().lower() for t in tags if str(t).strip()]
+            if not tags_norm:
+                continue
+            sector_defs.append({'id': str(s.get('id') or ''), 'tags': tags_norm})
+            all_tag_names.update(tags_norm)
 
-        # ---- Custom tagset (exact intersection) ----
-        # Plain tag tokens only (quoted tags supported).
-        # Example: aim bursts "sharp angles"
-        if custom_tagset_raw:
-            try:
-                include_names: list[str] = []
-                # We intentionally do NOT support '.' / '-' operators here.
-                # We still strip a leading '.' or '-' if the user types it, treating it as part of the tag token.
-                pattern = r'[-.]?"[^"]+"|[-.]?[^"\s]+'
-                for match in re.findall(pattern, custom_tagset_raw):
-                    token = (match or '').strip()
-                    if not token:
-                        continue
-                    if token[0] in '.-':
-                        token = token[1:]
-                    token = token.strip().strip('"').strip("'").strip().lower()
-                    if not token:
-                        continue
-                    include_names.append(token)
+        if not sector_defs:
+            return JsonResponse({'sets': []})
 
-                include_names = [t for t in include_names if t]
+        tag_rows = list(Tag.objects.filter(mode=mode, name__in=list(all_tag_names)).values('id', 'name'))
+        name_to_id = {str(r['name']): int(r['id']) for r in tag_rows if r.get('name') and r.get('id')}
+
+        sector_tag_ids: list[list[int]] = []
+        sector_tag_names: list[list[str]] = []
+        sector_labels: list[str] = []
+        for s in sector_defs:
+            tids = []
+            tnames = []
+            for nm in s['tags']:
+                tid = name_to_id.get(nm)
+                if tid:
+                    tids.append(int(tid))
+                    tnames.append(nm)
+            if tids:
+                sector_tag_ids.append(tids)
+                sector_tag_names.append(tnames)
+                sector_labels.append((s.get('id') or '').strip() or 'Sector')
+
+        if not sector_tag_ids:
+            return JsonResponse({'sets': []})
 
-                # Resolve to tag IDs for this mode
-                include_tags = list(Tag.objects.filter(mode=mode, name__in=include_names).values_list('id', flat=True))
+        # Membership rule (Crafted Map):
+        # A beatmap belongs to a sector if EITHER:
+        #  - >= 50% of the beatmap's tags are contained in the sector  (map-centric)
+        #  - >= 50% of the sector's tags are contained in the beatmap (sector-centric)
+        # Multiple-sector membership is allowed.
+        threshold = 0.60
 
-                if include_tags:
-                    # Build beatmap set intersection for include tags
-                    bm_sets: list[set[int]] = []
-                    for tid in include_tags:
-                        ids = set(
-                            ta.filter(tag_id=int(tid))
-                            .values_list('beatmap_id', flat=True)
-                            .distinct()
-                        )
-                        if not ids:
-                            bm_sets = []
-                            break
-                        bm_sets.append(ids)
-
-                    if bm_sets:
-                        bm_sets.sort(key=lambda s: len(s))
-                        inter = set(bm_sets[0])
-                        for s in bm_sets[1:]:
-                            inter.intersection_update(s)
-                    else:
-                        inter = set()
-
-                    bm_ids = list(inter)
-                else:
-                    # No include tags => nothing meaningful to compute
-                    bm_ids = []
-
-                if not bm_ids:
-                    return JsonResponse({'sets': []})
-
-                mapper_by_bm: dict[int, list[str]] = {}
-                for row in Beatmap.objects.filter(id__in=bm_ids).values('id', 'listed_owner', 'creator'):
-                    bm_pk = int(row.get('id'))
-                    mapper_field = row.get('listed_owner') or row.get('creator') or ''
-                    mapper_by_bm[bm_pk] = _split_mappers(mapper_field)
-
-                m_ctr: Counter[str] = Counter()
-                for bid in bm_ids:
-                    for m in (mapper_by_bm.get(int(bid)) or ['(unknown)']):
-                        if m:
-                            m_ctr[m] += 1
+        all_ids = sorted({tid for lst in sector_tag_ids for tid in lst})
+        if not all_ids:
+            return JsonResponse({'sets': []})
 
-                tags_out = include_names[:]  # display as typed (normalized)
-                sets = [{
-                    'id': 0,
-                    'tags': tags_out,
-                    'map_count': int(len(bm_ids)),
-                    'top_mappers': [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)],
-                }]
-                return JsonResponse({'sets': sets})
-            except Exception:
-                return JsonResponse({'sets': []})
-
-        # ---- Pick candidate tags (support filter) ----
-        # Lower consolidation (more fragmented) => require higher support to avoid noisy micro-sectors.
-        min_support = max(2, int(round(3 + 12 * (1.0 - consolidation))))  # 3..15
-        if tagsets_min_support_override is not None:
-            min_support = max(1, min(50, int(tagsets_min_support_override)))
-
-        support_rows = list(
-            ta.values('tag_id')
-            .annotate(cnt=Count('beatmap_id', distinct=True))
-            .order_by('-cnt')[: max_tags * 3]
+        # Candidate beatmaps: any beatmap that has at least one crafted-sector tag.
+        candidate_bm_ids = list(
+            ta.filter(tag_id__in=all_ids)
+            .values_list('beatmap_id', flat=True)
+            .distinct()
         )
-        picked = [(int(r['tag_id']), int(r['cnt'])) for r in support_rows if int(r.get('cnt') or 0) >= min_support]
-        if len(picked) < min(25, max_tags):
-            # Fallback: if corpus is sparse, still show *something*.
-            picked = [(int(r['tag_id']), int(r['cnt'])) for r in support_rows[:max_tags]]
-
-        picked = picked[:max_tags]
-        tag_support: dict[int, int] = {tid: cnt for tid, cnt in picked}
-        tag_ids: list[int] = list(tag_support.keys())
-        if not tag_ids:
+        if not candidate_bm_ids:
             return JsonResponse({'sets': []})
 
-        tag_name_map: dict[int, str] = {
-            int(t['id']): str(t['name'])
-            for t in Tag.objects.filter(id__in=tag_ids).values('id', 'name')
+        # Total tag count per beatmap (denominator)
+        bm_total_tags: dict[int, int] = {
+            int(r['beatmap_id']): int(r['cnt'])
+            for r in (
+                ta.filter(beatmap_id__in=candidate_bm_ids)
+                .values('beatmap_id')
+                .annotate(cnt=Count('tag_id', distinct=True))
+            )
         }
 
-        # ---- Beatmap -> tag list (restricted to picked tags) ----
-        bm_tags: dict[int, list[int]] = defaultdict(list)
-        pair_qs = (
-            ta.filter(tag_id__in=tag_ids)
+        # Crafted-tag set per beatmap (numerator intersection computed against this)
+        bm_crafted_tags: dict[int, set[int]] = defaultdict(set)
+        tag_to_bm: dict[int, set[int]] = defaultdict(set)
+        for bm_id, tag_id in (
+            ta.filter(beatmap_id__in=candidate_bm_ids, tag_id__in=all_ids)
             .values_list('beatmap_id', 'tag_id')
             .distinct()
             .iterator(chunk_size=5000)
-        )
-        for bm_id, tag_id in pair_qs:
-            try:
-                bm_tags[int(bm_id)].append(int(tag_id))
-            except Exception:
-                continue
+        ):
+            bmid = int(bm_id)
+            tid = int(tag_id)
+            bm_crafted_tags[bmid].add(tid)
+            tag_to_bm[tid].add(bmid)
 
-        if not bm_tags:
+        if not bm_crafted_tags:
             return JsonResponse({'sets': []})
 
-        # ---- Overlapping tagset view ----
-        # Goal: allow a beatmap to belong to *multiple* tagsets (e.g., a 5-tag "macro" set and a 2-tag subset).
-        # We do this by generating overlapping tagsets (macro cores + strong pairs) and computing support by
-        # intersection of tag->beatmap sets. This means total sector area can exceed "total maps" (by design).
-        if view == 'overlap':
-            # Build inverted index: tag -> set(beatmap_ids)
-            tag_to_bm: dict[int, set[int]] = {int(t): set() for t in tag_ids}
-            for bm_id, tags in bm_tags.items():
-                for tid in set(tags or []):
-                    if tid in tag_to_bm:
-                        tag_to_bm[tid].add(int(bm_id))
-
-            # Mapper lookup for all beatmaps once
-            bm_ids_all = list(bm_tags.keys())
-            mapper_by_bm: dict[int, list[str]] = {}
-            for row in Beatmap.objects.filter(id__in=bm_ids_all).values('id', 'listed_owner', 'creator'):
-                bm_pk = int(row.get('id'))
-                mapper_field = row.get('listed_owner') or row.get('creator') or ''
-                mapper_by_bm[bm_pk] = _split_mappers(mapper_field)
-
-            # Thresholds tuned similarly to tagsets.
-            # For overlap mode we want *many* candidate relationships so we can build lots of 3–10 tag sets.
-            min_pair = max(2, int(round(2 + 6 * (1.0 - consolidation))))  # 2..8
-            edge_threshold = max(0.02, 0.30 - (0.24 * consolidation))
-            k = max(6, min(40, int(round(10 + 22 * consolidation))))
-            if overlap_min_pair_override is not None:
-                min_pair = max(1, min(50, int(overlap_min_pair_override)))
-            if overlap_edge_threshold_override is not None:
-                edge_threshold = max(0.0, min(1.0, float(overlap_edge_threshold_override)))
-            if overlap_k_override is not None:
-                k = max(1, min(80, int(overlap_k_override)))
-
-            # Co-occurrence counts + neighbor lists (same as tagsets path)
-            pair_counts: Counter[tuple[int, int]] = Counter()
-            for tags in bm_tags.values():
-                if not tags or len(tags) < 2:
-                    continue
-                uniq = sorted(set(tags))
-                if len(uniq) < 2:
-                    continue
-                for i in range(len(uniq)):
-                    a = uniq[i]
-                    for j in range(i + 1, len(uniq)):
-                        b = uniq[j]
-                        pair_counts[(a, b)] += 1
-
-            eps = 1e-12
-            neigh: dict[int, list[tuple[int, float, int]]] = defaultdict(list)
-            for (a, b), c in pair_counts.items():
-                if c < min_pair:
-                    continue
-                ca = tag_support.get(a) or 0
-                cb = tag_support.get(b) or 0
-                if not ca or not cb:
-                    continue
-                pab = float(c) / float(total_maps)
-                if pab <= 0.0:
-                    continue
-                pa = float(ca) / float(total_maps)
-                pb = float(cb) / float(total_maps)
-                try:
-                    pmi = math.log((pab + eps) / ((pa * pb) + eps))
-                    denom = -math.log(pab + eps)
-                    npmi = float(pmi / denom) if denom > 0 else 0.0
-                except Exception:
-                    continue
-                if npmi < edge_threshold:
-                    continue
-                neigh[int(a)].append((int(b), npmi, int(c)))
-                neigh[int(b)].append((int(a), npmi, int(c)))
-
-            top: dict[int, list[tuple[int, float, int]]] = {}
-            for t, lst in neigh.items():
-                lst.sort(key=lambda x: (x[1], x[2]), reverse=True)
-                top[t] = lst[:k]
-
-            # Build macro components (mutual-kNN union-find), then create "macro cores" using a seed + strongest neighbors.
-            top_set: dict[int, set[int]] = {t: {o for (o, _, _) in lst} for t, lst in top.items()}
-            uf = _UnionFind(tag_ids)
-            for a, lst in top.items():
-                aset = top_set.get(a) or set()
-                for b, _, _ in lst:
-                    if b in aset and a in (top_set.get(b) or set()):
-                        uf.union(a, b)
-            comps: dict[int, list[int]] = defaultdict(list)
-            for tid in tag_ids:
-                comps[int(uf.find(tid))].append(int(tid))
-
-            components = sorted(
-                comps.values(),
-                key=lambda comp: sum(int(tag_support.get(t) or 0) for t in comp),
-                reverse=True,
-            )
-
-            # Create overlapping tagsets (3..10 tags per set).
-            # We intentionally generate MANY sets:
-            # - seed-cores: one per seed tag (seed + strongest neighbors, then fill within component)
-            # - triads: (a,b) strong edge plus a shared neighbor c
-            macro_min_size = 3
-            macro_size = 10
-            max_sets_total = max(80, min(220, int(round(140 + 80 * (1.0 - consolidation)))))
-            if overlap_max_sets_override is not None:
-                max_sets_total = max(20, min(400, int(overlap_max_sets_override)))
-            if overlap_macro_size_override is not None:
-                macro_size = max(3, min(10, int(overlap_macro_size_override)))
-
-            tagsets: list[list[int]] = []
-            seen: set[tuple[int, ...]] = set()
-
-            # Build helper: component membership lookup so we can fill cores "within component"
-            comp_index_by_tag: dict[int, int] = {}
-            for ci, comp in enumerate(components):
-                for t in comp:
-                    comp_index_by_tag[int(t)] = int(ci)
-
-            # Seeds: favor high-support tags; generate one core per seed tag
-            seeds = sorted(tag_ids, key=lambda t: int(tag_support.get(int(t)) or 0), reverse=True)
-            max_seed_cores = max(60, min(200, int(round(110 + 80 * (1.0 - consolidation)))))
-            if overlap_seed_cores_override is not None:
-                max_seed_cores = max(10, min(400, int(overlap_seed_cores_override)))
-            for seed in seeds[:max_seed_cores]:
-                seed = int(seed)
-                comp = None
-                try:
-                    comp = components[int(comp_index_by_tag.get(seed, 0))]
-                except Exception:
-                    comp = None
-                comp_set = set(comp) if comp else set()
-
-                core = [seed]
-                for o, _, _ in (top.get(seed) or []):
-                    oo = int(o)
-                    if comp_set and oo not in comp_set:
-                        continue
-                    if oo not in core:
-                        core.append(oo)
-                    if len(core) >= macro_size:
-                        break
+        # Mapper lookup (supports comma-separated mappers)
+        mapper_by_bm = mappers_by_beatmap(candidate_bm_ids)
 
-                # Fill from within component by support if needed
-                if len(core) < macro_size and comp:
-                    comp_sorted = sorted(comp, key=lambda t: int(tag_support.get(int(t)) or 0), reverse=True)
-                    for t in comp_sorted:
-                        tt = int(t)
-                        if tt not in core:
-                            core.append(tt)
-                        if len(core) >= macro_size:
-                            break
+        sets = []
+        for si, tids in enumerate(sector_tag_ids):
+            sector_set = set(int(t) for t in tids)
+            if not sector_set:
+                continue
+            # Candidates for this sector: union of beatmaps that have any tag in the sector.
+            cand_ids: set[int] = set()
+            for t in sector_set:
+                cand_ids.update(tag_to_bm.get(int(t)) or set())
+            if not cand_ids:
+                continue
 
-                sig = tuple(sorted(set(core)))
-                if len(sig) < macro_min_size:
+            chosen: list[int] = []
+            m_ctr: Counter[str] = Counter()
+            for bm_id in cand_ids:
+                total = int(bm_total_tags.get(int(bm_id)) or 0)
+                if total <= 0:
                     continue
-                if sig in seen:
+                bm_set = (bm_crafted_tags.get(int(bm_id)) or set())
+                overlap = 0
+                for t in bm_set:
+                    if t in sector_set:
+                        overlap += 1
+                if overlap <= 0:
                     continue
-                seen.add(sig)
-                tagsets.append(list(sig))
-                if len(tagsets) >= max_sets_total:
-                    break
+                # map-centric: overlap / total tags on map
+                cond_map = (float(overlap) / float(total)) >= threshold
+                # sector-centric: overlap / total tags in sector
+                denom_sector = float(len(sector_set) or 0)
+                cond_sector = False
+                if denom_sector > 0:
+                    cond_sector = (float(overlap) / denom_sector) >= threshold
+
+                if cond_map or cond_sector:
+                    chosen.append(int(bm_id))
+                    for m in (mapper_by_bm.get(int(bm_id)) or ['(unknown)']):
+                        if m:
+                            m_ctr[m] += 1
 
-            # Triads: for strong edges (a,b), add a shared neighbor c to make 3-tag sets.
-            # This replaces the old 2-tag pair sets while keeping the "fine-grained" signal.
-            if len(tagsets) < max_sets_total:
-                for a, lst in top.items():
-                    a = int(a)
-                    # Only consider a limited number of edges per node to bound cost
-                    triads_cap = min(18, len(lst or []))
-                    if overlap_triads_per_node_override is not None:
-                        triads_cap = max(1, min(60, int(overlap_triads_per_node_override)))
-                        triads_cap = min(triads_cap, len(lst or []))
-                    for b, _, _ in (lst or [])[:triads_cap]:
-                        b = int(b)
-                        if a == b:
-                            continue
-                        # Find shared neighbors
-                        na = [int(x[0]) for x in (top.get(a) or [])]
-                        nb = set(int(x[0]) for x in (top.get(b) or []))
-                        c = None
-                        for cand in na:
-                            if cand != a and cand != b and cand in nb:
-                                c = int(cand)
-                                break
-                        if c is None:
-                            continue
-                        sig = tuple(sorted((a, b, c)))
-                        if sig in seen:
-                            continue
-                        # Require real intersection support
-                        bm_a = tag_to_bm.get(a) or set()
-                        bm_b = tag_to_bm.get(b) or set()
-                        bm_c = tag_to_bm.get(c) or set()
-                        if not bm_a or not bm_b or not bm_c:
-                            continue
-                        base = bm_a
-                        if len(bm_b) < len(base):
-                            base = bm_b
-                        if len(bm_c) < len(base):
-                            base = bm_c
-                        inter3 = [bid for bid in base if (bid in bm_a and bid in bm_b and bid in bm_c)]
-                        if len(inter3) < min_pair:
-                            continue
-                        seen.add(sig)
-                        tagsets.append([a, b, c])
-                        if len(tagsets) >= max_sets_total:
-                            break
-                    if len(tagsets) >= max_sets_total:
-                        break
+            if not chosen:
+                continue
+            sets.append({
+                'id': int(si),
+                'label': sector_labels[int(si)] if int(si) < len(sector_labels) else 'Sector',
+                'tags': sector_tag_names[int(si)],
+                'map_count': int(len(chosen)),
+                'top_mappers': [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)],
+            })
 
-            # Build payload (intersection semantics: a map "fits" if it has *all* tags in the set)
-            sets = []
-            next_id = 0
-            for ts in tagsets:
-                # Compute intersection of bm sets
-                bm_sets = [tag_to_bm.get(int(t)) or set() for t in ts]
-                bm_sets = [s for s in bm_sets if s]
-                if len(bm_sets) != len(ts):
-                    continue
-                bm_sets.sort(key=lambda s: len(s))
-                base = bm_sets[0]
-                inter_ids = [bid for bid in base if all(bid in s for s in bm_sets[1:])]
-                if not inter_ids:
-                    continue
+        sets.sort(key=lambda s: int(s.get('map_count') or 0), reverse=True)
+        return JsonResponse({'sets': sets})
 
-                m_ctr: Counter[str] = Counter()
-                for bid in inter_ids:
-                    for m in (mapper_by_bm.get(int(bid)) or ['(unknown)']):
-                        if m:
-                            m_ctr[m] += 1
-                top_mappers = [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)]
-
-                tags_out = []
-                for tid in ts:
-                    nm = tag_name_map.get(int(tid))
-                    if nm:
-                        tags_out.append(nm)
-                if not tags_out:
-                    continue
+    # ---- Custom tagset (exact intersection) ----
+    # Plain tag tokens only (quoted tags supported).
+    # Example: aim bursts "sharp angles"
+    if custom_tagset_raw:
+        include_names: list[str] = []
+        # We intentionally do NOT support '.' / '-' operators here.
+        # We still strip a leading '.' or '-' if the user types it, treating it as part of the tag token.
+        pattern = r'[-.]?"[^"]+"|[-.]?[^"\s]+'
+        for match in re.findall(pattern, custom_tagset_raw):
+            token = (match or '').strip()
+            if not token:
+                continue
+            if token[0] in '.-':
+                token = token[1:]
+            token = token.strip().strip('"').strip("'").strip().lower()
+            if not token:
+                continue
+            include_names.append(token)
 
-                sets.append({
-                    'id': next_id,
-                    'tags': tags_out,
-                    'map_count': int(len(inter_ids)),
-                    'top_mappers': top_mappers,
-                })
-                next_id += 1
-
-            sets.sort(key=lambda s: int(s.get('map_count') or 0), reverse=True)
-            return JsonResponse({'sets': sets})
-
-        # ---- Single-tag view (non-disjoint; each tag is a sector sized by its own support) ----
-        # This intentionally "double counts" beatmaps across sectors when maps have multiple tags.
-        # That's OK for this visualization mode: you're inspecting tags directly.
-        if view == 'single':
-            bm_ids_all = list(bm_tags.keys())
-            if not bm_ids_all:
-                return JsonResponse({'sets': []})
-
-            mapper_by_bm: dict[int, list[str]] = {}
-            for row in Beatmap.objects.filter(id__in=bm_ids_all).values('id', 'listed_owner', 'creator'):
-                bm_pk = int(row.get('id'))
-                mapper_field = row.get('listed_owner') or row.get('creator') or ''
-                mapper_by_bm[bm_pk] = _split_mappers(mapper_field)
-
-            tag_map_counts: Counter[int] = Counter()
-            mapper_counts_by_tag: dict[int, Counter[str]] = defaultdict(Counter)
-            for bm_id, tags in bm_tags.items():
-                for tid in set(tags or []):
-                    tag_map_counts[int(tid)] += 1
-                    for mapper in (mapper_by_bm.get(int(bm_id)) or ['(unknown)']):
-                        if mapper:
-                            mapper_counts_by_tag[int(tid)][mapper] += 1
-
-            sets = []
-            next_id = 0
-            for tid, cnt in tag_map_counts.most_common():
-                name = tag_name_map.get(int(tid))
-                if not name:
-                    continue
-                m_ctr = mapper_counts_by_tag.get(int(tid)) or Counter()
-                top_mappers = [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)]
-                sets.append({
-                    'id': next_id,
-                    'tags': [name],
-                    'map_count': int(cnt),
-                    'top_mappers': top_mappers,
-                })
-                next_id += 1
-                # Respect the same max_sets logic (derived from consolidation) so payload stays bounded.
-                max_sets_single = max(6, min(120, int(round(18 + 90 * (1.0 - consolidation)))))
-                if len(sets) >= max_sets_single:
-                    break
+        include_names = [t for t in include_names if t]
 
-            return JsonResponse({'sets': sets})
+        # Resolve to tag IDs for this mode
+        include_tags = list(Tag.objects.filter(mode=mode, name__in=include_names).values_list('id', flat=True))
 
-        # ---- Hard extremes: sector definitions ----
-        # Note: we still keep disjoint beatmap assignment so the treemap area doesn't double-count maps.
-        if consolidation <= CONS_STRICT_EPS:
-            # One sector per tag (components = singletons)
-            components: list[list[int]] = [[int(t)] for t in tag_ids]
-        elif consolidation >= CONS_MEGA_EPS:
-            # One mega community
-            components = [list(tag_ids)]
+        if include_tags:
+            # One query for all include tags, intersected as bitsets
+            index = TagBitsetIndex.from_pairs(
+                ta.filter(tag_id__in=include_tags)
+                .values_list('beatmap_id', 'tag_id')
+                .distinct()
+                .iterator(chunk_size=5000)
+            )
+            bm_ids = index.beatmaps(include_tags)
         else:
-            components = []
-
-        # ---- Build co-occurrence counts ----
-        pair_counts: Counter[tuple[int, int]] = Counter()
-        if not components:
-            for tags in bm_tags.values():
-                if not tags or len(tags) < 2:
-                    continue
-                # dedupe within a map
-                uniq = sorted(set(tags))
-                if len(uniq) < 2:
-                    continue
-                for i in range(len(uniq)):
-                    a = uniq[i]
-                    for j in range(i + 1, len(uniq)):
-                        b = uniq[j]
-                        pair_counts[(a, b)] += 1
-
-        # ---- Build mutual-kNN NPMI graph (hub-resistant) ----
-        # Edge weight: NPMI in [-1, 1] (hub-resistant)
-        if not components:
-            # Consolidation high => lower threshold + larger k => bigger components.
-            NPMI_THRESH_AT_0 = 0.35
-            NPMI_THRESH_SLOPE = 0.30
-            NPMI_THRESH_MIN = 0.05
-            edge_threshold = max(NPMI_THRESH_MIN, NPMI_THRESH_AT_0 - (NPMI_THRESH_SLOPE * consolidation))
-
-            # Also require a minimum co-occurrence; lower consolidation => stricter (avoid spurious edges).
-            min_pair = max(2, int(round(2 + 8 * (1.0 - consolidation))))  # 2..10
-
-            # kNN fanout per node (mutual kNN to avoid mega hubs exploding everything)
-            k = max(3, min(24, int(round(4 + 14 * consolidation))))  # 4..18-ish (capped)
-            if tagsets_min_pair_override is not None:
-                min_pair = max(1, min(50, int(tagsets_min_pair_override)))
-            if tagsets_edge_threshold_override is not None:
-                edge_threshold = max(0.0, min(1.0, float(tagsets_edge_threshold_override)))
-            if tagsets_k_override is not None:
-                k = max(1, min(80, int(tagsets_k_override)))
-
-            eps = 1e-12
-            neigh: dict[int, list[tuple[int, float, int]]] = defaultdict(list)  # tag -> [(other, npmi, cooc)]
-            for (a, b), c in pair_counts.items():
-                if c < min_pair:
-                    continue
-                ca = tag_support.get(a) or 0
-                cb = tag_support.get(b) or 0
-                if not ca or not cb:
-                    continue
-                pab = float(c) / float(total_maps)
-                if pab <= 0.0:
-                    continue
-                pa = float(ca) / float(total_maps)
-                pb = float(cb) / float(total_maps)
+            # No include tags => nothing meaningful to compute
+            bm_ids = []
 
-                # PMI = log( P(a,b) / (P(a)P(b)) ); NPMI = PMI / -log(P(a,b))
-                try:
-                    pmi = math.log((pab + eps) / ((pa * pb) + eps))
-                    denom = -math.log(pab + eps)
-                    npmi = float(pmi / denom) if denom > 0 else 0.0
-                except Exception:
-                    continue
+        if not bm_ids:
+            return JsonResponse({'sets': []})
 
-                if npmi < edge_threshold:
-                    continue
+        mapper_by_bm = mappers_by_beatmap(bm_ids)
+
+        m_ctr: Counter[str] = Counter()
+        for bid in bm_ids:
+            for m in (mapper_by_bm.get(int(bid)) or ['(unknown)']):
+                if m:
+                    m_ctr[m] += 1
+
+        tags_out = include_names[:]  # display as typed (normalized)
+        sets = [{
+            'id': 0,
+            'tags': tags_out,
+            'map_count': int(len(bm_ids)),
+            'top_mappers': [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)],
+        }]
+        return JsonResponse({'sets': sets})
 
-                neigh[int(a)].append((int(b), npmi, int(c)))
-                neigh[int(b)].append((int(a), npmi, int(c)))
+    # ---- Pick candidate tags (support filter) ----
+    # Lower consolidation (more fragmented) => require higher support to avoid noisy micro-sectors.
+    min_support = max(2, int(round(3 + 12 * (1.0 - consolidation))))  # 3..15
+    if tagsets_min_support_override is not None:
+        min_support = max(1, min(50, int(tagsets_min_support_override)))
+
+    support_rows = cooc.top_tags(max_tags * 3)
+    picked = [(tid, cnt) for tid, cnt in support_rows if cnt >= min_support]
+    if len(picked) < min(25, max_tags):
+        # Fallback: if corpus is sparse, still show *something*.
+        picked = support_rows[:max_tags]
+
+    picked = picked[:max_tags]
+    tag_support: dict[int, int] = {tid: cnt for tid, cnt in picked}
+    tag_ids: list[int] = list(tag_support.keys())
+    if not tag_ids:
+        return JsonResponse({'sets': []})
 
-            # Keep only top-k neighbors per node
-            top: dict[int, list[tuple[int, float, int]]] = {}
-            top_set: dict[int, set[int]] = {}
-            for t, lst in neigh.items():
-                lst.sort(key=lambda x: (x[1], x[2]), reverse=True)  # by npmi then cooc
-                kept = lst[:k]
-                top[t] = kept
-                top_set[t] = {o for (o, _, _) in kept}
+    tag_name_map: dict[int, str] = {
+        int(t['id']): str(t['name'])
+        for t in Tag.objects.filter(id__in=tag_ids).values('id', 'name')
+    }
 
-            # Union mutual edges
-            uf = _UnionFind(tag_ids)
-            for a, lst in top.items():
-                aset = top_set.get(a) or set()
-                for b, _, _ in lst:
-                    if b in aset and a in (top_set.get(b) or set()):
-                        uf.union(a, b)
-
-            comps: dict[int, list[int]] = defaultdict(list)
-            for tid in tag_ids:
-                comps[int(uf.find(tid))].append(int(tid))
-
-            components = sorted(
-                comps.values(),
-                key=lambda comp: sum(int(tag_support.get(t) or 0) for t in comp),
-                reverse=True,
-            )
+    # ---- Beatmap -> tag list (restricted to picked tags), from the same stored corpus ----
+    bm_tags: dict[int, list[int]] = cooc.beatmap_tag_lists(tag_ids)
 
-        # Limit number of sectors: low consolidation => allow more sectors.
-        max_sets = max(6, min(80, int(round(12 + 48 * (1.0 - consolidation)))))  # 60..12
-        if tagsets_max_sets_override is not None:
-            max_sets = max(2, min(200, int(tagsets_max_sets_override)))
-        components = components[: max_sets * 3]
+    if not bm_tags:
+        return JsonResponse({'sets': []})
 
-        # ---- Assign each beatmap to exactly one component (avoid double-counting) ----
-        # Score = sum over tags in component of inv_log_support(tag)
-        inv_log_support: dict[int, float] = {}
-        for tid, cnt in tag_support.items():
+    # ---- Overlapping tagset view ----
+    # Goal: allow a beatmap to belong to *multiple* tagsets (e.g., a 5-tag "macro" set and a 2-tag subset).
+    # We do this by generating overlapping tagsets (macro cores + strong pairs) and computing support by
+    # intersection of tag->beatmap sets. This means total sector area can exceed "total maps" (by design).
+    if view == 'overlap':
+        # Inverted index: tag -> beatmap bitset
+        tag_index = TagBitsetIndex.from_tag_lists(bm_tags)
+
+        # Mapper lookup for all beatmaps once
+        bm_ids_all = list(bm_tags.keys())
+        mapper_by_bm = mappers_by_beatmap(bm_ids_all)
+
+        # Thresholds tuned similarly to tagsets.
+        # For overlap mode we want *many* candidate relationships so we can build lots of 3–10 tag sets.
+        min_pair = max(2, int(round(2 + 6 * (1.0 - consolidation))))  # 2..8
+        edge_threshold = max(0.02, 0.30 - (0.24 * consolidation))
+        k = max(6, min(40, int(round(10 + 22 * consolidation))))
+        if overlap_min_pair_override is not None:
+            min_pair = max(1, min(50, int(overlap_min_pair_override)))
+        if overlap_edge_threshold_override is not None:
+            edge_threshold = max(0.0, min(1.0, float(overlap_edge_threshold_override)))
+        if overlap_k_override is not None:
+            k = max(1, min(80, int(overlap_k_override)))
+
+        # NPMI neighbor lists over the precomputed co-occurrence (same as tagsets path),
+        # then macro components (mutual-kNN) used to create "macro cores" from a seed + strongest neighbors.
+        top = npmi_top_neighbors(cooc.pair_arrays(tag_ids), tag_support, total_maps, min_pair, edge_threshold, k)
+        components = mutual_knn_components(tag_ids, top, tag_support)
+
+        # Create overlapping tagsets (3..10 tags per set).
+        # We intentionally generate MANY sets:
+        # - seed-cores: one per seed tag (seed + strongest neighbors, then fill within component)
+        # - triads: (a,b) strong edge plus a shared neighbor c
+        macro_min_size = 3
+        macro_size = 10
+        max_sets_total = max(80, min(220, int(round(140 + 80 * (1.0 - consolidation)))))
+        if overlap_max_sets_override is not None:
+            max_sets_total = max(20, min(400, int(overlap_max_sets_override)))
+        if overlap_macro_size_override is not None:
+            macro_size = max(3, min(10, int(overlap_macro_size_override)))
+
+        tagsets: list[list[int]] = []
+        seen: set[tuple[int, ...]] = set()
+
+        # Build helper: component membership lookup so we can fill cores "within component"
+        comp_index_by_tag: dict[int, int] = {}
+        for ci, comp in enumerate(components):
+            for t in comp:
+                comp_index_by_tag[int(t)] = int(ci)
+
+        # Seeds: favor high-support tags; generate one core per seed tag
+        seeds = sorted(tag_ids, key=lambda t: int(tag_support.get(int(t)) or 0), reverse=True)
+        max_seed_cores = max(60, min(200, int(round(110 + 80 * (1.0 - consolidation)))))
+        if overlap_seed_cores_override is not None:
+            max_seed_cores = max(10, min(400, int(overlap_seed_cores_override)))
+        for seed in seeds[:max_seed_cores]:
+            seed = int(seed)
+            comp = None
             try:
-                inv_log_support[int(tid)] = 1.0 / max(1e-6, math.log(2.0 + float(cnt)))
+                comp = components[int(comp_index_by_tag.get(seed, 0))]
             except Exception:
-                inv_log_support[int(tid)] = 1.0
+                comp = None
+            comp_set = set(comp) if comp else set()
 
-        comp_by_tag: dict[int, int] = {}
-        for idx, comp in enumerate(components):
-            for tid in comp:
-                comp_by_tag[int(tid)] = idx
+            core = [seed]
+            for o, _, _ in (top.get(seed) or []):
+                oo = int(o)
+                if comp_set and oo not in comp_set:
+                    continue
+                if oo not in core:
+                    core.append(oo)
+                if len(core) >= macro_size:
+                    break
 
-        comp_bm_ids: dict[int, list[int]] = defaultdict(list)
-        for bm_id, tags in bm_tags.items():
-            if not tags:
+            # Fill from within component by support if needed
+            if len(core) < macro_size and comp:
+                comp_sorted = sorted(comp, key=lambda t: int(tag_support.get(int(t)) or 0), reverse=True)
+                for t in comp_sorted:
+                    tt = int(t)
+                    if tt not in core:
+                        core.append(tt)
+                    if len(core) >= macro_size:
+                        break
+
+            sig = tuple(sorted(set(core)))
+            if len(sig) < macro_min_size:
                 continue
-            scores: dict[int, float] = defaultdict(float)
-            for tid in set(tags):
-                ci = comp_by_tag.get(int(tid))
-                if ci is None:
-                    continue
-                scores[int(ci)] += float(inv_log_support.get(int(tid), 1.0))
-            if not scores:
+            if sig in seen:
                 continue
-            best_idx = max(scores.items(), key=lambda kv: kv[1])[0]
-            comp_bm_ids[int(best_idx)].append(int(bm_id))
-
-        # ---- Mapper counts per sector ----
-        all_assigned_ids: list[int] = []
-        for ids in comp_bm_ids.values():
-            all_assigned_ids.extend(ids)
-        if not all_assigned_ids:
-            return JsonResponse({'sets': []})
-
-        mapper_by_bm: dict[int, list[str]] = {}
-        for row in Beatmap.objects.filter(id__in=all_assigned_ids).values('id', 'listed_owner', 'creator'):
-            bm_pk = int(row.get('id'))
-            mapper_field = row.get('listed_owner') or row.get('creator') or ''
-            mapper_by_bm[bm_pk] = _split_mappers(mapper_field)
+            seen.add(sig)
+            tagsets.append(list(sig))
+            if len(tagsets) >= max_sets_total:
+                break
 
-        # ---- Build response ----
-        # Fewer consolidation => smaller "label" tag lists; higher => show more "sector identity".
-        max_set_size = max(4, min(14, int(round(6 + 6 * consolidation))))  # 6..12-ish (capped)
-        if tagsets_max_set_size_override is not None:
-            max_set_size = max(2, min(30, int(tagsets_max_set_size_override)))
+        # Triads: for strong edges (a,b), add a shared neighbor c to make 3-tag sets.
+        # This replaces the old 2-tag pair sets while keeping the "fine-grained" signal.
+        if len(tagsets) < max_sets_total:
+            for a, lst in top.items():
+                a = int(a)
+                # Only consider a limited number of edges per node to bound cost
+                triads_cap = min(18, len(lst or []))
+                if overlap_triads_per_node_override is not None:
+                    triads_cap = max(1, min(60, int(overlap_triads_per_node_override)))
+                    triads_cap = min(triads_cap, len(lst or []))
+                for b, _, _ in (lst or [])[:triads_cap]:
+                    b = int(b)
+                    if a == b:
+                        continue
+                    # Find shared neighbors
+                    na = [int(x[0]) for x in (top.get(a) or [])]
+                    nb = set(int(x[0]) for x in (top.get(b) or []))
+                    c = None
+                    for cand in na:
+                        if cand != a and cand != b and cand in nb:
+                            c = int(cand)
+                            break
+                    if c is None:
+                        continue
+                    sig = tuple(sorted((a, b, c)))
+                    if sig in seen:
+                        continue
+                    # Require real intersection support
+                    if tag_index.count((a, b, c)) < min_pair:
+                        continue
+                    seen.add(sig)
+                    tagsets.append([a, b, c])
+                    if len(tagsets) >= max_sets_total:
+                        break
+                if len(tagsets) >= max_sets_total:
+                    break
 
+        # Build payload (intersection semantics: a map "fits" if it has *all* tags in the set)
         sets = []
         next_id = 0
-        for idx, comp in enumerate(components):
-            bm_ids = comp_bm_ids.get(idx) or []
-            if not bm_ids:
+        for ts in tagsets:
+            inter_ids = tag_index.beatmaps(ts)
+            if not inter_ids:
                 continue
 
-            # Sector tags: top by support (display only)
-            top_tags = sorted(comp, key=lambda t: int(tag_support.get(int(t)) or 0), reverse=True)[:max_set_size]
+            m_ctr: Counter[str] = Counter()
+            for bid in inter_ids:
+                for m in (mapper_by_bm.get(int(bid)) or ['(unknown)']):
+                    if m:
+                        m_ctr[m] += 1
+            top_mappers = [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)]
+
             tags_out = []
-            for tid in top_tags:
+            for tid in ts:
                 nm = tag_name_map.get(int(tid))
                 if nm:
                     tags_out.append(nm)
-
-            # Top mappers within this sector
-            m_ctr: Counter[str] = Counter()
-            for bm_id in bm_ids:
-                for m in (mapper_by_bm.get(int(bm_id)) or ['(unknown)']):
-                    if m:
-                        m_ctr[m] += 1
-            top_mappers = [{'name': name, 'count': int(cnt)} for name, cnt in m_ctr.most_common(max_mappers)]
+            if not tags_out:
+                continue
 
             sets.append({
                 'id': next_id,
                 'tags': tags_out,
-                'map_count': int(len(bm_ids)),
+                'map_count': int(len(inter_ids)),
                 'top_mappers': top_mappers,
             })
             next_id += 1
-            if len(sets) >= max_sets:
-                break
 
-        # Sort by size (front-end uses `map_count` for area)
         sets.sort(key=lambda s: int(s.get('map_count') or 0), reverse=True)
         return JsonResponse({'sets': sets})
-    except Exception:
+
+    # ---- Single-tag view (non-disjoint; each tag is a sector sized by its own support) ----
+    # This intentionally "double counts" beatmaps across sectors when maps have multiple tags.
+    # That's OK for this visualization mode: you're inspecting tags directly.
+    if view == 'single':
+        bm_ids_all = list(bm_tags.keys())
+        if not bm_ids_all:
+            return JsonResponse({'sets': []})
+
+        mapper_by_bm = mappers_by_beatmap(bm_ids_all)
+
+        tag_map_counts: Counter[int] = Counter()
+        mapper_counts_by_tag: dict[int, Counter[str]] = defaultdict(Counter)
+        for bm_id, tags in bm_tags.items():
+            for tid in set(tags or []):
+                tag_map_counts[int(tid)] += 1
+                for mapper in (mapper_by_bm.get(int(bm_id)) or ['(unknown)']):
+                    if mapper:
+                        mapper_counts_by_tag[int(tid)][mapper] += 1
+
+        sets = []
+        next_id = 0
+        for tid, cnt in tag_map_counts.most_common():
+            name = tag_name_map.get(int(tid))
+            if not name:
+                continue
+            m_ctr = mapper_counts_by_tag.get(int(tid)) or Counter()
+            top_mappers = [{'name': n, 'count': int(c)} for n, c in m_ctr.most_common(max_mappers)]
+            sets.append({
+                'id': next_id,
+                'tags': [name],
+                'map_count': int(cnt),
+                'top_mappers': top_mappers,
+            })
+            next_id += 1
+            # Respect the same max_sets logic (derived from consolidation) so payload stays bounded.
+            max_sets_single = max(6, min(120, int(round(18 + 90 * (1.0 - consolidation)))))
+            if len(sets) >= max_sets_single:
+                break
+
+        return JsonResponse({'sets': sets})
+
+    # ---- Hard extremes: sector definitions ----
+    # Note: we still keep disjoint beatmap assignment so the treemap area doesn't double-count maps.
+    if consolidation <= CONS_STRICT_EPS:
+        # One sector per tag (components = singletons)
+        components: list[list[int]] = [[int(t)] for t in tag_ids]
+    elif consolidation >= CONS_MEGA_EPS:
+        # One mega community
+        components = [list(tag_ids)]
+    else:
+        components = []
+
+    # ---- Build mutual-kNN NPMI graph (hub-resistant) ----
+    # Edge weight: NPMI in [-1, 1] (hub-resistant)
+    if not components:
+        # Consolidation high => lower threshold + larger k => bigger components.
+        NPMI_THRESH_AT_0 = 0.35
+        NPMI_THRESH_SLOPE = 0.30
+        NPMI_THRESH_MIN = 0.05
+        edge_threshold = max(NPMI_THRESH_MIN, NPMI_THRESH_AT_0 - (NPMI_THRESH_SLOPE * consolidation))
+
+        # Also require a minimum co-occurrence; lower consolidation => stricter (avoid spurious edges).
+        min_pair = max(2, int(round(2 + 8 * (1.0 - consolidation))))  # 2..10
+
+        # kNN fanout per node (mutual kNN to avoid mega hubs exploding everything)
+        k = max(3, min(24, int(round(4 + 14 * consolidation))))  # 4..18-ish (capped)
+        if tagsets_min_pair_override is not None:
+            min_pair = max(1, min(50, int(tagsets_min_pair_override)))
+        if tagsets_edge_threshold_override is not None:
+            edge_threshold = max(0.0, min(1.0, float(tagsets_edge_threshold_override)))
+        if tagsets_k_override is not None:
+            k = max(1, min(80, int(tagsets_k_override)))
+
+        # Edges from the precomputed co-occurrence; top-k neighbors per tag (by npmi then cooc),
+        # then union mutual edges into components
+        top = npmi_top_neighbors(cooc.pair_arrays(tag_ids), tag_support, total_maps, min_pair, edge_threshold, k)
+        components = mutual_knn_components(tag_ids, top, tag_support)
+
+    # Limit number of sectors: low consolidation => allow more sectors.
+    max_sets = max(6, min(80, int(round(12 + 48 * (1.0 - consolidation)))))  # 60..12
+    if tagsets_max_sets_override is not None:
+        max_sets = max(2, min(200, int(tagsets_max_sets_override)))
+    components = components[: max_sets * 3]
+
+    # ---- Assign each beatmap to exactly one component (avoid double-counting) ----
+    # Score = sum over tags in component of inv_log_support(tag)
+    inv_log_support: dict[int, float] = {}
+    for tid, cnt in tag_support.items():
+        try:
+            inv_log_support[int(tid)] = 1.0 / max(1e-6, math.log(2.0 + float(cnt)))
+        except Exception:
+            inv_log_support[int(tid)] = 1.0
+
+    comp_by_tag: dict[int, int] = {}
+    for idx, comp in enumerate(components):
+        for tid in comp:
+            comp_by_tag[int(tid)] = idx
+
+    comp_bm_ids: dict[int, list[int]] = defaultdict(list)
+    for bm_id, tags in bm_tags.items():
+        if not tags:
+            continue
+        scores: dict[int, float] = defaultdict(float)
+        for tid in set(tags):
+            ci = comp_by_tag.get(int(tid))
+            if ci is None:
+                continue
+            scores[int(ci)] += float(inv_log_support.get(int(tid), 1.0))
+        if not scores:
+            continue
+        best_idx = max(scores.items(), key=lambda kv: kv[1])[0]
+        comp_bm_ids[int(best_idx)].append(int(bm_id))
+
+    # ---- Mapper counts per sector ----
+    all_assigned_ids: list[int] = []
+    for ids in comp_bm_ids.values():
+        all_assigned_ids.extend(ids)
+    if not all_assigned_ids:
         return JsonResponse({'sets': []})
 
+    mapper_by_bm = mappers_by_beatmap(all_assigned_ids)
+
+    # ---- Build response ----
+    # Fewer consolidation => smaller "label" tag lists; higher => show more "sector identity".
+    max_set_size = max(4, min(14, int(round(6 + 6 * consolidation))))  # 6..12-ish (capped)
+    if tagsets_max_set_size_override is not None:
+        max_set_size = max(2, min(30, int(tagsets_max_set_size_override)))
+
+    sets = []
+    next_id = 0
+    for idx, comp in enumerate(components):
+        bm_ids = comp_bm_ids.get(idx) or []
+        if not bm_ids:
+            continue
+
+        # Sector tags: top by support (display only)
+        top_tags = sorted(comp, key=lambda t: int(tag_support.get(int(t)) or 0), reverse=True)[:max_set_size]
+        tags_out = []
+        for tid in top_tags:
+            nm = tag_name_map.get(int(tid))
+            if nm:
+                tags_out.append(nm)
+
+        # Top mappers within this sector
+        m_ctr: Counter[str] = Counter()
+        for bm_id in bm_ids:
+            for m in (mapper_by_bm.get(int(bm_id)) or ['(unknown)']):
+                if m:
+                    m_ctr[m] += 1
+        top_mappers = [{'name': name, 'count': int(cnt)} for name, cnt in m_ctr.most_common(max_mappers)]
+
+        sets.append({
+            'id': next_id,
+            'tags': tags_out,
+            'map_count': int(len(bm_ids)),
+            'top_mappers': top_mappers,
+        })
+        next_id += 1
+        if len(sets) >= max_sets:
+            break
+
+    # Sort by size (front-end uses `map_count` for area)
+    sets.sort(key=lambda s: int(s.get('map_count') or 0), reverse=True)
+    return JsonResponse({'sets': sets})
+
 
 def statistics_latest_searches(request: HttpRequest):
     """AJAX endpoint: return the latest 15 search events as HTML (staff only)."""
@@ -1959,74 +1585,6 @@ def _week_floor(dt):
     return dt.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=dt.tzinfo) - timezone.timedelta(days=days)
 
 
-def _safe_client_id(v) -> str | None:
-    try:
-        s = (v or '').strip()
-        return s or None
-    except Exception:
-        return None
-
-
-def _safe_user_hash(v) -> str | None:
-    try:
-        s = (v or '').strip()
-        return s or None
-    except Exception:
-        return None
-
-
-def _identity_key(client_id: str | None, user_hash: str | None, is_staff: bool) -> tuple[str, str] | None:
-    """
-    Identity key used for unique-user counting:
-    - authenticated users are keyed by their hashed user id
-    - anonymous users are keyed by their client_id cookie
-    """
-    uh = _safe_user_hash(user_hash)
-    if uh:
-        return ('staff' if is_staff else 'user', uh)
-    cid = _safe_client_id(client_id)
-    if cid:
-        return ('anon', cid)
-    return None
-
-
-def _compute_followup_ids_for_searches(search_rows: list[dict], action_names: list[str]) -> set[str]:
-    """Return set of search_event_id strings that have at least one followup click with matching client_id."""
-    try:
-        if not search_rows:
-            return set()
-        event_id_to_client: dict[str, str] = {}
-        event_ids = []
-        for r in search_rows:
-            eid = r.get('event_id')
-            cid = _safe_client_id(r.get('client_id'))
-            if not eid or not cid:
-                continue
-            eid_str = str(eid)
-            event_id_to_client[eid_str] = cid
-            event_ids.append(eid)
-        if not event_ids:
-            return set()
-        click_qs = (
-            AnalyticsClickEvent.objects
-            .filter(action__in=action_names, search_event_id__in=event_ids)
-            .values('search_event_id', 'client_id')
-            .distinct()
-        )
-        matched: set[str] = set()
-        for c in click_qs:
-            sid = c.get('search_event_id')
-            cid = _safe_client_id(c.get('client_id'))
-            if not sid or not cid:
-                continue
-            sid_str = str(sid)
-            if event_id_to_client.get(sid_str) == cid:
-                matched.add(sid_str)
-        return matched
-    except Exception:
-        return set()
-
-
 def _bucket_series(
     search_rows: list[dict],
     start,
@@ -2058,514 +1616,138 @@ def _bucket_series(
 
 
 def statistics_admin_data(request: HttpRequest):
-    """AJAX endpoint returning admin analytics (staff only)."""
+    """AJAX endpoint returning admin analytics (staff only).
+
+    Reads the hourly analytics rollups (helpers.analytics_rollups) plus the raw events of the open hour.
+    """
     if not getattr(request.user, 'is_staff', False):
         return JsonResponse({}, status=403)
     try:
         now = timezone.now()
-        # Follow-up actions that represent a "download / take-away" from a search.
-        # Must include view_on_osu to match the existing tag stat "% with Direct/View (all time)".
-        download_actions = ['direct', 'view_on_osu', 'beatconnect', 'bulk_direct_all']
-
-        # -------------------- Overall Search -> Download conversion (all time) --------------------
-        total_searches_all = (
-            AnalyticsSearchEvent.objects
-            .exclude(query__isnull=True)
-            .exclude(query__exact='')
-            .count()
-        )
-        downloads_all = 0
-        pct_downloads_all = 0.0
+        # Catch up on closed hours the rollup worker has not rolled yet (usually none)
         try:
-            click_rows = list(
-                AnalyticsClickEvent.objects
-                .filter(action__in=download_actions)
-                .exclude(search_event_id__isnull=True)
-                .values('search_event_id', 'client_id')
-                .distinct()
-            )
-            referenced_ids = [c.get('search_event_id') for c in click_rows if c.get('search_event_id')]
-            referenced_ids = [i for i in referenced_ids if i]
-            if referenced_ids:
-                # Only load searches that were referenced by a download click (fast-path).
-                search_map = {
-                    str(eid): _safe_client_id(cid)
-                    for eid, cid in (
-                        AnalyticsSearchEvent.objects
-                        .filter(event_id__in=referenced_ids)
-                        .exclude(query__isnull=True)
-                        .exclude(query__exact='')
-                        .values_list('event_id', 'client_id')
-                    )
-                    if _safe_client_id(cid)
-                }
-                matched: set[str] = set()
-                for c in click_rows:
-                    sid = c.get('search_event_id')
-                    cid = _safe_client_id(c.get('client_id'))
-                    if not sid or not cid:
-                        continue
-                    sid_str = str(sid)
-                    if search_map.get(sid_str) == cid:
-                        matched.add(sid_str)
-                downloads_all = len(matched)
+            rollup_analytics(now)
         except Exception:
-            downloads_all = 0
+            pass
+        live = compute_hour_stats(rolled_until(), None)
+
+        # -------------------- Overall Search -> Download conversion (all time) --------------------
+        # Follow-up actions ("download / take-away" from a search) include view_on_osu to match
+        # the tag stat "% with Direct/View (all time)".
+        total_searches_all, downloads_all = rollup_totals(live)
         pct_downloads_all = (float(downloads_all) / float(total_searches_all) * 100.0) if total_searches_all else 0.0
 
-        # Hourly (last 24 hours)
-        hour_labels: list[str] = []
-        hour_search_counts: list[int] = []
-        hour_unique_counts: list[int] = []
-        hour_staff_counts: list[int] = []
-        hour_nonstaff_counts: list[int] = []
+        def _series(starts, end, daily_identities):
+            s = rollup_series(starts, end, live, daily_identities)
+            pct = [
+                (float(f) / float(c) * 100.0) if c else 0.0
+                for c, f in zip(s['searches'], s['followups'])
+            ]
+            uniques = [st + u + a for st, u, a in zip(s['staff'], s['user'], s['anon'])]
+            return s, pct, uniques
 
+        # Hourly (last 24 hours)
         start_24h = _hour_floor(now - timezone.timedelta(hours=23))
-        end_24h = start_24h + timezone.timedelta(hours=24)
-        for i in range(24):
-            hour_labels.append((_hour_floor(start_24h + timezone.timedelta(hours=i))).strftime('%H:%M'))
-
-        # Searches per hour: use the existing bucket helper (fast + consistent with followup logic)
-        try:
-            hour_search_rows = list(
-                AnalyticsSearchEvent.objects
-                .filter(created_at__gte=start_24h, created_at__lt=end_24h)
-                .exclude(query__isnull=True)
-                .exclude(query__exact='')
-                .values('event_id', 'client_id', 'created_at')
-            )
-            h_counts, _, _ = _bucket_series(hour_search_rows, start_24h, 3600, 24, set())
-            hour_search_counts = [int(v) for v in h_counts]
-        except Exception:
-            hour_search_counts = [0] * 24
-
-        # Unique identities per hour across search + click (hashed-user OR client_id)
-        hour_staff_sets = [set() for _ in range(24)]
-        hour_nonstaff_sets = [set() for _ in range(24)]
-        hour_anon_sets = [set() for _ in range(24)]
-        try:
-            hour_search_id_rows = list(
-                AnalyticsSearchEvent.objects
-                .filter(created_at__gte=start_24h, created_at__lt=end_24h)
-                .values('client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-            )
-            hour_click_id_rows = list(
-                AnalyticsClickEvent.objects
-                .filter(created_at__gte=start_24h, created_at__lt=end_24h)
-                .values('client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-            )
-            for r in hour_search_id_rows + hour_click_id_rows:
-                try:
-                    created = r.get('created_at')
-                    if not created:
-                        continue
-                    idx = int((created - start_24h).total_seconds() // 3600)
-                    if idx < 0 or idx >= 24:
-                        continue
-                    ident = _identity_key(r.get('client_id'), r.get('logged_in_user_id'), bool(r.get('is_staff')))
-                    if not ident:
-                        continue
-                    kind, key = ident
-                    if kind == 'staff':
-                        hour_staff_sets[idx].add(key)
-                    elif kind == 'user':
-                        hour_nonstaff_sets[idx].add(key)
-                    else:
-                        hour_anon_sets[idx].add(key)
-                except Exception:
-                    continue
-        except Exception:
-            pass
-
-        for i in range(24):
-            sc = len(hour_staff_sets[i])
-            nc = len(hour_nonstaff_sets[i])
-            ac = len(hour_anon_sets[i])
-            hour_staff_counts.append(int(sc))
-            hour_nonstaff_counts.append(int(nc))
-            hour_unique_counts.append(int(sc + nc + ac))
-
-        # Download % per hour (last 24h)
-        hour_dl_followups: list[int] = [0] * 24
-        hour_dl_pct: list[float] = [0.0] * 24
-        try:
-            start_24h = _hour_floor(now - timezone.timedelta(hours=23))
-            end_24h = start_24h + timezone.timedelta(hours=24)
-            hour_search_rows = list(
-                AnalyticsSearchEvent.objects
-                .filter(created_at__gte=start_24h, created_at__lt=end_24h)
-                .exclude(query__isnull=True)
-                .exclude(query__exact='')
-                .values('event_id', 'client_id', 'created_at')
-            )
-            hour_followup_ids = _compute_followup_ids_for_searches(hour_search_rows, download_actions)
-            _, f_counts, pct = _bucket_series(hour_search_rows, start_24h, 3600, 24, hour_followup_ids)
-            hour_dl_followups = [int(v) for v in f_counts]
-            hour_dl_pct = [float(v) for v in pct]
-        except Exception:
-            pass
+        hour_starts = [start_24h + timezone.timedelta(hours=i) for i in range(24)]
+        hour_labels = [h.strftime('%H:%M') for h in hour_starts]
+        h, hour_dl_pct, hour_unique_counts = _series(hour_starts, start_24h + timezone.timedelta(hours=24), False)
 
         # Daily (last 30 days)
-        day_labels: list[str] = []
-        day_search_counts: list[int] = []
-        day_unique_counts: list[int] = []
-        day_staff_counts: list[int] = []
-        day_nonstaff_counts: list[int] = []
-        for i in range(30):
-            start = _day_floor(now - timezone.timedelta(days=(29 - i)))
-            end = start + timezone.timedelta(days=1)
-            day_labels.append(start.strftime('%Y-%m-%d'))
-            try:
-                c = (
-                    AnalyticsSearchEvent.objects
-                    .filter(created_at__gte=start, created_at__lt=end)
-                    .exclude(query__isnull=True)
-                    .exclude(query__exact='')
-                    .count()
-                )
-            except Exception:
-                c = 0
-            day_search_counts.append(int(c))
-            # Filled below via bucketed identity sets
-
-        # Unique identities per day across search + click (hashed-user OR client_id)
-        try:
-            start_30d = _day_floor(now - timezone.timedelta(days=29))
-            end_30d = start_30d + timezone.timedelta(days=30)
-            day_staff_sets = [set() for _ in range(30)]
-            day_nonstaff_sets = [set() for _ in range(30)]
-            day_anon_sets = [set() for _ in range(30)]
-            day_search_id_rows = list(
-                AnalyticsSearchEvent.objects
-                .filter(created_at__gte=start_30d, created_at__lt=end_30d)
-                .values('client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-            )
-            day_click_id_rows = list(
-                AnalyticsClickEvent.objects
-                .filter(created_at__gte=start_30d, created_at__lt=end_30d)
-                .values('client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-            )
-            for r in day_search_id_rows + day_click_id_rows:
-                try:
-                    created = r.get('created_at')
-                    if not created:
-                        continue
-                    idx = int((created - start_30d).total_seconds() // (24 * 3600))
-                    if idx < 0 or idx >= 30:
-                        continue
-                    ident = _identity_key(r.get('client_id'), r.get('logged_in_user_id'), bool(r.get('is_staff')))
-                    if not ident:
-                        continue
-                    kind, key = ident
-                    if kind == 'staff':
-                        day_staff_sets[idx].add(key)
-                    elif kind == 'user':
-                        day_nonstaff_sets[idx].add(key)
-                    else:
-                        day_anon_sets[idx].add(key)
-                except Exception:
-                    continue
-            for i in range(30):
-                sc = len(day_staff_sets[i])
-                nc = len(day_nonstaff_sets[i])
-                ac = len(day_anon_sets[i])
-                day_staff_counts.append(int(sc))
-                day_nonstaff_counts.append(int(nc))
-                day_unique_counts.append(int(sc + nc + ac))
-        except Exception:
-            # Fallback: keep arrays aligned
-            day_unique_counts = [0] * 30
-            day_staff_counts = [0] * 30
-            day_nonstaff_counts = [0] * 30
-
-        # Download % per day (last 30d)
-        day_dl_followups: list[int] = [0] * 30
-        day_dl_pct: list[float] = [0.0] * 30
-        try:
-            start_30d = _day_floor(now - timezone.timedelta(days=29))
-            end_30d = start_30d + timezone.timedelta(days=30)
-            day_search_rows = list(
-                AnalyticsSearchEvent.objects
-                .filter(created_at__gte=start_30d, created_at__lt=end_30d)
-                .exclude(query__isnull=True)
-                .exclude(query__exact='')
-                .values('event_id', 'client_id', 'created_at')
-            )
-            day_followup_ids = _compute_followup_ids_for_searches(day_search_rows, download_actions)
-            _, f_counts_d, pct_d = _bucket_series(day_search_rows, start_30d, 24 * 3600, 30, day_followup_ids)
-            day_dl_followups = [int(v) for v in f_counts_d]
-            day_dl_pct = [float(v) for v in pct_d]
-        except Exception:
-            pass
+        start_30d = _day_floor(now - timezone.timedelta(days=29))
+        day_starts = [start_30d + timezone.timedelta(days=i) for i in range(30)]
+        day_labels = [d.strftime('%Y-%m-%d') for d in day_starts]
+        d, day_dl_pct, day_unique_counts = _series(day_starts, start_30d + timezone.timedelta(days=30), True)
 
         # Weekly (last 52 weeks) - used for "Year" view (52 candles)
-        week_labels: list[str] = []
-        week_search_counts: list[int] = []
-        week_unique_counts: list[int] = []
-        week_staff_counts: list[int] = []
-        week_nonstaff_counts: list[int] = []
-        week_dl_followups: list[int] = [0] * 52
-        week_dl_pct: list[float] = [0.0] * 52
         start_52w = _week_floor(now) - timezone.timedelta(weeks=51)
-        end_52w = start_52w + timezone.timedelta(weeks=52)
-        try:
-            week_search_rows = list(
-                AnalyticsSearchEvent.objects
-                .filter(created_at__gte=start_52w, created_at__lt=end_52w)
-                .exclude(query__isnull=True)
-                .exclude(query__exact='')
-                .values('event_id', 'client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-            )
-            week_followup_ids = _compute_followup_ids_for_searches(week_search_rows, download_actions)
-            w_counts, w_f, w_pct = _bucket_series(week_search_rows, start_52w, 7 * 24 * 3600, 52, week_followup_ids)
-            week_dl_followups = [int(v) for v in w_f]
-            week_dl_pct = [float(v) for v in w_pct]
-
-            # Unique identities per week: union of hashed-user OR client_id in that week bucket
-            week_click_rows = list(
-                AnalyticsClickEvent.objects
-                .filter(created_at__gte=start_52w, created_at__lt=end_52w)
-                .values('client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-            )
-            week_staff_sets = [set() for _ in range(52)]
-            week_nonstaff_sets = [set() for _ in range(52)]
-            week_anon_sets = [set() for _ in range(52)]
-            for r in week_search_rows:
-                try:
-                    idx = int((r['created_at'] - start_52w).total_seconds() // (7 * 24 * 3600))
-                    if 0 <= idx < 52:
-                        ident = _identity_key(r.get('client_id'), r.get('logged_in_user_id'), bool(r.get('is_staff')))
-                        if ident:
-                            kind, key = ident
-                            if kind == 'staff':
-                                week_staff_sets[idx].add(key)
-                            elif kind == 'user':
-                                week_nonstaff_sets[idx].add(key)
-                            else:
-                                week_anon_sets[idx].add(key)
-                except Exception:
-                    continue
-            for r in week_click_rows:
-                try:
-                    idx = int((r['created_at'] - start_52w).total_seconds() // (7 * 24 * 3600))
-                    if 0 <= idx < 52:
-                        ident = _identity_key(r.get('client_id'), r.get('logged_in_user_id'), bool(r.get('is_staff')))
-                        if ident:
-                            kind, key = ident
-                            if kind == 'staff':
-                                week_staff_sets[idx].add(key)
-                            elif kind == 'user':
-                                week_nonstaff_sets[idx].add(key)
-                            else:
-                                week_anon_sets[idx].add(key)
-                except Exception:
-                    continue
-
-            for i in range(52):
-                wk_start = start_52w + timezone.timedelta(weeks=i)
-                week_labels.append(wk_start.strftime('%Y-%m-%d'))
-                week_search_counts.append(int(w_counts[i]))
-                sc = len(week_staff_sets[i])
-                nc = len(week_nonstaff_sets[i])
-                ac = len(week_anon_sets[i])
-                week_staff_counts.append(int(sc))
-                week_nonstaff_counts.append(int(nc))
-                week_unique_counts.append(int(sc + nc + ac))
-        except Exception:
-            week_labels = [(start_52w + timezone.timedelta(weeks=i)).strftime('%Y-%m-%d') for i in range(52)]
-            week_search_counts = [0] * 52
-            week_unique_counts = [0] * 52
-            week_staff_counts = [0] * 52
-            week_nonstaff_counts = [0] * 52
+        week_starts = [start_52w + timezone.timedelta(weeks=i) for i in range(52)]
+        week_labels = [w.strftime('%Y-%m-%d') for w in week_starts]
+        w, week_dl_pct, week_unique_counts = _series(week_starts, start_52w + timezone.timedelta(weeks=52), True)
 
-        # All-time (up to 52 buckets)
+        # All-time (up to 52 whole-day buckets)
         all_labels: list[str] = []
-        all_search_counts: list[int] = []
-        all_unique_counts: list[int] = []
-        all_staff_counts: list[int] = []
-        all_nonstaff_counts: list[int] = []
-        all_dl_followups: list[int] = []
+        a = {'searches': [], 'followups': [], 'staff': [], 'user': []}
         all_dl_pct: list[float] = []
+        all_unique_counts: list[int] = []
         try:
             first_ts = AnalyticsSearchEvent.objects.order_by('created_at').values_list('created_at', flat=True).first()
         except Exception:
             first_ts = None
         if first_ts:
             all_start = _day_floor(first_ts)
-            span_sec = max(1, int((now - all_start).total_seconds()))
-            bucket_sec = int(math.ceil(span_sec / 52.0))
-            bucket_count = int(math.ceil(span_sec / float(bucket_sec)))
-            bucket_count = min(52, max(1, bucket_count))
-            all_end = all_start + timezone.timedelta(seconds=bucket_sec * bucket_count)
-            try:
-                all_search_rows = list(
-                    AnalyticsSearchEvent.objects
-                    .filter(created_at__gte=all_start, created_at__lt=all_end)
-                    .exclude(query__isnull=True)
-                    .exclude(query__exact='')
-                    .values('event_id', 'client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-                )
-                all_followup_ids = _compute_followup_ids_for_searches(all_search_rows, download_actions)
-                a_counts, a_f, a_pct = _bucket_series(all_search_rows, all_start, bucket_sec, bucket_count, all_followup_ids)
-                all_dl_followups = [int(v) for v in a_f]
-                all_dl_pct = [float(v) for v in a_pct]
-
-                all_click_rows = list(
-                    AnalyticsClickEvent.objects
-                    .filter(created_at__gte=all_start, created_at__lt=all_end)
-                    .values('client_id', 'created_at', 'logged_in_user_id', 'is_staff')
-                )
-                all_staff_sets = [set() for _ in range(bucket_count)]
-                all_nonstaff_sets = [set() for _ in range(bucket_count)]
-                all_anon_sets = [set() for _ in range(bucket_count)]
-                for r in all_search_rows:
-                    try:
-                        idx = int((r['created_at'] - all_start).total_seconds() // bucket_sec)
-                        if 0 <= idx < bucket_count:
-                            ident = _identity_key(r.get('client_id'), r.get('logged_in_user_id'), bool(r.get('is_staff')))
-                            if ident:
-                                kind, key = ident
-                                if kind == 'staff':
-                                    all_staff_sets[idx].add(key)
-                                elif kind == 'user':
-                                    all_nonstaff_sets[idx].add(key)
-                                else:
-                                    all_anon_sets[idx].add(key)
-                    except Exception:
-                        continue
-                for r in all_click_rows:
-                    try:
-                        idx = int((r['created_at'] - all_start).total_seconds() // bucket_sec)
-                        if 0 <= idx < bucket_count:
-                            ident = _identity_key(r.get('client_id'), r.get('logged_in_user_id'), bool(r.get('is_staff')))
-                            if ident:
-                                kind, key = ident
-                                if kind == 'staff':
-                                    all_staff_sets[idx].add(key)
-                                elif kind == 'user':
-                                    all_nonstaff_sets[idx].add(key)
-                                else:
-                                    all_anon_sets[idx].add(key)
-                    except Exception:
-                        continue
-                for i in range(bucket_count):
-                    bstart = all_start + timezone.timedelta(seconds=bucket_sec * i)
-                    all_labels.append(bstart.strftime('%Y-%m-%d'))
-                    all_search_counts.append(int(a_counts[i]))
-                    sc = len(all_staff_sets[i])
-                    nc = len(all_nonstaff_sets[i])
-                    ac = len(all_anon_sets[i])
-                    all_staff_counts.append(int(sc))
-                    all_nonstaff_counts.append(int(nc))
-                    all_unique_counts.append(int(sc + nc + ac))
-            except Exception:
-                all_labels, all_search_counts, all_unique_counts, all_dl_followups, all_dl_pct = [], [], [], [], []
-                all_staff_counts, all_nonstaff_counts = [], []
+            span_days = max(1, int(math.ceil((now - all_start).total_seconds() / 86400.0)))
+            bucket_days = int(math.ceil(span_days / 52.0))
+            bucket_count = min(52, max(1, int(math.ceil(span_days / float(bucket_days)))))
+            all_starts = [all_start + timezone.timedelta(days=bucket_days * i) for i in range(bucket_count)]
+            all_labels = [b.strftime('%Y-%m-%d') for b in all_starts]
+            all_end = all_start + timezone.timedelta(days=bucket_days * bucket_count)
+            a, all_dl_pct, all_unique_counts = _series(all_starts, all_end, True)
 
         # Average clicks per action per day (last 30 days)
-        clicks_since = _day_floor(now) - timezone.timedelta(days=29)
-        rows = (
-            AnalyticsClickEvent.objects
-            .filter(created_at__gte=clicks_since)
-            .values('action')
-            .annotate(c=Count('id'))
-        )
-        avg_clicks = {}
-        click_counts_30d = {}
-        for r in rows:
-            a = r.get('action') or ''
-            cnt = int(r.get('c') or 0)
-            avg_clicks[a] = float(cnt) / 30.0
-            click_counts_30d[a] = cnt
+        click_counts_30d = rollup_click_counts(_day_floor(now) - timezone.timedelta(days=29), live)
+        avg_clicks = {action: float(cnt) / 30.0 for action, cnt in click_counts_30d.items()}
 
         # Last used timestamp per action (all time)
-        click_last_rows = (
-            AnalyticsClickEvent.objects
-            .values('action')
-            .annotate(last_ts=Max('created_at'))
-        )
         last_used_per_action = {}
-        for r in click_last_rows:
-            a = r.get('action') or ''
-            ts = r.get('last_ts')
-            if not a or not ts:
+        for action, ts in rollup_click_last_used(live).items():
+            if not action:
                 continue
             try:
-                last_used_per_action[a] = ts.isoformat()
+                last_used_per_action[action] = ts.isoformat()
             except Exception:
                 continue
 
         # Top 25 searched tags (last 90 days for performance)
-        tags_since = now - timezone.timedelta(days=90)
+        tags_since = _hour_floor(now - timezone.timedelta(days=90))
         tag_counter: Counter[str] = Counter()
         valid_tags = {
             ((tag_name or '').strip().lower(), mode or Tag.MODE_STD): (tag_name, mode)
             for tag_name, mode in Tag.objects.values_list('name', 'mode')
         }
         try:
-            qs_tags = (
-                AnalyticsSearchEvent.objects
-                .filter(created_at__gte=tags_since)
-                .exclude(query__isnull=True)
-                .exclude(query__exact='')
-                .values('tags', 'query', 'flags')
-            )
-            for event in qs_tags:
-                raw_query = event.get('query') or ''
-                flags = event.get('flags') or {}
-                search_mode = Tag.normalize_mode(flags.get('mode')) if isinstance(flags, dict) else Tag.MODE_STD
-                tokens = _tokenize_query_terms(raw_query)
-                tags = event.get('tags') or []
-                seen = set()
-                for t in tags:
-                    tag_lower = (str(t or '').strip().lower())
-                    key = (tag_lower, search_mode)
-                    canonical_tuple = valid_tags.get(key)
-                    if not canonical_tuple or tag_lower in seen:
-                        continue
-                    if (tag_lower not in tokens) and (not _query_contains_phrase(raw_query, tag_lower)):
-                        continue
-                    display_name, mode = canonical_tuple
-                    tag_counter[(display_name, mode)] += 1
-                    seen.add(tag_lower)
+            for key, cnt in rollup_search_tag_counts(tags_since, live).items():
+                canonical_tuple = valid_tags.get(key)
+                if canonical_tuple:
+                    tag_counter[canonical_tuple] += cnt
         except Exception:
             tag_counter = Counter()
+        # Ties in name order, so the cut at 25 does not depend on row order
         top_tags = [
             {'name': name, 'mode': mode, 'count': int(cnt)}
-            for (name, mode), cnt in tag_counter.most_common(25)
+            for (name, mode), cnt in sorted(tag_counter.items(), key=lambda kv: (-kv[1], kv[0]))[:25]
         ]
 
         return JsonResponse({
             'searches': {
-                'hour': { 'labels': hour_labels, 'counts': hour_search_counts, 'dl_followups': hour_dl_followups, 'dl_pct': hour_dl_pct },
-                'day': { 'labels': day_labels, 'counts': day_search_counts, 'dl_followups': day_dl_followups, 'dl_pct': day_dl_pct },
-                'year': { 'labels': week_labels, 'counts': week_search_counts, 'dl_followups': week_dl_followups, 'dl_pct': week_dl_pct },
-                'all': { 'labels': all_labels, 'counts': all_search_counts, 'dl_followups': all_dl_followups, 'dl_pct': all_dl_pct },
+                'hour': { 'labels': hour_labels, 'counts': h['searches'], 'dl_followups': h['followups'], 'dl_pct': hour_dl_pct },
+                'day': { 'labels': day_labels, 'counts': d['searches'], 'dl_followups': d['followups'], 'dl_pct': day_dl_pct },
+                'year': { 'labels': week_labels, 'counts': w['searches'], 'dl_followups': w['followups'], 'dl_pct': week_dl_pct },
+                'all': { 'labels': all_labels, 'counts': a['searches'], 'dl_followups': a['followups'], 'dl_pct': all_dl_pct },
             },
             'uniques': {
                 'hour': {
                     'labels': hour_labels,
                     'counts': hour_unique_counts,
-                    'logged_in_staff_counts': hour_staff_counts,
-                    'logged_in_nonstaff_counts': hour_nonstaff_counts,
+                    'logged_in_staff_counts': h['staff'],
+                    'logged_in_nonstaff_counts': h['user'],
                 },
                 'day': {
                     'labels': day_labels,
                     'counts': day_unique_counts,
-                    'logged_in_staff_counts': day_staff_counts,
-                    'logged_in_nonstaff_counts': day_nonstaff_counts,
+                    'logged_in_staff_counts': d['staff'],
+                    'logged_in_nonstaff_counts': d['user'],
                 },
                 'year': {
                     'labels': week_labels,
                     'counts': week_unique_counts,
-                    'logged_in_staff_counts': week_staff_counts,
-                    'logged_in_nonstaff_counts': week_nonstaff_counts,
+                    'logged_in_staff_counts': w['staff'],
+                    'logged_in_nonstaff_counts': w['user'],
                 },
                 'all': {
                     'labels': all_labels,
                     'counts': all_unique_counts,
-                    'logged_in_staff_counts': all_staff_counts,
-                    'logged_in_nonstaff_counts': all_nonstaff_counts,
+                    'logged_in_staff_counts': a['staff'],
+                    'logged_in_nonstaff_counts': a['user'],
                 },
             },
             'download_conversion': {
@@ -2646,8 +1828,8 @@ def statistics_admin_tag(request: HttpRequest):
             if search_mode != requested_mode:
                 continue
             raw_query = e.get('query') or ''
-            tokens = _tokenize_query_terms(raw_query)
-            if (tag_lower not in tokens) and (not _query_contains_phrase(raw_query, tag_lower)):
+            tokens = tokenize_query_terms(raw_query)
+            if (tag_lower not in tokens) and (not query_contains_phrase(raw_query, tag_lower)):
                 continue
             created = e.get('created_at') or now
             # 30d daily bucket
@@ -2688,11 +1870,11 @@ def statistics_admin_tag(request: HttpRequest):
                 if search_mode != requested_mode:
                     continue
                 raw_query = r.get('query') or ''
-                tokens = _tokenize_query_terms(raw_query)
-                if (tag_lower not in tokens) and (not _query_contains_phrase(raw_query, tag_lower)):
+                tokens = tokenize_query_terms(raw_query)
+                if (tag_lower not in tokens) and (not query_contains_phrase(raw_query, tag_lower)):
                     continue
                 filtered_hour.append(r)
-            hour_followup_ids = _compute_followup_ids_for_searches(filtered_hour, download_actions)
+            hour_followup_ids = followup_search_ids(filtered_hour, download_actions)
             _, _, hpct = _bucket_series(filtered_hour, start_24h, 3600, 24, hour_followup_ids)
             hour_dl_pct = [float(v) for v in hpct]
         except Exception:
@@ -2714,11 +1896,11 @@ def statistics_admin_tag(request: HttpRequest):
                 if search_mode != requested_mode:
                     continue
                 raw_query = r.get('query') or ''
-                tokens = _tokenize_query_terms(raw_query)
-                if (tag_lower not in tokens) and (not _query_contains_phrase(raw_query, tag_lower)):
+                tokens = tokenize_query_terms(raw_query)
+                if (tag_lower not in tokens) and (not query_contains_phrase(raw_query, tag_lower)):
                     continue
                 filtered_day.append(r)
-            day_followup_ids = _compute_followup_ids_for_searches(filtered_day, download_actions)
+            day_followup_ids = followup_search_ids(filtered_day, download_actions)
             _, _, dpct = _bucket_series(filtered_day, start_30d, 24 * 3600, 30, day_followup_ids)
             day_dl_pct = [float(v) for v in dpct]
         except Exception:
@@ -2740,11 +1922,11 @@ def statistics_admin_tag(request: HttpRequest):
                 if search_mode != requested_mode:
                     continue
                 raw_query = r.get('query') or ''
-                tokens = _tokenize_query_terms(raw_query)
-                if (tag_lower not in tokens) and (not _query_contains_phrase(raw_query, tag_lower)):
+                tokens = tokenize_query_terms(raw_query)
+                if (tag_lower not in tokens) and (not query_contains_phrase(raw_query, tag_lower)):
                     continue
                 filtered_year.append(r)
-            year_followup_ids = _compute_followup_ids_for_searches(filtered_year, download_actions)
+            year_followup_ids = followup_search_ids(filtered_year, download_actions)
             y_counts, _, ypct = _bucket_series(filtered_year, start_52w, 7 * 24 * 3600, 52, year_followup_ids)
             year_counts = [int(v) for v in y_counts]
             year_dl_pct = [float(v) for v in ypct]
@@ -2767,8 +1949,8 @@ def statistics_admin_tag(request: HttpRequest):
             if search_mode != requested_mode:
                 continue
             raw_query = e.get('query') or ''
-            tokens = _tokenize_query_terms(raw_query)
-            if (tag_lower not in tokens) and (not _query_contains_phrase(raw_query, tag_lower)):
+            tokens = tokenize_query_terms(raw_query)
+            if (tag_lower not in tokens) and (not query_contains_phrase(raw_query, tag_lower)):
                 continue
             eid = str(e.get('event_id'))
             cid = e.get('client_id') or None
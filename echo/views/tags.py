@@ -41,6 +41,8 @@ from collections import defaultdict
 from ..models import Beatmap, Tag, TagApplication, Vote, TagRelation
 from .auth import api
 from ..templatetags.custom_tags import has_tag_edit_permission
+from ..helpers.global_stats import record_tag_application_change
+from ..helpers.tag_cooccurrence import record_tag_cooccurrence_change
 
 
 # ----------------------------- Tag Views ----------------------------- #
@@ -494,21 +496,30 @@ def modify_tag(request):
                 user=user,
                 true_negative=True if want_true_negative else False,
             )
+            Beatmap.mark_tags_changed([beatmap.pk])
 
             if not created:
                 tag_application.delete()
+                record_tag_application_change(beatmap.pk, user.pk, tag_application.true_negative, -1)
+                record_tag_cooccurrence_change(beatmap.pk, tag.pk, tag_application.true_negative, -1)
                 if not TagApplication.objects.filter(tag=tag).exists():
                     tag.delete()
                 return JsonResponse({'status': 'success', 'action': 'removed', 'true_negative': want_true_negative, 'created': False})
 
+            record_tag_application_change(beatmap.pk, user.pk, tag_application.true_negative, 1)
+            record_tag_cooccurrence_change(beatmap.pk, tag.pk, tag_application.true_negative, 1)
+
             # If an admin applies a true negative, remove any predicted tag for this beatmap+tag
             if want_true_negative:
-                TagApplication.objects.filter(
+                removed, _ = TagApplication.objects.filter(
                     tag=tag,
                     beatmap=beatmap,
                     user__isnull=True,
                     is_prediction=True,
                 ).delete()
+                if removed:
+                    record_tag_application_change(beatmap.pk, None, False, -removed)
+                    record_tag_cooccurrence_change(beatmap.pk, tag.pk, False, -1)
 
             return JsonResponse({
                 'status': 'success',
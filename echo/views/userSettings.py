@@ -19,7 +19,7 @@ from django.http import JsonResponse
 # ---------------------------------------------------------------------------
 # Local application imports
 # ---------------------------------------------------------------------------
-from ..models import CustomToken, TagApplication, UserSettings, ManiaKeyOption
+from ..models import Beatmap, CustomToken, TagApplication, UserSettings, ManiaKeyOption
 
 
 # ----------------------------- Settings Views ----------------------------- #
@@ -158,7 +158,10 @@ def delete_user_data(request):
         try:
             with transaction.atomic():
                 # Delete the user’s tag applications
-                TagApplication.objects.filter(user=user).delete()
+                user_apps = TagApplication.objects.filter(user=user)
+                touched = set(user_apps.values_list('beatmap_id', flat=True))
+                user_apps.delete()
+                Beatmap.mark_tags_changed(touched)
 
                 # Optionally remove profile but keep the account
                 if hasattr(user, 'profile'):
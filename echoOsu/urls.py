@@ -7,7 +7,7 @@ from rest_framework.routers import DefaultRouter
 from echo.views.home      import about, tag_library
 from echo.views.auth      import osu_callback
 from echo.views.beatmap   import (
-    beatmap_detail, update_beatmap_info, beatmap_timeseries,
+    beatmap_detail, update_beatmap_info, beatmap_timeseries, compute_job_status,
     save_tag_timestamps, quick_add_beatmap,
 )
 from echo.views.search    import search_results, preset_search_farm, preset_search_new_favorites, toggle_saved_search, update_saved_search_title, delete_saved_search
@@ -30,7 +30,7 @@ from echo.views.analytics import log_impressions
 from echo.views.api import (
     BeatmapViewSet, TagViewSet, TagApplicationViewSet, UserProfileViewSet,
     admin_upload_predictions, admin_upload_tag_applications, admin_refresh_beatmaps, admin_upload_users,
-    admin_flush_predictions, admin_flush_all_predictions, calculate_pp,
+    admin_flush_predictions, admin_flush_all_predictions, admin_export_corpus, calculate_pp,
 )
 
 
@@ -89,6 +89,7 @@ urlpatterns = [
 ######### API #########
     path('beatmap_detail/<int:beatmap_id>/', beatmap_detail, name='beatmap_detail'),
     path('beatmap_detail/<int:beatmap_id>/timeseries/', beatmap_timeseries, name='beatmap_timeseries'),
+    path('compute_jobs/<int:job_id>/', compute_job_status, name='compute_job_status'),
     path('beatmap_detail/<int:beatmap_id>/tag_timestamps/save/', save_tag_timestamps, name='beatmap_save_tag_timestamps'),
 
     # removed redundant tag endpoints now served by tag-applications include
@@ -106,6 +107,7 @@ urlpatterns = [
     path('api/calculate-pp/', calculate_pp, name='calculate_pp'),
     path('api/admin/flush/predictions/', admin_flush_predictions),
     path('api/admin/flush/predictions/all/', admin_flush_all_predictions),
+    path('api/admin/export/corpus/', admin_export_corpus),
 ]
 
 handler404 = 'echo.views.custom_404_view'
\ No newline at end of file
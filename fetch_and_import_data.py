@@ -53,22 +53,26 @@ def create_users(user_profiles_data):
     return user_map
 
 def fetch_beatmaps(batch_size=500):
-    offset = 0
+    # Keyset cursor paging: each page is an indexed range scan regardless of depth
+    after_id = 0
     beatmaps = []
     while True:
         response = requests.get(
-            f'{BASE_URL}/api/beatmaps/tags/?batch_size={batch_size}&offset={offset}', 
+            f'{BASE_URL}/api/beatmaps/tags/',
+            params={'batch_size': batch_size, 'after_id': after_id},
             headers=headers
         )
         if response.status_code != 200:
             break
 
-        batch_data = response.json()
-        if not batch_data:
-            break
-
+        payload = response.json()
+        batch_data = payload.get('results') or []
         beatmaps.extend(batch_data)
-        offset += batch_size
+
+        next_cursor = payload.get('next_cursor')
+        if not batch_data or next_cursor is None:
+            break
+        after_id = next_cursor
 
     return beatmaps
 